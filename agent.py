@@ -1,64 +1,274 @@
-from tools.mentions_tool import fetch_mentions_summary
-from tools.posts_tool import fetch_posts_summary
-from tools.seo_tool import fetch_seo_signals_summary
+from tools.mentions_tool import fetch_mentions_summary, fetch_mentions_page
+from tools.posts_tool import fetch_posts_summary, fetch_posts_page
+from tools.seo_tool import (
+    extract_keyword_args, fetch_seo_keyword_answer, fetch_seo_signals_summary, fetch_seo_signals_page,
+)
+from tools.mention_search import extract_search_args, fetch_search_page, search_mentions, search_page_start
+from tools.sentiment_trends import fetch_sentiment_trend
+from tools.analytics_tool import (
+    extract_period_days, fetch_mention_sentiment_breakdown, fetch_post_engagement_breakdown,
+)
 from schema import UserProfile
+from router import detect_intents
+from memory_store import update_user_profile
+from tools.telemetry import span
+import asyncio
+import logging
+import os
 import re
+from typing import AsyncIterator, NamedTuple
+
+logger = logging.getLogger(__name__)
 
 def is_arabic(text: str) -> bool:
     """Quick check: does the string contain Arabic letters?"""
     return bool(re.search(r'[\u0600-\u06FF]', text))
 
-def route_query(message: str) -> str | None:
+# Tool behind each router intent
+INTENT_TOOLS = {
+    "mentions": fetch_mentions_summary,
+    "posts": fetch_posts_summary,
+    "seo": fetch_seo_signals_summary,
+    "mention_analytics": fetch_mention_sentiment_breakdown,
+    "post_analytics": fetch_post_engagement_breakdown,
+    "mention_search": search_mentions,
+    "seo_keyword": fetch_seo_keyword_answer,
+    "sentiment_trend": fetch_sentiment_trend,
+}
+
+# Intents whose tool takes arguments pulled from the message
+INTENT_ARGS = {
+    "mention_analytics": lambda message: (extract_period_days(message),),
+    "post_analytics": lambda message: (extract_period_days(message),),
+    "mention_search": extract_search_args,
+    "seo_keyword": extract_keyword_args,
+    "sentiment_trend": lambda message: (extract_period_days(message),),
+}
+
+# Shown when a tool times out or fails inside a multi-tool answer
+INTENT_LABELS = {
+    "mentions": "ذكر العلامة التجارية",
+    "posts": "المنشورات",
+    "seo": "تحليلات SEO",
+    "mention_analytics": "تحليل المشاعر",
+    "post_analytics": "تحليل أداء المنشورات",
+    "mention_search": "البحث في الإشارات",
+    "seo_keyword": "ترتيب الكلمات المفتاحية",
+    "sentiment_trend": "اتجاه المشاعر",
+}
+
+TOOL_TIMEOUT_SECONDS = float(os.getenv("TOOL_TIMEOUT_SECONDS", "8"))
+INTENT_TIMEOUTS = {
+    intent: float(os.getenv(f"TOOL_TIMEOUT_{intent.upper()}", str(TOOL_TIMEOUT_SECONDS)))
+    for intent in INTENT_TOOLS
+}
+
+SECTION_SEPARATOR = "\n\n━━━━━━━━━━\n\n"
+
+# Intents whose answer can be continued with "show more"
+MORE_INTENT = "more"
+PAGED_TOOLS = {
+    "mentions": fetch_mentions_page,
+    "posts": fetch_posts_page,
+    "seo": fetch_seo_signals_page,
+    "mention_search": fetch_search_page,
+}
+# Paged intents whose first cursor depends on the question: (intent, cursor) from the call's args
+PAGE_STARTS = {
+    "mention_search": search_page_start,
+}
+
+class ToolCall(NamedTuple):
+    intent: str
+    args: tuple = ()
+
+def _mention_search_fallback(message: str, args: tuple) -> "ToolCall | None":
+    """Nothing to search for: the mentions summary, or the analytics for a named period."""
+    if any(args):
+        return None
+    days = extract_period_days(message)
+    return ToolCall("mention_analytics", (days,)) if days else ToolCall("mentions")
+
+def _seo_keyword_fallback(message: str, args: tuple) -> "ToolCall | None":
+    """A rank question without a real keyword ("وش ترتيبنا في محركات البحث؟"): the SEO summary."""
+    mode, term = args
+    return ToolCall("seo") if mode in ("keyword", "prefix") and not term else None
+
+# Search-style intents whose arguments came out empty answer as the intent they superseded
+INTENT_FALLBACKS = {
+    "mention_search": _mention_search_fallback,
+    "seo_keyword": _seo_keyword_fallback,
+}
+
+def plan_tool_calls(message: str) -> list[ToolCall]:
+    """One call per matched intent, best score first."""
+    calls = []
+    for match in detect_intents(message):
+        call = ToolCall(match.intent, INTENT_ARGS[match.intent](message) if match.intent in INTENT_ARGS else ())
+        if call.intent in INTENT_FALLBACKS:
+            call = INTENT_FALLBACKS[call.intent](message, call.args) or call
+        if call not in calls:
+            calls.append(call)
+    return calls
+
+def remember_paged_intent(user_id: str, profile: UserProfile, calls: list[ToolCall]):
+    """Points "show more" at the best paged answer of this turn (page 2 next)."""
+    call = next((call for call in calls if call.intent in PAGED_TOOLS), None)
+    if call is None:
+        return
+    intent, cursor = PAGE_STARTS[call.intent](*call.args) if call.intent in PAGE_STARTS else (call.intent, None)
+    if (profile.last_intent, profile.page_cursor) == (intent, cursor):
+        return
+    profile.last_intent = intent
+    profile.page_cursor = cursor
+    update_user_profile(user_id, profile)
+
+async def show_more(user_id: str, profile: UserProfile, calls: list[ToolCall]) -> str:
+    """
+    Next page of the last mentions/posts/SEO/search answer, or of the one
+    named in the message ("show more posts"). Each page is one keyset query
+    (or index lookup), so deep pages cost the same as the first.
+    """
+    intent = next((call.intent for call in calls if call.intent in PAGED_TOOLS), profile.last_intent)
+    if intent not in PAGED_TOOLS:
+        return "ℹ️ اسأل أولاً عن ذكر العلامة التجارية أو المنشورات أو SEO، ثم اطلب المزيد."
+
+    label = INTENT_LABELS[intent]
+    fetch_page = PAGED_TOOLS[intent]
+    cursor = profile.page_cursor if intent == profile.last_intent else None
+    try:
+        with span("more", intent):
+            if cursor is None:
+                # Continue after the first page, which is served from the summary cache
+                cursor = (await asyncio.wait_for(fetch_page(), INTENT_TIMEOUTS[intent])).next_cursor
+            page = None if cursor is None else await asyncio.wait_for(fetch_page(cursor), INTENT_TIMEOUTS[intent])
+    except asyncio.TimeoutError:
+        logger.warning("Page timed out", extra={"intent": intent})
+        return f"⏱️ تأخر جلب {label}، حاول مرة أخرى بعد لحظات."
+
+    if page is None or page.next_cursor is None:
+        # Last page reached: the next "show more" needs a fresh question
+        profile.last_intent = None
+        profile.page_cursor = None
+    else:
+        profile.last_intent = intent
+        profile.page_cursor = page.next_cursor
+    update_user_profile(user_id, profile)
+    if page is None:
+        return f"📭 لا توجد نتائج إضافية في {label}."
+    return page.text
+
+async def run_tool(call: ToolCall) -> str:
+    """Runs one tool call under its timeout; failures become a short notice."""
+    intent = call.intent
+    label = INTENT_LABELS.get(intent, intent)
+    try:
+        with span("tool", intent):
+            return await asyncio.wait_for(INTENT_TOOLS[intent](*call.args), INTENT_TIMEOUTS[intent])
+    except asyncio.TimeoutError:
+        logger.warning("Tool timed out", extra={"intent": intent})
+        return f"⏱️ تأخر جلب {label}، حاول مرة أخرى بعد لحظات."
+    except Exception as e:
+        logger.error("Tool failed", extra={"intent": intent, "error": str(e)})
+        return f"⚠️ تعذر جلب {label} حالياً."
+
+def start_tool_calls(calls: list[ToolCall], shared: dict[ToolCall, asyncio.Task]) -> int:
+    """
+    Starts every call of a turn that isn't already in `shared`, so identical
+    calls (same intent and arguments) across a batch run once. "show more"
+    turns are skipped: they page instead. Returns how many were started.
+    """
+    if any(call.intent == MORE_INTENT for call in calls):
+        return 0
+    started = 0
+    for call in calls:
+        if call not in shared:
+            shared[call] = asyncio.ensure_future(run_tool(call))
+            started += 1
+    return started
+
+async def route_query(message: str, calls: list[ToolCall] | None = None,
+                      shared: dict[ToolCall, asyncio.Task] | None = None) -> str | None:
     """
     Routes queries to appropriate Supabase tools based on keywords.
+    Every matched intent runs concurrently and the answers are merged in
+    score order, so a multi-topic question costs about one tool call.
+    With `shared`, results are reused across the messages of a batch.
     Returns None if no match is found.
     """
-    message = message.lower().strip()
-
-    # Brand mentions and sentiment
-    mentions_keywords = [
-        "وش الناس يقولون", "سمعة", "يقولون عن", "ذكر", "انطباع",
-        "brand mentions", "reputation", "sentiment"
-    ]
-    if any(kw in message for kw in mentions_keywords):
-        return fetch_mentions_summary()
-
-    # Social media posts
-    posts_keywords = [
-        "بوست", "منشور", "تفاعل", "وسائل التواصل", "السوشيال",
-        "post", "social media", "engagement", "content"
-    ]
-    if any(kw in message for kw in posts_keywords):
-        return fetch_posts_summary()
-
-    # SEO and keywords
-    seo_keywords = [
-        "كلمات مفتاحية", "تتصدر", "محركات البحث", "ترتيب",
-        "seo", "keywords", "ranking", "search"
-    ]
-    if any(kw in message for kw in seo_keywords):
-        return fetch_seo_signals_summary()
-
-    return None
-
-def run_agent(user_id: str, message: str, profile: UserProfile) -> str:
+    if calls is None:
+        calls = plan_tool_calls(message)
+    if not calls:
+        return None
+    if shared is None:
+        results = await asyncio.gather(*(run_tool(call) for call in calls))
+    else:
+        start_tool_calls(calls, shared)
+        results = await asyncio.gather(*(shared[call] for call in calls))
+    return SECTION_SEPARATOR.join(results)
+
+async def stream_query(message: str, calls: list[ToolCall] | None = None) -> AsyncIterator[str]:
     """
-    Simple routing: try Supabase tools first, Perplexity temporarily disabled.
+    Like route_query, but yields each tool's section as soon as it is ready
+    (completion order) instead of waiting for the slowest one.
+    Yields nothing if no intent matched.
     """
-    # Try Supabase tools first
-    tool_response = route_query(message)
-    if tool_response:
-        return tool_response
+    if calls is None:
+        calls = plan_tool_calls(message)
+    tasks = [asyncio.ensure_future(run_tool(call)) for call in calls]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield await next_done
+    finally:
+        # Client went away mid-stream: stop the remaining tools
+        for task in tasks:
+            task.cancel()
 
+def unsupported_reply(message: str) -> str:
     # Perplexity temporarily disabled
     return (
         "⚠️ عذراً، لا يمكنني الإجابة على هذا السؤال حالياً. الرجاء السؤال عن:\n"
         "• ذكر العلامة التجارية والسمعة\n"
         "• المنشورات ووسائل التواصل\n"
-        "• تحليلات SEO والكلمات المفتاحية"
+        "• تحليلات SEO والكلمات المفتاحية\n"
+        "• توزيع المشاعر وأداء المنصات"
         if is_arabic(message) else
         "⚠️ Sorry, I can only answer questions about:\n"
         "• Brand mentions and reputation\n"
         "• Social media posts and engagement\n"
-        "• SEO and keyword analytics"
-    )
\ No newline at end of file
+        "• SEO and keyword analytics\n"
+        "• Sentiment and per-platform analytics"
+    )
+
+async def run_agent(user_id: str, message: str, profile: UserProfile,
+                    shared: dict[ToolCall, asyncio.Task] | None = None) -> str:
+    """
+    Simple routing: try Supabase tools first, Perplexity temporarily disabled.
+    """
+    with span("route"):
+        calls = plan_tool_calls(message)
+    if any(call.intent == MORE_INTENT for call in calls):
+        return await show_more(user_id, profile, calls)
+    remember_paged_intent(user_id, profile, calls)
+
+    # Try Supabase tools first
+    tool_response = await route_query(message, calls, shared)
+    if tool_response:
+        return tool_response
+    return unsupported_reply(message)
+
+async def stream_agent(user_id: str, message: str, profile: UserProfile) -> AsyncIterator[str]:
+    """Streaming counterpart of run_agent: yields reply sections as they are ready."""
+    with span("route"):
+        calls = plan_tool_calls(message)
+    if any(call.intent == MORE_INTENT for call in calls):
+        yield await show_more(user_id, profile, calls)
+        return
+    remember_paged_intent(user_id, profile, calls)
+
+    answered = False
+    async for section in stream_query(message, calls):
+        answered = True
+        yield section
+    if not answered:
+        yield unsupported_reply(message)
@@ -0,0 +1,128 @@
+"""
+Micro-benchmark: batched formatters vs the original per-row formatting code.
+
+Run from the repo root:
+    python benchmarks/bench_formatters.py [rows] [repeats]
+"""
+import random
+import sys
+import time
+import timeit
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.formatters import MENTION_FORMATTER, POST_FORMATTER, SEO_FORMATTER  # noqa: E402
+
+PLATFORMS = ["instagram", "tiktok", "twitter", "facebook", "linkedin", "youtube"]
+SENTIMENTS = ["positive", "negative", "neutral"]
+
+def sample_rows(n: int) -> tuple[list[dict], list[dict], list[dict]]:
+    rng = random.Random(7)
+    start = datetime(2026, 1, 1)
+    # Timestamps to the second, as the feeds store them: nearly all distinct
+    dates = [(start + timedelta(seconds=rng.randrange(300 * 86400))).isoformat() for _ in range(n)]
+    posts = [{
+        "platform": rng.choice(PLATFORMS), "published_date": dates[i],
+        "content": "منشور تجريبي عن منتجات المراعي " * 4,
+        "reach": rng.randrange(100_000), "ctr": rng.random() * 10,
+    } for i in range(n)]
+    mentions = [{
+        "published_date": dates[i], "sentiment": rng.choice(SENTIMENTS),
+        "sentiment_score": rng.uniform(-1, 1), "platform": rng.choice(PLATFORMS),
+        "author": f"user{i}", "mention_text": "المراعي حليب طازج " * 8,
+        "engagement": rng.randrange(5000),
+    } for i in range(n)]
+    signals = [{
+        "keyword": f"حليب {i}", "position": rng.randrange(1, 50), "volume": rng.randrange(10_000),
+        "cpc": rng.random() * 3, "competition": rng.random(),
+    } for i in range(n)]
+    return posts, mentions, signals
+
+# The formatting code as it was before tools/formatters.py was shared
+
+def legacy_format_date(date_str):
+    if not date_str:
+        return "تاريخ غير معروف"
+    try:
+        return datetime.fromisoformat(date_str).strftime("%Y-%m-%d")
+    except:  # noqa: E722
+        return "تاريخ غير معروف"
+
+def legacy_post(post: dict) -> str:
+    platform = post.get("platform", "منصة غير معروفة")
+    date = legacy_format_date(post.get("published_date"))
+    content = post.get("content", "لا يوجد محتوى")
+    reach = post.get("reach", 0)
+    ctr = post.get("ctr", 0)
+    platform_icons = {
+        "instagram": "📸", "tiktok": "🎵", "twitter": "🐦", "facebook": "👥", "linkedin": "💼"
+    }
+    icon = platform_icons.get(platform.lower(), "🌐")
+    return (
+        f"{icon} {platform} | {date}\n"
+        f"📝 {content[:100]}...\n"
+        f"👥 الوصول: {reach:,} مشاهدة\n"
+        f"🎯 نسبة النقر: {ctr:.1f}%"
+    )
+
+def legacy_mention(mention: dict) -> str:
+    date_str = (
+        mention.get("published_date") or mention.get("collected_date") or mention.get("created_at", "N/A")
+    )
+    date = datetime.fromisoformat(date_str).strftime("%Y-%m-%d") if date_str != "N/A" else "N/A"
+    sentiment = {
+        "positive": "✨ إيجابي", "negative": "⚠️ سلبي", "neutral": "📝 محايد"
+    }.get(mention.get("sentiment"), "❓ غير محدد")
+    sentiment_score = mention.get("sentiment_score", 0)
+    sentiment_emoji = "🟢" if sentiment_score > 0.3 else "🔴" if sentiment_score < -0.3 else "⚪"
+    return (
+        f"• {date} | {sentiment} {sentiment_emoji}\n"
+        f"  - المنصة: {mention.get('platform', 'غير معروف')}\n"
+        f"  - الكاتب: {mention.get('author', 'مجهول')}\n"
+        f"  - المحتوى: {mention.get('mention_text', '[لا يوجد نص]')[:100]}...\n"
+        f"  - التفاعل: {mention.get('engagement', '0')} 👥\n"
+    )
+
+def legacy_seo(signal: dict) -> str:
+    competition = signal.get("competition", 0)
+    competition_level = (
+        "عالية 🔴" if competition > 0.66 else "متوسطة 🟡" if competition > 0.33 else "منخفضة 🟢"
+    )
+    return (
+        f"• الكلمة المفتاحية: {signal.get('keyword', '[غير معروف]')}\n"
+        f"  - الموقع: {signal.get('position', 'N/A')} 📊\n"
+        f"  - حجم البحث: {signal.get('volume', '0')} 🔍\n"
+        f"  - تكلفة النقرة: ${signal.get('cpc', '0.00'):.2f} 💰\n"
+        f"  - المنافسة: {competition_level}\n"
+    )
+
+def bench(label: str, fn, rows: list[dict], repeats: int) -> float:
+    # CPU time: wall-clock numbers swing too much on shared hosts to compare ~5% gaps
+    total = min(timeit.repeat(lambda: fn(rows), number=1, repeat=repeats, timer=time.process_time))
+    per_row_us = total / len(rows) * 1e6
+    print(f"  {label:<8} {per_row_us:7.2f} µs/row")
+    return per_row_us
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    posts, mentions, signals = sample_rows(n)
+    print(f"{n} rows per batch, best of {repeats}")
+
+    cases = [
+        ("posts", legacy_post, POST_FORMATTER, posts),
+        ("mentions", legacy_mention, MENTION_FORMATTER, mentions),
+        ("seo", legacy_seo, SEO_FORMATTER, signals),
+    ]
+    for name, legacy, formatter, rows in cases:
+        # Same text for well-formed rows
+        assert [legacy(r) for r in rows[:50]] == formatter.format_rows(rows[:50]), name
+        print(f"\n{name}:")
+        before = bench("legacy", lambda rs: [legacy(r) for r in rs], rows, repeats)
+        after = bench("batched", formatter.format_rows, rows, repeats)
+        print(f"  speedup  {before / after:7.2f}×")
+
+if __name__ == "__main__":
+    main()
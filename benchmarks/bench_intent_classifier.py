@@ -0,0 +1,63 @@
+"""
+Accuracy and latency of the fallback intent classifier on paraphrases that
+aren't in its example list, plus off-topic messages that must stay unmatched.
+
+Run from the repo root:
+    python benchmarks/bench_intent_classifier.py [repeats]
+"""
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from intent_classifier import classifier, classify_intent  # noqa: E402
+from tools.arabic import normalize_arabic  # noqa: E402
+
+CASES = [
+    ("how do our customers feel about the brand", "mentions"),
+    ("what do people say about us on twitter", "mentions"),
+    ("وش يقولون الناس عنا", "mentions"),
+    ("customers opinion about almarai milk", "mentions"),
+    ("show our latest instagram posts", "posts"),
+    ("وش آخر شي نشرناه", "posts"),
+    ("how did the tiktok videos do", "posts"),
+    ("where do we appear in google", "seo"),
+    ("which keywords do we rank for on google", "seo"),
+    ("what terms are people searching", "seo"),
+    ("how many negative comments on each platform", "mention_analytics"),
+    ("نسبة السلبي والايجابي", "mention_analytics"),
+    ("share of positive feedback per channel", "mention_analytics"),
+    ("which platform brings the most views", "post_analytics"),
+    ("كم مشاهدة جبنا في كل منصة", "post_analytics"),
+    ("click rate for each channel", "post_analytics"),
+    ("plan a ramadan campaign for us", None),
+    ("what's the weather in riyadh", None),
+    ("write me a poem", None),
+    ("اكتب لي خطة تسويقية لرمضان", None),
+    ("who won the match yesterday", None),
+    ("كم الساعة", None),
+    ("what is the capital of france", None),
+]
+
+def main():
+    repeats = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    build_ms = timeit.timeit(classifier.build, number=1) * 1000
+
+    correct = 0
+    for text, expected in CASES:
+        guess = classify_intent(text)
+        got = guess.intent if guess else None
+        correct += got == expected
+        mark = "✅" if got == expected else "❌"
+        print(f"{mark} {text:<45} expected={expected} got={got} {guess.score if guess else ''}")
+    print(f"\naccuracy: {correct}/{len(CASES)}   build: {build_ms:.1f} ms")
+
+    texts = [normalize_arabic(text) for text, _ in CASES]
+    uncached = min(timeit.repeat(lambda: [classifier._decide(t) for t in texts], number=1, repeat=repeats // 10 or 1))
+    cached = min(timeit.repeat(lambda: [classify_intent(t) for t, _ in CASES], number=1, repeat=repeats // 10 or 1))
+    print(f"uncached: {uncached / len(texts) * 1e6:7.1f} µs/message")
+    print(f"cached:   {cached / len(texts) * 1e6:7.1f} µs/message")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Build time, memory and lookup latency of the mention search index on a
+synthetic corpus (Zipf-distributed Arabic and English vocabulary).
+
+Run from the repo root:
+    python benchmarks/bench_mention_search.py [documents] [repeats]
+    python benchmarks/bench_mention_search.py 1000000
+"""
+import random
+import sys
+import time
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.mention_search import MentionIndex  # noqa: E402
+
+WORDS = (
+    "المراعي حليب لبن زبادي جبن عصير طازج سعر غالي رخيص جودة ممتاز سيء طعم توصيل متجر عرض خصم منتج "
+    "جديد قديم فطور اطفال صحي بروتين كامل الدسم قليل رمضان العيد تغليف علبة كرتون بارد مشكلة شكوى خدمة "
+    "almarai milk laban yogurt cheese juice fresh price expensive cheap quality great bad taste delivery "
+    "store offer discount product new breakfast kids healthy protein ramadan packaging bottle cold issue "
+    "complaint service love hate best worst recommend"
+).split()
+PLATFORMS = ["instagram", "tiktok", "twitter", "facebook", "linkedin"]
+SENTIMENTS = ["positive", "negative", "neutral"]
+
+# Long tail: product names, places, usernames; each is rare
+TAIL = [f"منتج{i}" for i in range(20_000)] + [f"item{i}" for i in range(20_000)]
+
+def corpus(n: int, seed: int = 7):
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(len(WORDS))]
+    for i in range(n):
+        words = rng.choices(WORDS, weights, k=rng.randint(6, 22)) + rng.choices(TAIL, k=2)
+        rng.shuffle(words)
+        yield {
+            "id": i + 1,
+            "mention_text": " ".join(words),
+            "sentiment": rng.choice(SENTIMENTS),
+            "platform": rng.choice(PLATFORMS),
+        }
+
+QUERIES = [
+    ("rare term", "item42", None, None),
+    ("rare, filtered", "item42", "negative", "twitter"),
+    ("uncommon term", "recommend", None, None),
+    ("rare + common", "item42 حليب", None, None),
+    ("two terms", "سعر غالي", None, None),
+    ("phrase", '"fresh milk"', None, None),
+    ("common term", "حليب", None, None),
+    ("filters only", "", "negative", "instagram"),
+]
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    index = MentionIndex()
+    started = time.perf_counter()
+    page = []
+    for row in corpus(n):
+        page.append(row)
+        if len(page) == 1000:
+            index.add_rows(page)
+            page = []
+    index.add_rows(page)
+    build = time.perf_counter() - started
+    stats = index.stats()
+    print(f"{n:,} mentions indexed in {build:.1f}s ({build / n * 1e6:.1f} µs/mention), "
+          f"{stats['terms']:,} terms, {stats['postings']:,} postings\n")
+
+    print(f"  {'query':<16} {'uncached':>11} {'cached':>11}   matches")
+    for label, query, sentiment, platform in QUERIES:
+        uncached = min(timeit.repeat(lambda: index._search(query, sentiment, platform, 5), number=1, repeat=repeats))
+        cached = min(timeit.repeat(lambda: index.search(query, sentiment, platform), number=1, repeat=repeats))
+        total = index.search(query, sentiment, platform).total
+        print(f"  {label:<16} {uncached * 1000:8.3f} ms {cached * 1000:8.3f} ms   {total:>9,}")
+
+if __name__ == "__main__":
+    main()
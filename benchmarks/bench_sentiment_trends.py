@@ -0,0 +1,51 @@
+"""
+Update cost and answer latency of the rolling sentiment series on
+synthetic mentions spread over the last 60 days.
+
+Run from the repo root:
+    python benchmarks/bench_sentiment_trends.py [mentions] [repeats]
+"""
+import random
+import sys
+import time
+import timeit
+from datetime import datetime, timezone
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.sentiment_trends import SentimentTrends, build_sentiment_trend  # noqa: E402
+
+PLATFORMS = ["instagram", "tiktok", "twitter", "facebook", "linkedin"]
+
+def mentions(n: int, now: float, seed: int = 5):
+    rng = random.Random(seed)
+    for i in range(n):
+        stamp = now - rng.random() * 60 * 86400
+        yield {
+            "id": i + 1,
+            "platform": rng.choice(PLATFORMS),
+            "sentiment_score": round(rng.uniform(-1, 1), 3),
+            "engagement": rng.randrange(5000),
+            "published_date": datetime.fromtimestamp(stamp, timezone.utc).isoformat(),
+        }
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    now = time.time()
+    data = list(mentions(n, now))
+
+    trends = SentimentTrends()
+    started = time.perf_counter()
+    for start in range(0, n, 1000):
+        trends.add_rows(data[start:start + 1000])
+    build = time.perf_counter() - started
+    print(f"{n:,} mentions added in {build:.2f}s ({build / n * 1e6:.1f} µs/mention, date parsing included)\n")
+
+    for label, days in (("today", 1), ("this week", 7), ("this month", 30)):
+        best = min(timeit.repeat(lambda: build_sentiment_trend(trends, days, now), number=1, repeat=repeats))
+        print(f"  {label:<11} {best * 1000:7.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Build time and lookup latency of the SEO keyword index (trie plus sorted
+columns) on synthetic keywords, half of them measured twice so rank
+changes exist.
+
+Run from the repo root:
+    python benchmarks/bench_seo_keywords.py [keywords] [repeats]
+"""
+import random
+import sys
+import time
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.keyword_index import KeywordIndex  # noqa: E402
+
+HEADS = "حليب لبن زبادي جبن عصير قشطة زبدة milk laban yogurt cheese juice cream butter".split()
+TAILS = "المراعي طازج كامل الدسم قليل اطفال سعر عرض almarai fresh full fat low kids price offer near me".split()
+
+def rows(n: int, seed: int = 11):
+    rng = random.Random(seed)
+    keywords = [
+        f"{rng.choice(HEADS)} {rng.choice(TAILS)} {i}" if i % 3 else f"{rng.choice(HEADS)} {rng.choice(TAILS)} {rng.choice(TAILS)}{i}"
+        for i in range(n)
+    ]
+    remeasured = rng.sample(keywords, n // 2)
+    for i, keyword in enumerate(keywords + remeasured):
+        yield {
+            "id": i + 1,
+            "keyword": keyword,
+            "position": rng.randrange(1, 100),
+            "volume": rng.randrange(50_000),
+            "cpc": round(rng.random() * 3, 2),
+            "competition": round(rng.random(), 2),
+        }
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+
+    index = KeywordIndex()
+    data = list(rows(n))
+    started = time.perf_counter()
+    for start in range(0, len(data), 1000):
+        index.add_rows(data[start:start + 1000])
+    build = time.perf_counter() - started
+    stats = index.stats()
+    print(f"{len(data):,} rows ({stats['keywords']:,} keywords) indexed in {build:.2f}s "
+          f"({build / len(data) * 1e6:.1f} µs/row), {stats['trie_keys']:,} trie keys\n")
+
+    started = time.perf_counter()
+    index.prefix("حليب", 5), index.most_competitive(5), index.dropped(5)
+    print(f"  first lookups after the load (sorted lists settle): {(time.perf_counter() - started) * 1000:.1f} ms\n")
+
+    sample = data[n // 2]["keyword"]
+    cases = [
+        ("exact", lambda: index.exact(sample)),
+        ("prefix, selective", lambda: index.prefix(sample[:-1], 5)),
+        ("prefix, broad", lambda: index.prefix("حليب", 5)),
+        ("fuzzy, 1 typo", lambda: index.fuzzy("yogart", 5)),
+        ("fuzzy, 2 typos", lambda: index.fuzzy(sample[:-1] + "x", 5)),
+        ("most competitive", lambda: index.most_competitive(5)),
+        ("rank dropped", lambda: index.dropped(5)),
+    ]
+    for label, run in cases:
+        best = min(timeit.repeat(run, number=1, repeat=repeats))
+        print(f"  {label:<18} {best * 1000:8.3f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""
+Local stand-ins for Supabase (PostgREST) and Perplexity, for hermetic
+benchmarks. Both are stdlib HTTP servers on 127.0.0.1 with a configurable
+per-request latency; nothing leaves the machine.
+
+The PostgREST fake understands the subset of the query syntax the tools
+send: select, order, limit/offset, eq/gt/gte/lt/lte, is.null / not.is.null,
+in.(...), or=(...) with nested and(...), and the two analytics RPCs.
+"""
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+PLATFORMS = ["instagram", "tiktok", "twitter", "facebook", "linkedin"]
+SENTIMENTS = ["positive", "negative", "neutral"]
+
+def sample_tables(rows: int = 2000, seed: int = 7) -> dict[str, list[dict]]:
+    """Deterministic mentions, posts and seo_signals rows."""
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+
+    def stamp(i: int) -> str:
+        return (now - timedelta(minutes=rows - i)).isoformat()
+
+    mentions = [{
+        "id": i,
+        "mention_text": f"المراعي حليب طازج وجودة عالية #{i}",
+        "sentiment": rng.choice(SENTIMENTS),
+        "sentiment_score": round(rng.uniform(-1, 1), 3),
+        "platform": rng.choice(PLATFORMS),
+        "author": f"user{rng.randrange(500)}",
+        "engagement": rng.randrange(5000),
+        "published_date": stamp(i),
+        "created_at": stamp(i),
+    } for i in range(1, rows + 1)]
+    posts = [{
+        "id": i,
+        "platform": rng.choice(PLATFORMS),
+        "content": f"منشور المراعي رقم {i} عن منتجات الألبان",
+        "reach": rng.randrange(100_000),
+        "ctr": round(rng.random() * 10, 2),
+        "published_date": stamp(i),
+        "created_at": stamp(i),
+    } for i in range(1, rows + 1)]
+    seo_signals = [{
+        "id": i,
+        "keyword": f"حليب المراعي {i}",
+        "position": rng.randrange(1, 50),
+        "volume": rng.randrange(20_000),
+        "cpc": round(rng.random() * 3, 2),
+        "competition": round(rng.random(), 2),
+        "created_at": stamp(i),
+    } for i in range(1, min(rows, 500) + 1)]
+    return {"mentions": mentions, "posts": posts, "seo_signals": seo_signals}
+
+# PostgREST query evaluation
+
+def _coerce(raw: str, sample):
+    if raw.startswith('"') and raw.endswith('"'):
+        raw = raw[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    if isinstance(sample, bool):
+        return raw == "true"
+    if isinstance(sample, (int, float)):
+        try:
+            return float(raw)
+        except ValueError:
+            return raw
+    return raw
+
+_OPS = {
+    "eq": lambda a, b: a == b,
+    "neq": lambda a, b: a != b,
+    "gt": lambda a, b: a > b,
+    "gte": lambda a, b: a >= b,
+    "lt": lambda a, b: a < b,
+    "lte": lambda a, b: a <= b,
+}
+
+def _split_top(text: str) -> list[str]:
+    """Splits on commas outside parentheses and quotes."""
+    parts, depth, quoted, start = [], 0, False, 0
+    for i, char in enumerate(text):
+        if char == '"' and (i == 0 or text[i - 1] != "\\"):
+            quoted = not quoted
+        elif not quoted and char == "(":
+            depth += 1
+        elif not quoted and char == ")":
+            depth -= 1
+        elif not quoted and depth == 0 and char == ",":
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+def _condition(column: str, expression: str):
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[len("not."):]
+    op, _, raw = expression.partition(".")
+
+    def check(row: dict) -> bool:
+        value = row.get(column)
+        if op == "in":
+            result = value is not None and value in {_coerce(v, value) for v in _split_top(raw.strip("()"))}
+        elif op == "is":
+            result = value is None if raw == "null" else value is (raw == "true")
+        elif value is None:
+            result = False
+        else:
+            result = _OPS[op](value, _coerce(raw, value))
+        return not result if negate else result
+    return check
+
+def _logic(expression: str):
+    """Parses `and(...)`/`or(...)` trees of col.op.value conditions."""
+    match = re.match(r"^(and|or)\((.*)\)$", expression)
+    if match:
+        children = [_logic(part) for part in _split_top(match.group(2))]
+        combine = all if match.group(1) == "and" else any
+        return lambda row: combine(child(row) for child in children)
+    column, _, rest = expression.partition(".")
+    return _condition(column, rest)
+
+def _sort_key(column: str, desc: bool):
+    def key(row: dict):
+        value = row.get(column)
+        # Postgres defaults: NULLS LAST ascending, NULLS FIRST descending
+        return (value is not None, value) if desc else (value is None, value)
+    return key
+
+def run_query(rows: list[dict], params: list[tuple[str, str]]) -> list[dict]:
+    filters, order, limit, offset, select = [], [], None, 0, "*"
+    for key, value in params:
+        if key == "select":
+            select = value
+        elif key == "order":
+            order = [part.split(".") for part in value.split(",")]
+        elif key == "limit":
+            limit = int(value)
+        elif key == "offset":
+            offset = int(value)
+        elif key == "or":
+            filters.append(_logic(f"or{value}"))
+        elif key == "and":
+            filters.append(_logic(f"and{value}"))
+        else:
+            filters.append(_condition(key, value))
+
+    result = [row for row in rows if all(check(row) for check in filters)]
+    for column, *flags in reversed(order):
+        desc = "desc" in flags
+        result.sort(key=_sort_key(column, desc), reverse=desc)
+    result = result[offset:offset + limit if limit is not None else None]
+    if select != "*":
+        columns = select.split(",")
+        result = [{c: row.get(c) for c in columns} for row in result]
+    return result
+
+def _since_filter(rows: list[dict], since: str | None) -> list[dict]:
+    if not since:
+        return rows
+    return [row for row in rows if row.get("published_date") and row["published_date"] >= since]
+
+def rpc_mention_sentiment(tables: dict, args: dict) -> list[dict]:
+    groups: dict[tuple, dict] = {}
+    for row in _since_filter(tables["mentions"], args.get("since")):
+        key = (row.get("platform") or "unknown", row.get("sentiment") or "unknown")
+        group = groups.setdefault(key, {"mentions": 0, "score_sum": 0.0, "scored": 0, "total_engagement": 0})
+        group["mentions"] += 1
+        if row.get("sentiment_score") is not None:
+            group["score_sum"] += row["sentiment_score"]
+            group["scored"] += 1
+        group["total_engagement"] += row.get("engagement") or 0
+    return [{
+        "platform": platform, "sentiment": sentiment, "mentions": g["mentions"],
+        "avg_score": g["score_sum"] / g["scored"] if g["scored"] else None,
+        "total_engagement": g["total_engagement"],
+    } for (platform, sentiment), g in groups.items()]
+
+def rpc_post_engagement(tables: dict, args: dict) -> list[dict]:
+    groups: dict[str, dict] = {}
+    for row in _since_filter(tables["posts"], args.get("since")):
+        group = groups.setdefault(row.get("platform") or "unknown",
+                                  {"posts": 0, "total_reach": 0, "ctr_sum": 0.0, "ctr_count": 0})
+        group["posts"] += 1
+        group["total_reach"] += row.get("reach") or 0
+        if row.get("ctr") is not None:
+            group["ctr_sum"] += row["ctr"]
+            group["ctr_count"] += 1
+    return [{
+        "platform": platform, "posts": g["posts"], "total_reach": g["total_reach"],
+        "avg_ctr": g["ctr_sum"] / g["ctr_count"] if g["ctr_count"] else None,
+    } for platform, g in groups.items()]
+
+RPCS = {
+    "mention_sentiment_by_platform": rpc_mention_sentiment,
+    "post_engagement_by_platform": rpc_post_engagement,
+}
+
+class _FakeServer:
+    """Runs a ThreadingHTTPServer on an ephemeral port in a daemon thread."""
+
+    handler_class: type[BaseHTTPRequestHandler]
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.requests = 0
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(self.handler_class):
+            owner = server
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self):
+        with self._lock:
+            self.requests += 1
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+class _JSONHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    owner: _FakeServer
+
+    def log_message(self, *args):
+        pass
+
+    def _body(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def _send_json(self, status: int, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+class _PostgRESTHandler(_JSONHandler):
+    def _delay(self):
+        self.owner.count()
+        if self.owner.latency:
+            time.sleep(self.owner.latency)
+
+    def do_GET(self):
+        self._delay()
+        url = urlsplit(self.path)
+        match = re.match(r"^/rest/v1/([\w]+)$", url.path)
+        if not match or match.group(1) not in self.owner.tables:
+            return self._send_json(404, {"code": "42P01", "message": f"relation {url.path} does not exist"})
+        params = parse_qsl(url.query, keep_blank_values=True)
+        try:
+            rows = run_query(self.owner.tables[match.group(1)], params)
+        except (KeyError, ValueError) as e:
+            return self._send_json(400, {"code": "PGRST100", "message": str(e)})
+        self._send_json(200, rows)
+
+    def do_POST(self):
+        self._delay()
+        match = re.match(r"^/rest/v1/rpc/(\w+)$", urlsplit(self.path).path)
+        name = match.group(1) if match else None
+        args = self._body()
+        if name not in RPCS or not self.owner.rpcs:
+            return self._send_json(404, {"code": "PGRST202", "message": f"Could not find the function {name}"})
+        self._send_json(200, RPCS[name](self.owner.tables, args))
+
+class FakePostgREST(_FakeServer):
+    """Serves SUPABASE_URL/rest/v1/<table> and /rest/v1/rpc/<name> from memory."""
+
+    handler_class = _PostgRESTHandler
+
+    def __init__(self, tables: dict[str, list[dict]] | None = None, latency: float = 0.0, rpcs: bool = True):
+        self.tables = tables if tables is not None else sample_tables()
+        # False makes the RPCs 404 so the NumPy fallback is exercised
+        self.rpcs = rpcs
+        super().__init__(latency)
+
+class _PerplexityHandler(_JSONHandler):
+    def do_POST(self):
+        owner: FakePerplexity = self.owner
+        owner.count()
+        payload = self._body()
+        if owner.latency:
+            time.sleep(owner.latency)
+        if owner.error_rate and random.random() < owner.error_rate:
+            return self._send_json(503, {"error": "fake upstream error"})
+
+        words = (f"• نقطة تسويقية رقم {i} عن الطلب المطلوب." for i in range(owner.chunks))
+        if not payload.get("stream"):
+            text = "\n".join(words)
+            return self._send_json(200, {"choices": [{"message": {"role": "assistant", "content": text}}]})
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for word in words:
+            chunk = {"choices": [{"delta": {"content": word + "\n"}}]}
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode())
+            self.wfile.flush()
+            if owner.chunk_delay:
+                time.sleep(owner.chunk_delay)
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.close_connection = True
+
+class FakePerplexity(_FakeServer):
+    """Chat-completions endpoint returning canned text, streamed or not."""
+
+    handler_class = _PerplexityHandler
+
+    def __init__(self, latency: float = 0.0, chunks: int = 8, chunk_delay: float = 0.0, error_rate: float = 0.0):
+        self.chunks = chunks
+        self.chunk_delay = chunk_delay
+        self.error_rate = error_rate
+        super().__init__(latency)
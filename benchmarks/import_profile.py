@@ -0,0 +1,79 @@
+"""
+Import-time profile of the app: runs `python -X importtime -c "import main"`
+in a fresh interpreter and reports the total plus the slowest modules by
+cumulative time (a package's time includes everything it imports).
+
+Run from the repo root:
+    python benchmarks/import_profile.py [--module main] [--top 25] [--json out.json]
+    python benchmarks/import_profile.py --budget-ms 800
+
+--budget-ms exits non-zero if the total import time exceeds the budget.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# import time:   self [us] | cumulative | imported package
+LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S.*)$")
+
+def profile(module: str) -> list[dict]:
+    """One entry per imported module, in import order, with its nesting depth."""
+    path = os.pathsep.join(p for p in (str(ROOT), os.environ.get("PYTHONPATH")) if p)
+    env = {**os.environ, "PYTHONPATH": path}
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, env=env, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        tail = "\n".join(result.stderr.splitlines()[-15:])
+        raise SystemExit(f"❌ import {module} failed:\n{tail}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        match = LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            entries.append({
+                "module": name.strip(),
+                "self_ms": int(self_us) / 1000,
+                "cumulative_ms": int(cumulative_us) / 1000,
+                "depth": (len(indent) - 1) // 2,
+            })
+    return entries
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="main")
+    parser.add_argument("--top", type=int, default=25)
+    parser.add_argument("--json", help="write the full profile to this file")
+    parser.add_argument("--budget-ms", type=float, help="fail if the total exceeds this")
+    args = parser.parse_args()
+
+    entries = profile(args.module)
+    # Top-level imports are the roots; their cumulative times add up to the total
+    total_ms = sum(e["cumulative_ms"] for e in entries if e["depth"] == 0)
+    print(f"import {args.module}: {total_ms:.1f} ms across {len(entries)} modules\n")
+    print(f"  {'cumulative ms':>14}{'self ms':>10}  module")
+    for entry in sorted(entries, key=lambda e: e["cumulative_ms"], reverse=True)[:args.top]:
+        print(f"  {entry['cumulative_ms']:>14.1f}{entry['self_ms']:>10.1f}  {entry['module']}")
+
+    heavy = ("langchain", "supabase", "httpx", "requests", "numpy")
+    loaded = sorted({e["module"].split(".")[0] for e in entries} & set(heavy))
+    print(f"\nheavy packages imported eagerly: {', '.join(loaded) or 'none'}")
+
+    if args.json:
+        Path(args.json).write_text(json.dumps({"total_ms": total_ms, "modules": entries}, indent=2))
+    if args.budget_ms is not None:
+        if total_ms > args.budget_ms:
+            print(f"❌ {total_ms:.1f} ms is over the {args.budget_ms:.0f} ms budget")
+            sys.exit(1)
+        print(f"✅ within the {args.budget_ms:.0f} ms budget")
+
+if __name__ == "__main__":
+    main()
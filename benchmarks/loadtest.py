@@ -0,0 +1,239 @@
+"""
+Hermetic load test: boots main.app with uvicorn against the local fakes in
+benchmarks/fakes.py and drives /chat and /360prep at fixed concurrency
+levels. Reports throughput and p50/p95/p99 latency per intent.
+
+Run from the repo root:
+    python benchmarks/loadtest.py --concurrency 1,8,32 --requests 400
+    python benchmarks/loadtest.py --cold --json after.json --baseline before.json
+
+--cold sets the summary cache TTLs to zero so every request hits the tools.
+--baseline exits non-zero if any intent's p95 regressed by more than
+--tolerance (and by at least --min-regression-ms).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fakes import FakePerplexity, FakePostgREST, sample_tables  # noqa: E402
+
+# (intent label, path, body); every request goes to a per-worker user
+SCENARIOS = [
+    ("mentions", "/chat", {"message": "وش الناس يقولون عن المراعي؟"}),
+    ("posts", "/chat", {"message": "how are our social media posts doing"}),
+    ("seo", "/chat", {"message": "وش ترتيبنا في محركات البحث؟"}),
+    ("mention_analytics", "/chat", {"message": "توزيع المشاعر هذا الأسبوع"}),
+    ("post_analytics", "/chat", {"message": "total reach by platform this month"}),
+    ("multi", "/chat", {"message": "reputation, posts and seo ranking please"}),
+    ("more", "/chat", {"message": "show more"}),
+    ("unsupported", "/chat", {"message": "plan a ramadan campaign for us"}),
+    ("360prep", "/360prep", {"company_name": "Almarai"}),
+]
+
+# Failures the app reports inside a 200 reply: a tool that failed or timed
+# out (agent.run_tool, the summary tools) and Perplexity errors on /360prep
+FAILURE_MARKERS = (
+    "⚠️ تعذر جلب", "⏱️ تأخر جلب", "❌ فشل", "⚠️ خطأ في الاتصال",
+    "Mona had trouble fetching insights",
+    # No scenario names a keyword or search term: these mean a misrouted question
+    "📭 لا توجد بيانات SEO للكلمة", "📭 لا توجد إشارات تطابق",
+)
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def configure_env(args, postgrest: FakePostgREST, perplexity: FakePerplexity):
+    """Points every client at the fakes; must run before main is imported."""
+    os.environ.update({
+        "SUPABASE_URL": postgrest.url,
+        "SUPABASE_ANON_KEY": "bench.bench.bench",
+        "PERPLEXITY_API_URL": perplexity.url + "/chat/completions",
+        "PERPLEXITY_API_KEY": "bench",
+        "SESSION_BACKEND": "memory",
+        "REPLICA_ENABLED": "",
+        "ADMIN_TOKEN": "bench",
+    })
+    if args.cold:
+        for table in ("MENTIONS", "POSTS", "SEO_SIGNALS"):
+            os.environ[f"SUMMARY_CACHE_{table}_TTL"] = "0"
+            os.environ[f"SUMMARY_CACHE_{table}_STALE"] = "0"
+
+def start_app(port: int):
+    """Runs main.app under uvicorn in a daemon thread (startup/shutdown hooks included)."""
+    import uvicorn
+    from main import app
+
+    config = uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on")
+    server = uvicorn.Server(config)
+    server.install_signal_handlers = lambda: None  # not the main thread
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 30
+    while not server.started:
+        if time.monotonic() > deadline or not thread.is_alive():
+            raise RuntimeError("app did not start")
+        time.sleep(0.05)
+    return server, thread
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, round(pct / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+def is_failure_text(text: str) -> bool:
+    return any(marker in text for marker in FAILURE_MARKERS)
+
+async def stream_ok(response) -> bool:
+    """Reads a whole SSE reply; False on an `error` event or a failure notice in any chunk."""
+    ok = True
+    event = "chunk"
+    async for line in response.aiter_lines():
+        if line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            text = json.loads(line[len("data:"):]).get("text", "")
+            if event == "error" or is_failure_text(text):
+                ok = False
+        elif not line:
+            event = "chunk"
+    return ok
+
+async def send(client, label: str, path: str, body: dict, user_id: str, stream: bool) -> bool:
+    """True if the request succeeded: HTTP 200 and no failure in the reply itself."""
+    payload = {**body, "user_id": user_id}
+    if stream:
+        async with client.stream("POST", path, json=payload, params={"stream": "true"}) as response:
+            if response.status_code != 200:
+                await response.aread()
+                return False
+            return await stream_ok(response)
+    response = await client.post(path, json=payload)
+    return response.status_code == 200 and not is_failure_text(response.json().get("reply", ""))
+
+async def run_level(base_url: str, concurrency: int, total: int, stream: bool) -> dict:
+    import httpx
+
+    latencies: dict[str, list[float]] = {label: [] for label, _, _ in SCENARIOS}
+    errors: dict[str, int] = {label: 0 for label, _, _ in SCENARIOS}
+    plan = itertools.islice(itertools.cycle(SCENARIOS), total)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        # Warm-up: one of each, not measured
+        for label, path, body in SCENARIOS:
+            await send(client, label, path, body, "bench-warmup", stream)
+
+        async def worker(n: int):
+            for label, path, body in plan:
+                started = time.perf_counter()
+                try:
+                    ok = await send(client, label, path, body, f"bench-{concurrency}-{n}", stream)
+                except Exception:
+                    ok = False
+                latencies[label].append((time.perf_counter() - started) * 1000)
+                if not ok:
+                    errors[label] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    intents = {}
+    for label, values in latencies.items():
+        values.sort()
+        intents[label] = {
+            "requests": len(values),
+            "errors": errors[label],
+            "p50_ms": round(percentile(values, 50), 2),
+            "p95_ms": round(percentile(values, 95), 2),
+            "p99_ms": round(percentile(values, 99), 2),
+        }
+    return {"concurrency": concurrency, "requests": total, "seconds": round(elapsed, 3),
+            "rps": round(total / elapsed, 1), "intents": intents}
+
+def print_level(result: dict):
+    print(f"\nconcurrency={result['concurrency']}  {result['requests']} requests in "
+          f"{result['seconds']:.2f}s  →  {result['rps']:.1f} req/s")
+    print(f"  {'intent':<18}{'n':>6}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for label, stats in result["intents"].items():
+        print(f"  {label:<18}{stats['requests']:>6}{stats['errors']:>5}"
+              f"{stats['p50_ms']:>10.2f}{stats['p95_ms']:>10.2f}{stats['p99_ms']:>10.2f}")
+
+def regressions(results: list[dict], baseline: list[dict], tolerance: float, min_ms: float) -> list[str]:
+    before = {(level["concurrency"], label): stats
+              for level in baseline for label, stats in level["intents"].items()}
+    found = []
+    for level in results:
+        for label, stats in level["intents"].items():
+            old = before.get((level["concurrency"], label))
+            if not old:
+                continue
+            delta = stats["p95_ms"] - old["p95_ms"]
+            if delta > min_ms and stats["p95_ms"] > old["p95_ms"] * (1 + tolerance):
+                found.append(f"c={level['concurrency']} {label}: p95 {old['p95_ms']} → {stats['p95_ms']} ms")
+    return found
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", default="1,8,32", help="comma separated levels")
+    parser.add_argument("--requests", type=int, default=360, help="requests per level")
+    parser.add_argument("--rows", type=int, default=2000, help="rows per fake table")
+    parser.add_argument("--pg-latency", type=float, default=0.01, help="seconds per PostgREST request")
+    parser.add_argument("--no-rpc", action="store_true", help="make the analytics RPCs 404 (NumPy fallback)")
+    parser.add_argument("--perplexity-latency", type=float, default=0.2, help="seconds before the first byte")
+    parser.add_argument("--perplexity-error-rate", type=float, default=0.0)
+    parser.add_argument("--stream", action="store_true", help="use ?stream=true (SSE) for every request")
+    parser.add_argument("--cold", action="store_true", help="disable the summary cache")
+    parser.add_argument("--json", help="write results to this file")
+    parser.add_argument("--baseline", help="compare p95 against a previous --json file")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    parser.add_argument("--min-regression-ms", type=float, default=2.0)
+    args = parser.parse_args()
+
+    postgrest = FakePostgREST(sample_tables(args.rows), latency=args.pg_latency, rpcs=not args.no_rpc).start()
+    perplexity = FakePerplexity(latency=args.perplexity_latency, error_rate=args.perplexity_error_rate).start()
+    configure_env(args, postgrest, perplexity)
+
+    port = free_port()
+    server, thread = start_app(port)
+    base_url = f"http://127.0.0.1:{port}"
+    results = []
+    try:
+        for concurrency in (int(c) for c in args.concurrency.split(",")):
+            result = asyncio.run(run_level(base_url, concurrency, args.requests, args.stream))
+            print_level(result)
+            results.append(result)
+    finally:
+        server.should_exit = True
+        thread.join(timeout=10)
+        postgrest.stop()
+        perplexity.stop()
+
+    print(f"\nupstream requests: postgrest={postgrest.requests} perplexity={perplexity.requests}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(results, indent=2))
+    if args.baseline:
+        found = regressions(results, json.loads(Path(args.baseline).read_text()),
+                            args.tolerance, args.min_regression_ms)
+        for line in found:
+            print(f"❌ regression {line}")
+        if found:
+            sys.exit(1)
+        print("✅ no p95 regressions against baseline")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import csv
+import io
+import json
+import logging
+from typing import AsyncIterator
+
+from fastapi.responses import StreamingResponse
+
+from tools.schema_registry import get_table_schema
+from tools.table_reader import iter_table
+
+logger = logging.getLogger(__name__)
+
+# Tables that can be streamed out through /export
+EXPORT_TABLES = ("mentions", "posts", "seo_signals")
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+async def ndjson_lines(pages: AsyncIterator[list[dict]]) -> AsyncIterator[str]:
+    """One JSON object per line; emitted a page at a time."""
+    async for rows in pages:
+        yield "".join(json.dumps(row, ensure_ascii=False, default=str) + "\n" for row in rows)
+
+async def csv_lines(columns: tuple[str, ...], pages: AsyncIterator[list[dict]]) -> AsyncIterator[str]:
+    """Header row, then one CSV chunk per page (nested values as JSON)."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    async for rows in pages:
+        for row in rows:
+            writer.writerow(
+                json.dumps(row.get(c), ensure_ascii=False) if isinstance(row.get(c), (dict, list)) else row.get(c)
+                for c in columns
+            )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+async def _guarded(table: str, lines: AsyncIterator[str]) -> AsyncIterator[str]:
+    # Headers are already sent once streaming starts; all we can do is stop
+    try:
+        async for chunk in lines:
+            yield chunk
+    except Exception as e:
+        logger.error("Export stopped early", extra={"table": table, "error": str(e)})
+
+async def export_response(table: str, fmt: str) -> StreamingResponse:
+    """
+    Streams a whole table as NDJSON or CSV in id order, one page in memory at
+    a time. Raises ValueError for unknown tables or formats, and
+    SchemaUnavailableError if the columns can't be discovered.
+    """
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Unknown table: {table}")
+    if fmt not in EXPORT_MEDIA_TYPES:
+        raise ValueError(f"Unknown format: {fmt}")
+
+    schema = await get_table_schema(table, ("id",))
+    if not schema.has("id"):
+        raise ValueError(f"{table} has no id column to page on")
+
+    pages = iter_table(table, schema.columns)
+    lines = ndjson_lines(pages) if fmt == "ndjson" else csv_lines(schema.columns, pages)
+    return StreamingResponse(
+        _guarded(table, lines),
+        media_type=EXPORT_MEDIA_TYPES[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{table}.{fmt}"'},
+    )
@@ -0,0 +1,191 @@
+import math
+import os
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+
+from tools.arabic import normalize_arabic
+
+# Off: unmatched messages get the "unsupported" reply as before
+INTENT_CLASSIFIER_ENABLED = os.getenv("INTENT_CLASSIFIER_ENABLED", "true").lower() in ("1", "true", "yes")
+# Similarity below which a message stays unmatched
+INTENT_CLASSIFIER_THRESHOLD = float(os.getenv("INTENT_CLASSIFIER_THRESHOLD", "0.38"))
+# Best intent must beat the runner-up by this much, or it's too ambiguous to route
+INTENT_CLASSIFIER_MARGIN = float(os.getenv("INTENT_CLASSIFIER_MARGIN", "0.03"))
+# Distinct normalized messages whose result is kept
+INTENT_CLASSIFIER_CACHE_SIZE = int(os.getenv("INTENT_CLASSIFIER_CACHE_SIZE", "4096"))
+
+NGRAM_RANGE = (2, 4)
+
+# Paraphrases per intent that the keyword table doesn't cover. "more" is left
+# out on purpose: paging on a guess would silently move the user's cursor.
+INTENT_EXAMPLES: dict[str, list[str]] = {
+    "mentions": [
+        "how do customers feel about us", "what do people think of almarai",
+        "what are customers saying about our brand", "what's the public opinion of us",
+        "are people talking about us online", "customer feedback about the brand",
+        "how is our image online", "what is the buzz about almarai",
+        "كيف يشوفنا العملاء", "وش رأي الناس فينا", "ايش يقول العملاء عن المراعي",
+        "كيف صورة العلامة عند الجمهور", "هل الناس راضين عن منتجاتنا", "آراء العملاء عن الشركة",
+        "هل العملاء مبسوطين منا", "وش انطباع الجمهور عنا",
+    ],
+    "posts": [
+        "how did our latest posts perform", "show me our recent instagram posts",
+        "what did we publish on tiktok", "our twitter activity lately",
+        "which of our posts did best", "how are our accounts doing on social",
+        "كيف أداء آخر منشوراتنا", "وش نزلنا على انستقرام", "اعرض آخر البوستات",
+        "كيف حساباتنا في تيك توك", "وش أفضل محتوى نشرناه",
+    ],
+    "seo": [
+        "where do we show up on google", "which search terms bring traffic",
+        "how visible are we in google results", "what words do people search for",
+        "our position on google", "organic search performance",
+        "وين نطلع في قوقل", "ايش الكلمات اللي يبحث عنها الناس", "كيف ظهورنا في نتائج البحث",
+        "مركزنا في جوجل", "الكلمات اللي نستهدفها",
+    ],
+    "mention_analytics": [
+        "percentage of positive and negative comments", "how many negative mentions per platform",
+        "overall mood of customers by channel", "share of negative feedback",
+        "is the feedback mostly positive or negative", "mood statistics across platforms",
+        "نسبة التعليقات الايجابية والسلبية", "كم عدد الذكر السلبي لكل منصة",
+        "احصائيات رضا العملاء", "هل التعليقات اغلبها ايجابية", "مزاج الجمهور حسب المنصة",
+    ],
+    "post_analytics": [
+        "how many people did we reach on each platform", "which platform gets the most views",
+        "click through rate across channels", "views and clicks per network",
+        "which channel performs best for us", "compare platforms by reach",
+        "كم شخص وصلنا له في كل منصة", "اي منصة تجيب مشاهدات اكثر", "نسبة النقر في كل قناة",
+        "قارن المنصات حسب الوصول", "افضل منصة من ناحية المشاهدات",
+    ],
+}
+
+@dataclass(frozen=True)
+class IntentGuess:
+    intent: str
+    score: float
+
+def _ngrams(text: str) -> list[str]:
+    """Character n-grams within each word, padded with spaces (char_wb)."""
+    grams = []
+    low, high = NGRAM_RANGE
+    for word in text.split():
+        padded = f" {word} "
+        for n in range(low, high + 1):
+            grams.extend(padded[i:i + n] for i in range(len(padded) - n + 1))
+    return grams
+
+class IntentClassifier:
+    """
+    Nearest-example intent classifier: TF-IDF over character n-grams of the
+    normalized seed phrases, scored by cosine similarity. A message's score
+    for an intent is its best similarity to any of that intent's examples.
+    The matrix is built on first use, so numpy isn't imported at startup.
+    """
+
+    def __init__(self, examples: dict[str, list[str]]):
+        self._examples = examples
+        self._lock = threading.Lock()
+        self._built = False
+        self.stats = {"classified": 0, "matched": 0, "cache_hits": 0}
+
+    def _build(self):
+        import numpy as np
+
+        docs, owners = [], []
+        for intent, phrases in self._examples.items():
+            for phrase in phrases:
+                docs.append(_ngrams(normalize_arabic(phrase)))
+                owners.append(intent)
+
+        vocabulary: dict[str, int] = {}
+        doc_freq: list[int] = []
+        for grams in docs:
+            for gram in set(grams):
+                if gram not in vocabulary:
+                    vocabulary[gram] = len(doc_freq)
+                    doc_freq.append(0)
+                doc_freq[vocabulary[gram]] += 1
+
+        # Smoothed idf, sublinear tf, rows L2-normalized
+        idf = np.log((1 + len(docs)) / (1 + np.array(doc_freq, dtype=np.float32))) + 1
+        matrix = np.zeros((len(docs), len(vocabulary)), dtype=np.float32)
+        for row, grams in enumerate(docs):
+            for gram in grams:
+                matrix[row, vocabulary[gram]] += 1
+        np.log1p(matrix, out=matrix)
+        matrix *= idf
+        matrix /= np.linalg.norm(matrix, axis=1, keepdims=True)
+
+        self._intents = list(self._examples)
+        # Examples are grouped by intent: row offsets where each group starts
+        self._starts = np.array([owners.index(intent) for intent in self._intents])
+        # Columns first so a query only touches the n-grams it contains
+        self._columns = np.ascontiguousarray(matrix.T)
+        self._idf = idf
+        self._idf_max = float(idf.max())
+        self._vocabulary = vocabulary
+        self._np = np
+        self._built = True
+
+    def build(self):
+        if not self._built:
+            with self._lock:
+                if not self._built:
+                    self._build()
+
+    def scores(self, text: str) -> dict[str, float]:
+        """Best cosine similarity per intent for already normalized text."""
+        self.build()
+        np = self._np
+        grams = _ngrams(text)
+        counts: dict[int, int] = {}
+        for gram in grams:
+            index = self._vocabulary.get(gram)
+            if index is not None:
+                counts[index] = counts.get(index, 0) + 1
+        if not counts:
+            return {}
+
+        indices = np.fromiter(counts, dtype=np.intp, count=len(counts))
+        weights = np.log1p(np.fromiter(counts.values(), dtype=np.float32, count=len(counts))) * self._idf[indices]
+        # N-grams no example contains still count toward the query's norm,
+        # weighted as the rarest known n-gram
+        unknown = len(grams) - sum(counts.values())
+        norm = math.sqrt(float(weights @ weights) + unknown * (math.log(2) * self._idf_max) ** 2)
+        similarity = (weights @ self._columns[indices]) / norm
+
+        best = np.maximum.reduceat(similarity, self._starts)
+        return dict(zip(self._intents, best.tolist()))
+
+    def classify(self, message: str) -> IntentGuess | None:
+        """Most similar intent, or None below the threshold or when ambiguous."""
+        self.stats["classified"] += 1
+        before = _classify_normalized.cache_info().hits
+        guess = _classify_normalized(normalize_arabic(message))
+        if _classify_normalized.cache_info().hits > before:
+            self.stats["cache_hits"] += 1
+        if guess is not None:
+            self.stats["matched"] += 1
+        return guess
+
+    def _decide(self, text: str) -> IntentGuess | None:
+        ranked = sorted(self.scores(text).items(), key=lambda item: -item[1])
+        if not ranked or ranked[0][1] < INTENT_CLASSIFIER_THRESHOLD:
+            return None
+        if len(ranked) > 1 and ranked[0][1] - ranked[1][1] < INTENT_CLASSIFIER_MARGIN:
+            return None
+        return IntentGuess(ranked[0][0], round(ranked[0][1], 3))
+
+classifier = IntentClassifier(INTENT_EXAMPLES)
+
+@lru_cache(maxsize=INTENT_CLASSIFIER_CACHE_SIZE)
+def _classify_normalized(text: str) -> IntentGuess | None:
+    return classifier._decide(text)
+
+def classify_intent(message: str) -> IntentGuess | None:
+    """Fallback routing for messages no keyword matched; no network call."""
+    return classifier.classify(message)
+
+def classifier_stats() -> dict:
+    info = _classify_normalized.cache_info()
+    return {**classifier.stats, "cache_size": info.currsize}
@@ -1,19 +1,51 @@
+import asyncio
 import logging
-from fastapi import FastAPI
+import os
+import time
+from typing import AsyncIterator, Iterator
+from fastapi import FastAPI, Header, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-from schema import UserMessage, UserProfileState, UserProfile
-from memory_store import get_user_profile, update_user_profile, users, user_memory
-from tools.perplexity_tool import fetch_perplexity_insight
-from agent import run_agent
+from schema import UserMessage, UserProfileState
+from memory_store import get_user_profile, update_user_profile, reset_user, session_stats, close_session_backend
+from tools.perplexity_client import perplexity_client
+from tools.perplexity_tool import stream_cached
+from tools.supabase_client import close_supabase
+from tools.summary_cache import summary_cache
+from tools.response_cache import perplexity_cache
+from tools.schema_registry import SchemaUnavailableError, invalidate_table_schema
+from tools.replica import replica
+from tools.row_feed import feed_stats, start_feeds, stop_feeds
+from tools.mention_search import mention_index
+from tools.keyword_index import seo_keyword_index
+from tools.sentiment_trends import sentiment_trends
+from tools.logging_setup import configure_logging, logging_stats
+from tools.telemetry import (
+    observe_request, register_collector, render_metrics, request_id_from, request_trace,
+)
+from intent_classifier import classifier_stats
+from agent import run_agent, stream_agent, plan_tool_calls, start_tool_calls
+from sse import sse_event, sse_response
+from snapshots import SNAPSHOT_NARRATIVE_TTL, snapshot_engine, snapshot_prompt
+from export import export_response
+from warmup import WARMUP_ENABLED, is_ready, warm_up, warmup_state
 from dotenv import load_dotenv
 
 # Load .env and logging
 load_dotenv()
-logging.basicConfig(level=logging.INFO)
+configure_logging()
+logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+# Largest list /chat/batch accepts
+CHAT_BATCH_MAX_MESSAGES = int(os.getenv("CHAT_BATCH_MAX_MESSAGES", "50"))
+
+WELCOME_REPLY = "مرحباً! أنا مورفو، وكيلتك التسويقية الذكية. جاهزة لتحليل بيانات المراعي — من وين تحب نبدأ اليوم؟"
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -22,68 +54,298 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Subsystem counters exported as gauges on /metrics
+register_collector("summary_cache", summary_cache.stats)
+register_collector("sessions", session_stats)
+register_collector("perplexity", perplexity_client.stats)
+register_collector("perplexity_cache", perplexity_cache.stats)
+register_collector("logging", logging_stats)
+register_collector("intent_classifier", classifier_stats)
+register_collector("mention_search", mention_index.stats)
+register_collector("seo_keywords", seo_keyword_index.stats)
+register_collector("sentiment_trends", sentiment_trends.stats)
+if replica is not None:
+    register_collector("replica", replica.lag_metrics)
+
+@app.middleware("http")
+async def trace_requests(request: Request, call_next):
+    """
+    Root span and request histogram for every request. X-Request-ID is kept
+    from the client when well formed (or minted) and echoed back.
+    Streaming responses are timed to their first byte.
+    """
+    request_id = request_id_from(request.headers.get("x-request-id"))
+    started = time.perf_counter()
+    status = 500
+    with request_trace(request_id):
+        try:
+            response = await call_next(request)
+            status = response.status_code
+        finally:
+            route = request.scope.get("route")
+            observe_request(request.method, getattr(route, "path", "unmatched"), status,
+                            time.perf_counter() - started)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+_warmup_task: asyncio.Task | None = None
+
+@app.on_event("startup")
+async def on_startup():
+    global _warmup_task
+    # Supabase client, deferred imports and summary priming happen in the
+    # background; /ready reports when they're done
+    if WARMUP_ENABLED:
+        _warmup_task = asyncio.create_task(warm_up())
+    snapshot_engine.start()
+    if replica is not None:
+        replica.start()
+    # In-memory search and time-series indexes follow their tables from here
+    start_feeds()
+
+@app.on_event("shutdown")
+async def on_shutdown():
+    stop_feeds()
+    if _warmup_task is not None and not _warmup_task.done():
+        _warmup_task.cancel()
+    snapshot_engine.stop()
+    if replica is not None:
+        replica.stop()
+    await close_supabase()
+    close_session_backend()
+
 @app.get("/")
 def read_root():
     return {"message": "👋 MORVO is ready to analyze Almarai data!"}
 
-@app.post("/chat")
-def chat_with_mona(user_input: UserMessage):
-    if not user_input.user_id:
-        return {
-            "reply": "مرحباً! أنا مورفو، وكيلتك التسويقية الذكية. جاهزة لتحليل بيانات المراعي — من وين تحب نبدأ اليوم؟"
-        }
+@app.get("/ready")
+def readiness():
+    """Readiness probe: 503 until the startup warm-up has finished; / is liveness."""
+    state = warmup_state()
+    return JSONResponse(state, status_code=200 if is_ready() else 503)
 
-    profile = get_user_profile(user_input.user_id)
-    message = user_input.message.strip()
+@app.get("/metrics")
+def metrics():
+    """Prometheus scrape endpoint: request, per-stage/per-intent histograms and subsystem gauges."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
+def handle_state(user_id: str, message: str, profile) -> str | None:
+    """
+    Fixed replies for the greeting and "start over" flow.
+    Returns None when the message should go to the agent.
+    """
     if message == "start over":
         profile.state = UserProfileState.CONFIRM_RESET
-        update_user_profile(user_input.user_id, profile)
-        return {"reply": "⚠️ هل أنت متأكد أنك تريد البدء من جديد؟ اكتب: نعم"}
+        update_user_profile(user_id, profile)
+        return "⚠️ هل أنت متأكد أنك تريد البدء من جديد؟ اكتب: نعم"
 
     if profile.state == UserProfileState.CONFIRM_RESET:
         if message == "نعم":
-            users[user_input.user_id] = UserProfile()
-            if user_input.user_id in user_memory:
-                del user_memory[user_input.user_id]
-            return {"reply": "🔄 تم إعادة تعيين المحادثة. أهلاً من جديد! ما اسمك؟"}
+            reset_user(user_id)
+            return "🔄 تم إعادة تعيين المحادثة. أهلاً من جديد! ما اسمك؟"
         else:
             profile.state = UserProfileState.COMPLETE
-            update_user_profile(user_input.user_id, profile)
-            return {"reply": "❌ تم إلغاء إعادة التهيئة. نكمل من وين وقفنا 😊"}
+            update_user_profile(user_id, profile)
+            return "❌ تم إلغاء إعادة التهيئة. نكمل من وين وقفنا 😊"
 
     if profile.state == UserProfileState.COMPLETE and message.lower() in ["", "hi", "hello", "ابدأ", "start", "مورفو"]:
-        return {
-            "reply": (
-                "أهلاً! أنا **MORVO** — وكيلتك التسويقية الذكية المتخصصة في تحليل بيانات المراعي.\n\n"
-                "🔍 أقدر أساعدك في:\n"
-                "• تحليل ذكر العلامة التجارية وسمعتها\n"
-                "• متابعة أداء المنشورات على وسائل التواصل\n"
-                "• تحليل أداء SEO والكلمات المفتاحية\n\n"
-                "💡 من وين تحب نبدأ اليوم؟"
-            )
-        }
+        return (
+            "أهلاً! أنا **MORVO** — وكيلتك التسويقية الذكية المتخصصة في تحليل بيانات المراعي.\n\n"
+            "🔍 أقدر أساعدك في:\n"
+            "• تحليل ذكر العلامة التجارية وسمعتها\n"
+            "• متابعة أداء المنشورات على وسائل التواصل\n"
+            "• تحليل أداء SEO والكلمات المفتاحية\n\n"
+            "💡 من وين تحب نبدأ اليوم؟"
+        )
+
+    return None
+
+async def stream_chat(user_id: str, message: str, profile) -> AsyncIterator[str]:
+    async for section in stream_agent(user_id, message, profile):
+        yield sse_event(section)
+    yield sse_event("", "done")
+
+async def answer(user_input: UserMessage, shared: dict | None = None) -> str:
+    """Full reply to one message: the state flow first, then the agent."""
+    if not user_input.user_id:
+        return WELCOME_REPLY
+    profile = get_user_profile(user_input.user_id)
+    message = user_input.message.strip()
+    reply = handle_state(user_input.user_id, message, profile)
+    if reply is not None:
+        return reply
 
     # Route through simplified agent
-    response = run_agent(user_input.user_id, message, profile)
-    return {"reply": response}
+    return await run_agent(user_input.user_id, message, profile, shared)
 
-# 360° feature (unchanged)
+@app.post("/chat")
+async def chat_with_mona(user_input: UserMessage, stream: bool = False):
+    """Pass ?stream=true to receive the reply as Server-Sent Events."""
+    if not stream:
+        return {"reply": await answer(user_input)}
+
+    if not user_input.user_id:
+        reply = WELCOME_REPLY
+    else:
+        profile = get_user_profile(user_input.user_id)
+        message = user_input.message.strip()
+        reply = handle_state(user_input.user_id, message, profile)
+
+    if reply is not None:
+        return sse_response(iter([sse_event(reply), sse_event("", "done")]))
+    return sse_response(stream_chat(user_input.user_id, message, profile))
+
+@app.post("/chat/batch")
+async def chat_batch(messages: list[UserMessage]):
+    """
+    Answers a list of messages in one request; replies come back in input
+    order. Tool calls for the whole batch start up front and identical ones
+    run once. Each user's messages are still answered one after another, so
+    "start over" and "show more" behave as they would over /chat.
+    """
+    if len(messages) > CHAT_BATCH_MAX_MESSAGES:
+        raise HTTPException(status_code=413, detail=f"At most {CHAT_BATCH_MAX_MESSAGES} messages per batch")
+
+    by_user: dict[str, list[int]] = {}
+    for i, user_input in enumerate(messages):
+        by_user.setdefault(user_input.user_id, []).append(i)
+
+    shared: dict = {}
+    planned = 0
+    for user_id, indices in by_user.items():
+        if not user_id:
+            continue
+        # A message right after "start over" answers the confirmation instead
+        confirming = get_user_profile(user_id).state == UserProfileState.CONFIRM_RESET
+        for i in indices:
+            message = messages[i].message.strip()
+            if not confirming:
+                calls = plan_tool_calls(message)
+                planned += len(calls)
+                start_tool_calls(calls, shared)
+            confirming = message == "start over"
+
+    replies = [""] * len(messages)
+
+    async def answer_in_order(indices: list[int]):
+        for i in indices:
+            replies[i] = await answer(messages[i], shared)
+
+    try:
+        await asyncio.gather(*(answer_in_order(indices) for indices in by_user.values()))
+    finally:
+        for task in shared.values():
+            task.cancel()
+    logger.info("Chat batch answered", extra={
+        "messages": len(messages), "users": len(by_user), "tool_calls": planned, "distinct_calls": len(shared),
+    })
+    return {"replies": replies}
+
+# 360° feature
 class CompanyRequest(BaseModel):
     company_name: str
     user_id: str
 
+def stream_360_report(query: str) -> Iterator[str]:
+    # Sync generator: Starlette iterates it in the threadpool
+    try:
+        # Exact only: snapshot prompts differ in nothing but the company name
+        for delta in stream_cached(query, SNAPSHOT_NARRATIVE_TTL, exact=True):
+            yield sse_event(delta)
+    except Exception as e:
+        logger.error("Perplexity stream failed", extra={"error": str(e)})
+        yield sse_event("⚠️ Mona had trouble fetching insights. Please try again later.", "error")
+    yield sse_event("", "done")
+
+def snapshot_headers(snapshot) -> dict:
+    return {
+        "X-Snapshot-Age": str(int(snapshot.age)),
+        "X-Snapshot-Stale": "true" if snapshot.stale else "false",
+    }
+
 @app.post("/360prep")
-def generate_360_report(req: CompanyRequest):
-    intro = "📊 360° Snapshot of Almarai by MORVO:\n\n"
-    prompt = f"""Give a short marketing snapshot for Almarai.
-
-Include:
-- Brand Mentions & Reputation
-- Social Media Performance
-- SEO & Keywords Analysis
-
-Keep it short, 40–100 words, bullet format, good for fast scan.
-"""
-    response = fetch_perplexity_insight.invoke(intro + prompt)
-    return {"reply": response}
\ No newline at end of file
+async def generate_360_report(req: CompanyRequest, stream: bool = False):
+    """
+    Served from the precomputed per-company snapshot (see snapshots.py);
+    X-Snapshot-Age tells the client how old it is in seconds.
+    """
+    if stream:
+        snapshot = snapshot_engine.lookup(req.company_name)
+        if snapshot is None:
+            # Nothing cached yet: stream a live narrative, then build a snapshot
+            # for next time (its narrative comes from perplexity_cache)
+            async def build_snapshot():
+                snapshot_engine.refresh_in_background(req.company_name)
+
+            return sse_response(stream_360_report(snapshot_prompt(req.company_name)),
+                                background=BackgroundTask(build_snapshot))
+        if snapshot.stale:
+            snapshot_engine.refresh_in_background(req.company_name)
+        response = sse_response(iter([sse_event(snapshot.text), sse_event("", "done")]))
+        response.headers.update(snapshot_headers(snapshot))
+        return response
+
+    try:
+        snapshot = await snapshot_engine.get(req.company_name)
+    except Exception as e:
+        logger.error("Snapshot fetch failed", extra={"company": req.company_name, "error": str(e)})
+        return {"reply": "⚠️ Mona had trouble fetching insights. Please try again later."}
+    return JSONResponse({"reply": snapshot.text}, headers=snapshot_headers(snapshot))
+
+# Admin hooks (require the X-Admin-Token header to match ADMIN_TOKEN)
+def require_admin(token: str | None):
+    if not ADMIN_TOKEN or token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+@app.get("/export/{table}")
+async def export_table(table: str, fmt: str = Query("ndjson", alias="format"),
+                       x_admin_token: str | None = Header(default=None)):
+    """Streams a whole table as ?format=ndjson (default) or csv."""
+    require_admin(x_admin_token)
+    try:
+        return await export_response(table, fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except SchemaUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+@app.post("/admin/cache/invalidate")
+def invalidate_cache(table: str | None = None, include_schema: bool = False,
+                     x_admin_token: str | None = Header(default=None)):
+    require_admin(x_admin_token)
+    summary_cache.invalidate(table)
+    if include_schema:
+        invalidate_table_schema(table)
+    return {"invalidated": table or "all", "schema": include_schema}
+
+@app.get("/admin/cache/stats")
+def cache_stats(x_admin_token: str | None = Header(default=None)):
+    require_admin(x_admin_token)
+    return summary_cache.stats()
+
+@app.get("/admin/sessions/stats")
+def sessions_stats(x_admin_token: str | None = Header(default=None)):
+    require_admin(x_admin_token)
+    return session_stats()
+
+@app.get("/admin/perplexity/stats")
+def perplexity_stats(x_admin_token: str | None = Header(default=None)):
+    require_admin(x_admin_token)
+    return {**perplexity_client.stats(), "cache": perplexity_cache.stats()}
+
+@app.get("/admin/replica/stats")
+async def replica_stats(x_admin_token: str | None = Header(default=None)):
+    require_admin(x_admin_token)
+    if replica is None:
+        return {"enabled": False}
+    return replica.stats()
+
+@app.get("/admin/feeds/stats")
+def feeds_stats(x_admin_token: str | None = Header(default=None)):
+    require_admin(x_admin_token)
+    return {
+        "feeds": feed_stats(),
+        "mention_search": mention_index.stats(),
+        "seo_keywords": seo_keyword_index.stats(),
+        "sentiment_trends": sentiment_trends.stats(),
+    }
@@ -1,18 +1,36 @@
-from langchain.memory import ConversationBufferMemory
 from schema import UserProfile
+from session_store import Session, SessionStore
+from session_backends import create_backend
 
-user_memory = {}
-users = {}
+# Durable state (SESSION_BACKEND=memory|sqlite) behind a bounded
+# read-through cache; see session_store.py for the eviction rules
+backend = create_backend()
+sessions = SessionStore()
 
-def get_user_memory(user_id: str):
-    if user_id not in user_memory:
-        user_memory[user_id] = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
-    return user_memory[user_id]
+def _load_session(user_id: str) -> Session:
+    return Session(backend.load(user_id) or UserProfile())
+
+def _get_session(user_id: str) -> Session:
+    # Drop entries another worker has written since we cached them
+    for changed in backend.changed_users():
+        sessions.discard(changed)
+    return sessions.get(user_id, factory=lambda: _load_session(user_id))
 
 def get_user_profile(user_id: str) -> UserProfile:
-    if user_id not in users:
-        users[user_id] = UserProfile()
-    return users[user_id]
+    return _get_session(user_id).profile
 
 def update_user_profile(user_id: str, profile: UserProfile):
-    users[user_id] = profile 
\ No newline at end of file
+    _get_session(user_id).profile = profile
+    backend.save_profile(user_id, profile)
+
+def reset_user(user_id: str):
+    """Forgets the user's profile ("start over")."""
+    sessions.discard(user_id)
+    backend.reset(user_id)
+
+def session_stats() -> dict:
+    return {**sessions.stats(), "backend": type(backend).__name__}
+
+def close_session_backend():
+    """Flushes queued writes (app shutdown)."""
+    backend.close()
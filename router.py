@@ -0,0 +1,158 @@
+import re
+from dataclasses import dataclass, field
+
+from intent_classifier import INTENT_CLASSIFIER_ENABLED, classify_intent
+from tools.arabic import normalize_arabic
+
+# Keyword tables per intent. Order matters: earlier intents win ties.
+INTENT_KEYWORDS: dict[str, list[str]] = {
+    # Brand mentions and sentiment
+    "mentions": [
+        "وش الناس يقولون", "سمعة", "يقولون عن", "ذكر", "انطباع",
+        "brand mentions", "reputation", "sentiment"
+    ],
+    # Social media posts
+    "posts": [
+        "بوست", "منشور", "تفاعل", "وسائل التواصل", "السوشيال",
+        "post", "social media", "engagement", "content"
+    ],
+    # SEO and keywords
+    "seo": [
+        "كلمات مفتاحية", "تتصدر", "محركات البحث", "ترتيب",
+        "seo", "keywords", "ranking", "search"
+    ],
+    # Aggregated sentiment analytics over all mentions
+    "mention_analytics": [
+        "توزيع المشاعر", "متوسط المشاعر", "تحليل المشاعر", "المشاعر حسب المنصة",
+        "sentiment distribution", "sentiment breakdown", "average sentiment",
+        "sentiment by platform", "sentiment score"
+    ],
+    # Aggregated post performance per platform
+    "post_analytics": [
+        "اجمالي الوصول", "متوسط النقر", "متوسط نسبة النقر", "الوصول حسب المنصة", "اداء المنصات",
+        "total reach", "reach per platform", "reach by platform", "average ctr", "mean ctr", "ctr per platform"
+    ],
+    # Sentiment trend, change and anomalies over time (tools/sentiment_trends.py)
+    "sentiment_trend": [
+        "اتجاه المشاعر", "تطور المشاعر", "تغير المشاعر", "المشاعر تسوء", "المشاعر تتحسن", "المشاعر تتراجع",
+        "المشاعر هالاسبوع", "قفزة في الاشارات", "ارتفاع مفاجئ", "شي غير طبيعي",
+        "sentiment trend", "sentiment over time", "sentiment change", "sentiment getting worse",
+        "sentiment getting better", "sentiment worse", "sentiment better", "sentiment spike", "sentiment drop",
+        "anomaly", "anomalies", "unusual spike", "mention spike"
+    ],
+    # Full-text search over mention text (tools/mention_search.py)
+    "mention_search": [
+        "وش الناس يقولون عن", "يقولون عن", "يتكلمون عن", "كلام عن", "ابحث عن", "اشارات عن", "الذكر السلبي", "الذكر الايجابي",
+        "mentions of", "mentions about", "mentions containing", "mentions mentioning", "find mentions",
+        "saying about", "talking about", "negative mentions", "positive mentions"
+    ],
+    # One keyword's rank, keywords by prefix, competition or rank change (tools/keyword_index.py)
+    "seo_keyword": [
+        "وين ترتيبنا", "ترتيبنا في", "ترتيبنا ل", "ترتيب كلمة", "مركزنا في", "موقعنا في", "نترتب",
+        "كلمات تبدأ", "الكلمات اللي تبدأ", "أكثر منافسة", "أقل منافسة", "تحسن ترتيب", "تراجع ترتيب",
+        "where do we rank", "how do we rank", "rank for", "ranking for", "position for",
+        "keywords starting with", "keywords that start with", "most competitive", "least competitive",
+        "rank changes", "ranking changes", "keywords improved", "keywords dropped", "biggest movers"
+    ],
+    # Next page of the last mentions/posts/SEO answer or mention search
+    "more": [
+        "المزيد", "اعرض المزيد", "عرض المزيد", "الصفحة التالية",
+        "show more", "load more", "more results", "next page"
+    ],
+}
+
+# A matched analytics intent replaces the plain "latest rows" answer
+INTENT_SUPERSEDES: dict[str, set[str]] = {
+    "mention_analytics": {"mentions"},
+    "sentiment_trend": {"mentions", "mention_analytics"},
+    "post_analytics": {"posts"},
+    "mention_search": {"mentions"},
+    "seo_keyword": {"seo"},
+}
+
+def _trie_pattern(words: list[str]) -> str:
+    """
+    Builds a prefix-factored regex from a word list, so the engine only
+    follows branches whose next character matches instead of retrying every
+    keyword at each position. Optional tails are greedy: longest match wins.
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        ends_here = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if ends_here:
+            return (body if len(branches) > 1 or len(body) == 1 else "(?:" + body + ")") + "?"
+        return body
+
+    return build(trie)
+
+@dataclass
+class IntentMatch:
+    intent: str
+    score: float
+    keywords: list[str] = field(default_factory=list)
+
+class IntentRouter:
+    """
+    Compiles every intent keyword into one normalized, prefix-factored regex
+    so a message is scanned once, and scores all intents that matched.
+    A match scores its keyword length, so longer phrases outweigh short ones.
+    """
+
+    def __init__(self, keywords: dict[str, list[str]], supersedes: dict[str, set[str]] | None = None):
+        self._supersedes = {intent: tuple(weaker) for intent, weaker in (supersedes or {}).items()}
+        self._priority = {intent: i for i, intent in enumerate(keywords)}
+        owners: dict[str, list[str]] = {}
+        for intent, words in keywords.items():
+            for word in words:
+                word_owners = owners.setdefault(normalize_arabic(word), [])
+                if intent not in word_owners:
+                    word_owners.append(intent)
+        self._owners = {word: tuple(intents) for word, intents in owners.items()}
+
+        self._pattern = re.compile(_trie_pattern(list(self._owners)))
+
+    def match(self, message: str) -> list[IntentMatch]:
+        """Returns every matched intent, best score first (ties keep table order)."""
+        words = self._pattern.findall(normalize_arabic(message))
+        if not words:
+            return []
+        hits: dict[str, list[str]] = {}
+        for word in words:
+            for intent in self._owners[word]:
+                if intent in hits:
+                    hits[intent].append(word)
+                else:
+                    hits[intent] = [word]
+        if len(hits) > 1:
+            for intent in [intent for intent in hits if intent in self._supersedes]:
+                for weaker in self._supersedes[intent]:
+                    hits.pop(weaker, None)
+        # (-score, table order) sorts best first; most messages hit a single intent
+        ranked = [(-sum(map(len, words)), self._priority[intent], intent, words) for intent, words in hits.items()]
+        if len(ranked) > 1:
+            ranked.sort()
+        return [IntentMatch(intent, float(-score), words) for score, _, intent, words in ranked]
+
+_router = IntentRouter(INTENT_KEYWORDS, INTENT_SUPERSEDES)
+
+def detect_intents(message: str) -> list[IntentMatch]:
+    """
+    Scored intents for a message using the shared compiled router. When no
+    keyword matches, the local classifier (intent_classifier.py) gets a turn;
+    its score is a cosine similarity and its match has no keywords.
+    """
+    matches = _router.match(message)
+    if matches or not INTENT_CLASSIFIER_ENABLED:
+        return matches
+    guess = classify_intent(message)
+    return [IntentMatch(guess.intent, guess.score)] if guess else []
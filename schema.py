@@ -15,6 +15,9 @@ class UserProfile(BaseModel):
     role: str = "Marketing Director"
     goal: str = "زيادة ROI عبر حملات فعّالة"
     state: UserProfileState = UserProfileState.COMPLETE
+    # Where "show more" continues from (see agent.show_more)
+    last_intent: str | None = None
+    page_cursor: str | None = None
 
 class UserMessage(BaseModel):
     user_id: str
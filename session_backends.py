@@ -0,0 +1,208 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from schema import UserProfile
+
+logger = logging.getLogger(__name__)
+
+SESSION_BACKEND = os.getenv("SESSION_BACKEND", "memory")
+SESSION_DB_PATH = os.getenv("SESSION_DB_PATH", "sessions.db")
+SESSION_FLUSH_INTERVAL = float(os.getenv("SESSION_FLUSH_INTERVAL", "0.05"))
+SESSION_FLUSH_BATCH = int(os.getenv("SESSION_FLUSH_BATCH", "500"))
+
+class SessionBackend:
+    """
+    Durable storage behind memory_store. The in-process SessionStore acts as
+    the read-through cache; backends only see loads on cache misses and writes.
+    """
+
+    def load(self, user_id: str) -> UserProfile | None:
+        return None
+
+    def save_profile(self, user_id: str, profile: UserProfile):
+        pass
+
+    def reset(self, user_id: str):
+        pass
+
+    def changed_users(self) -> list[str]:
+        """Users written by other processes since the last call (to drop from cache)."""
+        return []
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+class MemoryBackend(SessionBackend):
+    """Process-local only: the SessionStore is the single copy of the state."""
+
+class SQLiteBackend(SessionBackend):
+    """
+    Shared session state for several uvicorn workers on one host.
+
+    - WAL mode so readers never block the writer.
+    - Writes are coalesced per user and committed by a background thread
+      every SESSION_FLUSH_INTERVAL seconds (or SESSION_FLUSH_BATCH users) in
+      one transaction. Loads consult the pending batch first.
+    - PRAGMA data_version tells us cheaply whether another connection wrote;
+      only then do we look up which users changed.
+    - Each flush stamps its rows with the next `seq`, taken inside the write
+      transaction, so seq follows commit order across processes and is the
+      change watermark (wall-clock times are read before the lock and can
+      commit out of order).
+    A reset stores NULL state rather than deleting the row, so other workers
+    see the change and drop their cached copy.
+    """
+
+    def __init__(self, path: str = SESSION_DB_PATH):
+        self.path = path
+        self._reader = self._connect()
+        self._reader.executescript("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                user_id TEXT PRIMARY KEY,
+                profile TEXT,
+                updated_at REAL NOT NULL,
+                seq INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+        columns = [row[1] for row in self._reader.execute("PRAGMA table_info(sessions)")]
+        if "seq" not in columns:
+            self._reader.execute("ALTER TABLE sessions ADD COLUMN seq INTEGER NOT NULL DEFAULT 0")
+        self._reader.execute("CREATE INDEX IF NOT EXISTS sessions_seq ON sessions(seq)")
+        self._read_lock = threading.Lock()
+        self._data_version = self._reader.execute("PRAGMA data_version").fetchone()[0]
+        self._seen_seq = self._reader.execute("SELECT COALESCE(MAX(seq), 0) FROM sessions").fetchone()[0]
+
+        self._pending: dict[str, dict] = {}
+        self._flushing: dict[str, dict] = {}
+        self._flushed: dict[str, int] = {}
+        self._pending_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._writer = self._connect()
+        self._thread = threading.Thread(target=self._run_writer, name="session-writer", daemon=True)
+        self._thread.start()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        return conn
+
+    # Reads
+
+    def load(self, user_id: str) -> UserProfile | None:
+        with self._pending_lock:
+            # Queued writes first, then the batch currently being committed
+            pending = {**self._flushing.get(user_id, {}), **self._pending.get(user_id, {})}
+
+        if "profile" in pending:
+            stored = pending["profile"]
+        else:
+            with self._read_lock:
+                row = self._reader.execute(
+                    "SELECT profile FROM sessions WHERE user_id = ?", (user_id,)
+                ).fetchone()
+            stored = row[0] if row else None
+        return UserProfile.model_validate_json(stored) if stored else None
+
+    def changed_users(self) -> list[str]:
+        with self._read_lock:
+            version = self._reader.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._data_version:
+                return []
+            self._data_version = version
+            rows = self._reader.execute(
+                "SELECT user_id, seq FROM sessions WHERE seq > ?", (self._seen_seq,)
+            ).fetchall()
+        if rows:
+            self._seen_seq = max(seq for _, seq in rows)
+        with self._pending_lock:
+            changed = []
+            for user_id, seq in rows:
+                if self._flushed.get(user_id) == seq:
+                    # Our own commit; the cached copy is already current
+                    del self._flushed[user_id]
+                elif user_id not in self._pending:
+                    # Our own unflushed writes are newer than anything on disk
+                    changed.append(user_id)
+            return changed
+
+    # Writes (queued, committed in batches)
+
+    def _queue(self, user_id: str, **fields):
+        with self._pending_lock:
+            self._pending.setdefault(user_id, {}).update(fields)
+            if len(self._pending) >= SESSION_FLUSH_BATCH:
+                self._wakeup.set()
+
+    def save_profile(self, user_id: str, profile: UserProfile):
+        self._queue(user_id, profile=profile.model_dump_json())
+
+    def reset(self, user_id: str):
+        self._queue(user_id, profile=None)
+
+    def flush(self):
+        with self._pending_lock:
+            batch, self._pending = self._pending, {}
+            self._flushing = batch
+        if not batch:
+            return
+        try:
+            self._writer.execute("BEGIN IMMEDIATE")
+            # Under the write lock, so no other commit can take the same or a lower seq
+            seq = self._writer.execute("SELECT COALESCE(MAX(seq), 0) + 1 FROM sessions").fetchone()[0]
+            now = time.time()
+            self._writer.executemany(
+                """
+                INSERT INTO sessions (user_id, profile, updated_at, seq)
+                VALUES (?, ?, ?, ?)
+                ON CONFLICT(user_id) DO UPDATE SET
+                    profile = excluded.profile,
+                    updated_at = excluded.updated_at,
+                    seq = excluded.seq
+                """,
+                [(user_id, fields["profile"], now, seq) for user_id, fields in batch.items()],
+            )
+            self._writer.execute("COMMIT")
+        except sqlite3.Error as e:
+            if self._writer.in_transaction:
+                self._writer.execute("ROLLBACK")
+            logger.error("Session flush failed, retrying next tick", extra={"error": str(e)})
+            with self._pending_lock:
+                self._flushing = {}
+                for user_id, fields in batch.items():
+                    # Newer queued writes win over the failed batch
+                    self._pending[user_id] = {**fields, **self._pending.get(user_id, {})}
+            return
+        with self._pending_lock:
+            self._flushing = {}
+            for user_id in batch:
+                self._flushed[user_id] = seq
+
+    def _run_writer(self):
+        while not self._stopped.is_set():
+            self._wakeup.wait(SESSION_FLUSH_INTERVAL)
+            self._wakeup.clear()
+            self.flush()
+
+    def close(self):
+        self._stopped.set()
+        self._wakeup.set()
+        self._thread.join(timeout=5)
+        self.flush()
+        self._writer.close()
+        self._reader.close()
+
+def create_backend(name: str = SESSION_BACKEND) -> SessionBackend:
+    if name == "sqlite":
+        return SQLiteBackend()
+    if name == "memory":
+        return MemoryBackend()
+    raise ValueError(f"Unknown SESSION_BACKEND: {name}")
@@ -0,0 +1,104 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable
+
+from schema import UserProfile
+
+SESSION_MAX_USERS = int(os.getenv("SESSION_MAX_USERS", "10000"))
+SESSION_IDLE_TTL_SECONDS = float(os.getenv("SESSION_IDLE_TTL_SECONDS", str(6 * 3600)))
+SESSION_MEMORY_BUDGET_MB = float(os.getenv("SESSION_MEMORY_BUDGET_MB", "256"))
+
+# Rough fixed cost of a profile plus its bookkeeping, in bytes
+_BASE_SESSION_BYTES = 2048
+
+class Session:
+    __slots__ = ("profile", "last_access", "size")
+
+    def __init__(self, profile: UserProfile):
+        self.profile = profile
+        self.last_access = time.monotonic()
+        self.size = _BASE_SESSION_BYTES
+
+class SessionStore:
+    """
+    Per-user profiles with bounded growth.
+
+    Entries are kept in access order (OrderedDict), so lookups and touches are
+    O(1) and eviction always pops the least recently used user:
+    - idle: untouched for longer than idle_ttl seconds
+    - lru: more than max_sessions users
+    - budget: estimated footprint above memory_budget_bytes
+    """
+
+    def __init__(self, max_sessions: int = SESSION_MAX_USERS,
+                 idle_ttl: float = SESSION_IDLE_TTL_SECONDS,
+                 memory_budget_bytes: int = int(SESSION_MEMORY_BUDGET_MB * 1024 * 1024),
+                 on_evict: Callable[[str, Session], None] | None = None):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.memory_budget_bytes = memory_budget_bytes
+        self.on_evict = on_evict
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._evictions = {"idle": 0, "lru": 0, "budget": 0}
+
+    def get(self, user_id: str, factory: Callable[[], Session] | None = None) -> Session:
+        """Returns the user's session (creating it if needed) and marks it recently used."""
+        with self._lock:
+            session = self._sessions.get(user_id)
+            if session is None:
+                session = factory() if factory else Session(UserProfile())
+                self._sessions[user_id] = session
+                self._bytes += session.size
+            else:
+                self._sessions.move_to_end(user_id)
+            session.last_access = time.monotonic()
+            self._evict(keep=user_id)
+            return session
+
+    def peek(self, user_id: str) -> Session | None:
+        """Looks a session up without creating it or changing its recency."""
+        return self._sessions.get(user_id)
+
+    def discard(self, user_id: str) -> Session | None:
+        with self._lock:
+            session = self._sessions.pop(user_id, None)
+            if session is not None:
+                self._bytes -= session.size
+            return session
+
+    def _pop_oldest(self, reason: str):
+        user_id, session = self._sessions.popitem(last=False)
+        self._bytes -= session.size
+        self._evictions[reason] += 1
+        if self.on_evict:
+            self.on_evict(user_id, session)
+
+    def _evict(self, keep: str):
+        # Oldest-accessed sessions sit at the front, so every loop is amortized O(1)
+        deadline = time.monotonic() - self.idle_ttl
+        while self._sessions:
+            oldest_id, oldest = next(iter(self._sessions.items()))
+            if oldest_id == keep:
+                break
+            if oldest.last_access < deadline:
+                self._pop_oldest("idle")
+            elif len(self._sessions) > self.max_sessions:
+                self._pop_oldest("lru")
+            elif self._bytes > self.memory_budget_bytes:
+                self._pop_oldest("budget")
+            else:
+                break
+
+    def stats(self) -> dict:
+        return {
+            "sessions": len(self._sessions),
+            "estimated_bytes": self._bytes,
+            "max_sessions": self.max_sessions,
+            "memory_budget_bytes": self.memory_budget_bytes,
+            "idle_ttl_seconds": self.idle_ttl,
+            "evictions": dict(self._evictions),
+        }
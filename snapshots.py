@@ -0,0 +1,194 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from tools.arabic import normalize_arabic
+from tools.mentions_tool import fetch_mentions_summary
+from tools.perplexity_tool import complete_cached
+from tools.posts_tool import fetch_posts_summary
+from tools.seo_tool import fetch_seo_signals_summary
+from tools.telemetry import traced
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_TTL_SECONDS = float(os.getenv("SNAPSHOT_TTL_SECONDS", "1800"))
+SNAPSHOT_REFRESH_SECONDS = float(os.getenv("SNAPSHOT_REFRESH_SECONDS", "900"))
+# Narratives stay in perplexity_cache for one refresh interval: the build that
+# follows a live /360prep stream reuses it, the next scheduled refresh doesn't
+SNAPSHOT_NARRATIVE_TTL = SNAPSHOT_REFRESH_SECONDS
+# Bound on promoted companies, and separately on ad-hoc snapshots and request counters
+SNAPSHOT_MAX_COMPANIES = int(os.getenv("SNAPSHOT_MAX_COMPANIES", "50"))
+# Companies kept warm from startup, comma separated; never evicted
+SNAPSHOT_COMPANIES = [c.strip() for c in os.getenv("SNAPSHOT_COMPANIES", "Almarai").split(",") if c.strip()]
+# Requests after which an ad-hoc company joins the scheduled refresh (0: never)
+SNAPSHOT_PROMOTE_REQUESTS = int(os.getenv("SNAPSHOT_PROMOTE_REQUESTS", "5"))
+# The Supabase tables hold this brand's data; other companies get the narrative only
+SNAPSHOT_DATA_BRANDS = {normalize_arabic(b) for b in os.getenv("SNAPSHOT_DATA_BRANDS", "Almarai,المراعي").split(",")}
+
+SNAPSHOT_SEPARATOR = "\n\n━━━━━━━━━━\n\n"
+
+def snapshot_prompt(company: str) -> str:
+    intro = f"📊 360° Snapshot of {company} by MORVO:\n\n"
+    prompt = f"""Give a short marketing snapshot for {company}.
+
+Include:
+- Brand Mentions & Reputation
+- Social Media Performance
+- SEO & Keywords Analysis
+
+Keep it short, 40–100 words, bullet format, good for fast scan.
+"""
+    return intro + prompt
+
+@dataclass
+class Snapshot:
+    company: str
+    text: str
+    generated_at: float
+
+    @property
+    def age(self) -> float:
+        return time.time() - self.generated_at
+
+    @property
+    def stale(self) -> bool:
+        return self.age > SNAPSHOT_TTL_SECONDS
+
+class SnapshotEngine:
+    """
+    Precomputed /360prep answers keyed by company.
+
+    A snapshot blends the Perplexity narrative with the mentions, posts and
+    SEO summaries (for the brand whose data is in Supabase). Snapshots are
+    served from memory; a stale snapshot is still served while a lazy
+    refresh runs. Only a company that has never been built waits for the
+    first build.
+
+    Every build costs a paid Perplexity completion, and /360prep takes any
+    company name, so only SNAPSHOT_COMPANIES and companies requested
+    SNAPSHOT_PROMOTE_REQUESTS times are rebuilt on the schedule. Other
+    names are built on demand and kept for the TTL in a bounded LRU.
+    """
+
+    def __init__(self):
+        self._snapshots: dict[str, Snapshot] = {}
+        self._adhoc: OrderedDict[str, Snapshot] = OrderedDict()
+        self._configured = {self.key(company): company for company in SNAPSHOT_COMPANIES}
+        self._promoted: OrderedDict[str, str] = OrderedDict()
+        self._requests: OrderedDict[str, int] = OrderedDict()
+        self._refreshing: dict[str, asyncio.Task] = {}
+        self._scheduler: asyncio.Task | None = None
+
+    @staticmethod
+    def key(company: str) -> str:
+        return normalize_arabic(company)
+
+    def scheduled(self, key: str) -> bool:
+        return key in self._configured or key in self._promoted
+
+    def note_request(self, company: str):
+        """Counts a request; an ad-hoc company asked for often enough joins the schedule."""
+        key = self.key(company)
+        if key in self._configured:
+            return
+        if key in self._promoted:
+            self._promoted.move_to_end(key)
+            return
+        count = self._requests.pop(key, 0) + 1
+        if not SNAPSHOT_PROMOTE_REQUESTS or count < SNAPSHOT_PROMOTE_REQUESTS:
+            self._requests[key] = count
+            while len(self._requests) > SNAPSHOT_MAX_COMPANIES:
+                self._requests.popitem(last=False)
+            return
+        self._promoted[key] = company
+        snapshot = self._adhoc.pop(key, None)
+        if snapshot is not None:
+            self._snapshots[key] = snapshot
+        while len(self._promoted) > SNAPSHOT_MAX_COMPANIES:
+            dropped, _ = self._promoted.popitem(last=False)
+            self._snapshots.pop(dropped, None)
+
+    def _store(self, key: str, snapshot: Snapshot):
+        if self.scheduled(key):
+            self._snapshots[key] = snapshot
+            return
+        self._adhoc[key] = snapshot
+        self._adhoc.move_to_end(key)
+        while len(self._adhoc) > SNAPSHOT_MAX_COMPANIES:
+            self._adhoc.popitem(last=False)
+
+    def peek(self, company: str) -> Snapshot | None:
+        key = self.key(company)
+        snapshot = self._snapshots.get(key)
+        if snapshot is None and key in self._adhoc:
+            snapshot = self._adhoc[key]
+            self._adhoc.move_to_end(key)
+        return snapshot
+
+    def lookup(self, company: str) -> Snapshot | None:
+        """peek() for a client request: also counts it towards promotion."""
+        self.note_request(company)
+        return self.peek(company)
+
+    @traced("snapshot")
+    async def _build(self, company: str) -> Snapshot:
+        key = self.key(company)
+        sections = [asyncio.to_thread(complete_cached, snapshot_prompt(company), SNAPSHOT_NARRATIVE_TTL, True)]
+        if key in SNAPSHOT_DATA_BRANDS:
+            sections += [fetch_mentions_summary(), fetch_posts_summary(), fetch_seo_signals_summary()]
+        narrative, *data = await asyncio.gather(*sections)
+        text = SNAPSHOT_SEPARATOR.join([f"📊 360° Snapshot of {company} by MORVO:\n\n{narrative}", *data])
+        snapshot = Snapshot(company=company, text=text, generated_at=time.time())
+        self._store(key, snapshot)
+        return snapshot
+
+    def refresh(self, company: str) -> asyncio.Task:
+        """Starts (or joins) the single in-flight build for a company."""
+        key = self.key(company)
+        task = self._refreshing.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._build(company))
+            self._refreshing[key] = task
+            task.add_done_callback(lambda _: self._refreshing.pop(key, None))
+        return task
+
+    def refresh_in_background(self, company: str):
+        """Lazy refresh: kicks off a build without waiting for it."""
+        self.refresh(company).add_done_callback(self._log_failure)
+
+    async def get(self, company: str) -> Snapshot:
+        snapshot = self.lookup(company)
+        if snapshot is None:
+            return await asyncio.shield(self.refresh(company))
+        if snapshot.stale:
+            self.refresh_in_background(company)
+        return snapshot
+
+    @staticmethod
+    def _log_failure(task: asyncio.Task):
+        if not task.cancelled() and task.exception():
+            # Keep serving the previous snapshot; the next tick retries
+            logger.error("Snapshot refresh failed", extra={"error": str(task.exception())})
+
+    async def _run_scheduler(self):
+        while True:
+            for company in [*self._configured.values(), *self._promoted.values()]:
+                try:
+                    await self.refresh(company)
+                except Exception as e:
+                    logger.error("Snapshot refresh failed", extra={"company": company, "error": str(e)})
+            await asyncio.sleep(SNAPSHOT_REFRESH_SECONDS)
+
+    def start(self):
+        if self._scheduler is None:
+            self._scheduler = asyncio.ensure_future(self._run_scheduler())
+
+    def stop(self):
+        if self._scheduler is not None:
+            self._scheduler.cancel()
+            self._scheduler = None
+
+snapshot_engine = SnapshotEngine()
@@ -0,0 +1,46 @@
+-- Aggregation RPCs used by tools/analytics_tool.py.
+-- Apply once in the Supabase SQL editor (or via a migration).
+-- If these functions are missing the tool falls back to pulling only the
+-- needed columns and aggregating with NumPy.
+
+create or replace function mention_sentiment_by_platform(since timestamptz default null)
+returns table (
+    platform text,
+    sentiment text,
+    mentions bigint,
+    avg_score double precision,
+    total_engagement bigint
+)
+language sql stable as $$
+    select
+        coalesce(m.platform, 'unknown') as platform,
+        coalesce(m.sentiment, 'unknown') as sentiment,
+        count(*) as mentions,
+        avg(m.sentiment_score)::double precision as avg_score,
+        coalesce(sum(m.engagement), 0)::bigint as total_engagement
+    from mentions m
+    where since is null or m.published_date >= since
+    group by 1, 2
+$$;
+
+create or replace function post_engagement_by_platform(since timestamptz default null)
+returns table (
+    platform text,
+    posts bigint,
+    total_reach bigint,
+    avg_ctr double precision
+)
+language sql stable as $$
+    select
+        coalesce(p.platform, 'unknown') as platform,
+        count(*) as posts,
+        coalesce(sum(p.reach), 0)::bigint as total_reach,
+        avg(p.ctr)::double precision as avg_ctr
+    from posts p
+    where since is null or p.published_date >= since
+    group by 1
+$$;
+
+-- Keep the date filters index-backed
+create index if not exists mentions_published_date_idx on mentions (published_date);
+create index if not exists posts_published_date_idx on posts (published_date);
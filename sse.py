@@ -0,0 +1,20 @@
+import json
+
+from fastapi.responses import StreamingResponse
+
+def sse_event(text: str, event: str = "chunk") -> str:
+    """One Server-Sent Event; the payload is JSON so newlines survive framing."""
+    return f"event: {event}\ndata: {json.dumps({'text': text}, ensure_ascii=False)}\n\n"
+
+def sse_response(events, background=None) -> StreamingResponse:
+    """Wraps a (sync or async) iterator of sse_event strings; `background` runs after the last one."""
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        background=background,
+        headers={
+            "Cache-Control": "no-cache",
+            # Stop nginx-style proxies from buffering the stream
+            "X-Accel-Buffering": "no",
+        },
+    )
@@ -0,0 +1,47 @@
+import asyncio
+import time
+
+import agent
+from schema import UserProfile
+from tools import mention_search
+from tools.mention_search import MentionIndex
+from tools.row_feed import feed_for
+
+def _rows(n: int) -> list[dict]:
+    return [{
+        "id": i, "mention_text": f"السعر غالي شوي {i}", "sentiment": "negative", "platform": "twitter",
+        "author": f"user{i}", "published_date": "2026-01-01",
+    } for i in range(1, n + 1)]
+
+def test_show_more_continues_a_mention_search(monkeypatch):
+    rows = {row["id"]: row for row in _rows(12)}
+    index = MentionIndex()
+    index.add_rows(list(rows.values()))
+
+    async def rows_by_id(table, ids):
+        return [rows[i] for i in ids]
+
+    monkeypatch.setattr(mention_search, "mention_index", index)
+    monkeypatch.setattr(mention_search, "fetch_rows_by_id", rows_by_id)
+    monkeypatch.setattr(feed_for("mentions"), "last_pull_at", time.time())
+
+    profile = UserProfile()
+    user = "paging-test"
+
+    def shown_authors(reply: str) -> list[str]:
+        return [line.split(": ")[1] for line in reply.splitlines() if "الكاتب" in line]
+
+    async def conversation():
+        first = await agent.run_agent(user, "وش الناس يقولون عن السعر", profile)
+        second = await agent.run_agent(user, "المزيد", profile)
+        third = await agent.run_agent(user, "المزيد", profile)
+        after_last = await agent.run_agent(user, "المزيد", profile)
+        return first, second, third, after_last
+
+    first, second, third, after_last = asyncio.run(conversation())
+
+    # Newest first on tied scores, five per page, no repeats across pages
+    assert shown_authors(first) == [f"user{i}" for i in (12, 11, 10, 9, 8)]
+    assert shown_authors(second) == [f"user{i}" for i in (7, 6, 5, 4, 3)]
+    assert shown_authors(third) == ["user2", "user1"]
+    assert "اسأل أولاً" in after_last
@@ -0,0 +1,48 @@
+import asyncio
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+from tools import row_feed
+from tools.keyword_index import KeywordIndex
+from tools.row_feed import RowFeed
+from tools.schema_registry import TableSchema
+
+def test_importing_main_does_not_load_numpy():
+    code = "import sys, main; print('numpy' in sys.modules)"
+    out = subprocess.run([sys.executable, "-c", code], cwd=Path(__file__).resolve().parent.parent,
+                         capture_output=True, text=True, check=True).stdout
+    assert out.strip() == "False"
+
+def test_threaded_feed_builds_the_keyword_index_off_the_event_loop(monkeypatch):
+    rows = [
+        {"id": 1, "keyword": "لبن المراعي", "position": 4, "volume": 900, "competition": 0.4},
+        {"id": 2, "keyword": "لبن اب", "position": 9, "volume": 300, "competition": 0.7},
+        {"id": 3, "keyword": "لبن المراعي", "position": 2, "volume": 950, "competition": 0.4},
+    ]
+
+    async def schema(table, candidates):
+        return TableSchema(table, ("id",) + KeywordIndex.COLUMNS, "id", 0.0)
+
+    async def pages(table, columns, page_size, after_id=None):
+        yield rows
+
+    monkeypatch.setattr(row_feed, "get_table_schema", schema)
+    monkeypatch.setattr(row_feed, "iter_table", pages)
+
+    index = KeywordIndex()
+    threads = []
+
+    def consume(page):
+        threads.append(threading.current_thread())
+        index.add_rows(page)
+
+    feed = RowFeed("seo_signals")
+    feed.subscribe("seo_keywords", consume, KeywordIndex.COLUMNS, after_pull=index.settle, threaded=True)
+    assert index.prefix("لبن", 5) == ([], 0)
+
+    assert asyncio.run(feed.pull()) == 3
+    assert threads and threads[0] is not threading.main_thread()
+    assert index.prefix("لبن", 5) == ([0, 1], 2)
+    assert index.position_change(index.exact("لبن المراعي")) == 2
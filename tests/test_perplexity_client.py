@@ -0,0 +1,59 @@
+import sys
+from pathlib import Path
+
+import pytest
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "benchmarks"))
+
+from fakes import FakePerplexity  # noqa: E402
+from tools import perplexity_client as pc  # noqa: E402
+
+class _BrokenSession:
+    """Stands in for requests.Session: every post raises the given error."""
+
+    def __init__(self, error: Exception):
+        self.error = error
+        self.posts = 0
+
+    def post(self, *args, **kwargs):
+        self.posts += 1
+        raise self.error
+
+def _half_open_client(error: Exception) -> pc.PerplexityClient:
+    client = pc.PerplexityClient()
+    client._session = _BrokenSession(error)
+    client.breaker.state = "open"
+    client.breaker._opened_at = -client.breaker.reset_seconds
+    return client
+
+def test_unexpected_error_in_half_open_trial_frees_the_trial_slot():
+    client = _half_open_client(requests.exceptions.ChunkedEncodingError("cut"))
+
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        client._post({})
+    assert client.breaker.state == "half_open"
+    # The next call is let through as the new trial instead of failing fast
+    with pytest.raises(requests.exceptions.ChunkedEncodingError):
+        client._post({})
+    assert client._session.posts == 2
+
+def test_half_open_trial_failure_reopens_the_breaker(monkeypatch):
+    monkeypatch.setattr(pc, "PERPLEXITY_MAX_RETRIES", 0)
+    client = _half_open_client(requests.ConnectionError("down"))
+
+    with pytest.raises(pc.PerplexityError):
+        client._post({})
+    assert client.breaker.state == "open"
+    with pytest.raises(pc.CircuitOpenError):
+        client._post({})
+    assert client._session.posts == 1
+
+def test_stream_decodes_arabic_deltas_as_utf8(monkeypatch):
+    fake = FakePerplexity(chunks=3).start()
+    try:
+        monkeypatch.setattr(pc, "PERPLEXITY_API_URL", fake.url + "/chat/completions")
+        text = "".join(pc.PerplexityClient().stream("خطة رمضان"))
+    finally:
+        fake.stop()
+    assert text == "".join(f"• نقطة تسويقية رقم {i} عن الطلب المطلوب.\n" for i in range(3))
@@ -0,0 +1,15 @@
+from tools import telemetry
+from tools.replica import LocalReplica
+
+def test_replica_lag_is_exported_per_table(tmp_path, monkeypatch):
+    replica = LocalReplica(str(tmp_path / "replica.db"))
+    replica._apply_page("mentions", [{"id": 1, "created_at": "2026-01-01T00:00:00+00:00"}], "created_at", ())
+    monkeypatch.setattr(telemetry, "_collectors", {"replica": replica.lag_metrics})
+
+    metrics = telemetry.render_metrics()
+    assert "morvo_replica_mentions_sync_lag_seconds " in metrics
+    assert "morvo_replica_mentions_data_lag_seconds " in metrics
+    assert "morvo_replica_mentions_fresh 1" in metrics
+    # Never synced: no lag to report, and not fresh
+    assert "morvo_replica_posts_sync_lag_seconds" not in metrics
+    assert "morvo_replica_posts_fresh 0" in metrics
@@ -0,0 +1,31 @@
+from snapshots import snapshot_prompt
+from tools import perplexity_tool
+from tools.response_cache import ResponseCache
+
+def test_exact_lookup_never_returns_another_company_snapshot():
+    cache = ResponseCache(100, 1000, 0.85)
+    cache.put(snapshot_prompt("Almarai"), "Almarai narrative")
+
+    # Near-duplicate matching can't tell the companies apart...
+    assert cache.get(snapshot_prompt("Savola")) == "Almarai narrative"
+    # ...so snapshot prompts are looked up exactly
+    for company in ("Savola", "Nadec", "Al Safi", "Coca-Cola", "Pepsi", "Almarai KSA"):
+        assert cache.get(snapshot_prompt(company), exact=True) is None
+    assert cache.get(snapshot_prompt("Almarai"), exact=True) == "Almarai narrative"
+
+def test_complete_cached_exact_asks_perplexity_per_company(monkeypatch):
+    asked = []
+
+    class Client:
+        def complete(self, query):
+            asked.append(query)
+            return f"narrative {len(asked)}"
+
+    monkeypatch.setattr(perplexity_tool, "perplexity_cache", ResponseCache(100, 1000, 0.85))
+    monkeypatch.setattr(perplexity_tool, "perplexity_client", Client())
+
+    first = perplexity_tool.complete_cached(snapshot_prompt("Almarai"), exact=True)
+    second = perplexity_tool.complete_cached(snapshot_prompt("Savola"), exact=True)
+    again = perplexity_tool.complete_cached(snapshot_prompt("Almarai"), exact=True)
+    assert (first, second, again) == ("narrative 1", "narrative 2", "narrative 1")
+    assert len(asked) == 2
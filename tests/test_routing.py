@@ -0,0 +1,18 @@
+from agent import ToolCall, plan_tool_calls
+from tools.mention_search import extract_search_args
+
+def test_period_words_are_not_search_terms():
+    assert extract_search_args("وش الناس يقولون عن المراعي هالأسبوع؟") == ("", None, None)
+    assert extract_search_args("what are people saying about almarai this week") == ("", None, None)
+    assert extract_search_args("وش يقولون عن السعر هذا الشهر") == ("السعر", None, None)
+
+def test_mentions_question_without_a_term_is_not_a_search():
+    assert plan_tool_calls("وش الناس يقولون عن المراعي؟") == [ToolCall("mentions")]
+    assert plan_tool_calls("وش الناس يقولون عن المراعي هالأسبوع؟") == [ToolCall("mention_analytics", (7,))]
+    assert plan_tool_calls("وش يقولون عن السعر") == [ToolCall("mention_search", ("السعر", None, None))]
+
+def test_generic_ranking_question_gets_the_seo_summary():
+    assert plan_tool_calls("وش ترتيبنا في محركات البحث؟") == [ToolCall("seo")]
+    assert plan_tool_calls("وش ترتيبنا في محركات البحث للكلمات المفتاحية؟") == [ToolCall("seo")]
+    assert plan_tool_calls("وين ترتيبنا في لبن") == [ToolCall("seo_keyword", ("keyword", "لبن"))]
+    assert plan_tool_calls("most competitive keywords") == [ToolCall("seo_keyword", ("most_competitive", ""))]
@@ -0,0 +1,51 @@
+import asyncio
+
+import pytest
+
+from tools import row_feed
+from tools.row_feed import RowFeed
+from tools.schema_registry import TableSchema
+
+@pytest.fixture
+def table(monkeypatch):
+    """Visible rows of a fake table; iter_table pages them in id order."""
+    visible: list[dict] = []
+
+    async def schema(name, candidates):
+        return TableSchema(name, ("id", "text"), "id", 0.0)
+
+    async def pages(name, columns, page_size, after_id=None):
+        rows = sorted((r for r in visible if after_id is None or r["id"] > after_id), key=lambda r: r["id"])
+        for start in range(0, len(rows), page_size):
+            yield rows[start:start + page_size]
+
+    monkeypatch.setattr(row_feed, "get_table_schema", schema)
+    monkeypatch.setattr(row_feed, "iter_table", pages)
+    monkeypatch.setattr(row_feed, "FEED_PAGE_SIZE", 2)
+    monkeypatch.setattr(row_feed, "FEED_ID_OVERLAP", 10)
+    return visible
+
+def _feed(seen: list[int]) -> RowFeed:
+    feed = RowFeed("mentions")
+    feed.subscribe("test", lambda rows: seen.extend(row["id"] for row in rows), ("text",))
+    return feed
+
+def test_row_committed_late_under_a_lower_id_is_delivered_once(table):
+    seen: list[int] = []
+    feed = _feed(seen)
+    table.extend({"id": i, "text": "x"} for i in (1, 2, 3, 5))
+
+    assert asyncio.run(feed.pull()) == 4
+    # id 4 was taken before 5 but its transaction commits after the pull
+    table.append({"id": 4, "text": "late"})
+    table.append({"id": 6, "text": "x"})
+    assert asyncio.run(feed.pull()) == 2
+    assert asyncio.run(feed.pull()) == 0
+    assert seen == [1, 2, 3, 5, 4, 6]
+    assert feed.last_id == 6
+
+def test_non_integer_ids_are_rejected(table):
+    feed = _feed([])
+    table.append({"id": "a1b2", "text": "x"})
+    with pytest.raises(ValueError, match="serial ids"):
+        asyncio.run(feed.pull())
@@ -0,0 +1,19 @@
+from tools.text_index import InvertedIndex
+
+def test_ties_keep_the_newest_documents():
+    index = InvertedIndex()
+    for i in range(200):
+        index.add(f"milk offer {i}")
+
+    result = index.search("milk", limit=5)
+
+    assert result.total == 200
+    assert list(result.docs) == [199, 198, 197, 196, 195]
+
+def test_higher_scores_rank_before_newer_ties():
+    index = InvertedIndex()
+    index.add("milk milk milk")
+    for i in range(50):
+        index.add(f"milk and {i}")
+
+    assert list(index.search("milk", limit=3).docs) == [0, 50, 49]
@@ -0,0 +1,273 @@
+import logging
+import os
+import re
+import time
+from datetime import datetime, timedelta, timezone
+
+from .formatters import SENTIMENT_LABELS, score_icon
+from .replica import replica
+from .supabase_client import get_supabase
+from .summary_cache import summary_cache
+from .telemetry import span
+
+logger = logging.getLogger(__name__)
+
+# Rows per request when the RPCs are missing and we aggregate locally
+ANALYTICS_BATCH_SIZE = int(os.getenv("ANALYTICS_BATCH_SIZE", "1000"))
+# How long to skip an RPC after Postgres said it doesn't exist
+ANALYTICS_RPC_RETRY_SECONDS = float(os.getenv("ANALYTICS_RPC_RETRY_SECONDS", "600"))
+
+_rpc_missing_until: dict[str, float] = {}
+
+_PERIODS = [
+    (re.compile(r"today|اليوم"), 1),
+    (re.compile(r"week|اسبوع|أسبوع"), 7),
+    (re.compile(r"month|شهر"), 30),
+]
+
+def extract_period_days(message: str) -> int | None:
+    """'last week' -> 7, 'this month' -> 30; None means all time."""
+    message = message.lower()
+    for pattern, days in _PERIODS:
+        if pattern.search(message):
+            return days
+    return None
+
+def _since(days: int | None) -> str | None:
+    if days is None:
+        return None
+    return (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+
+def _period_label(days: int | None) -> str:
+    return f"آخر {days} أيام" if days else "كل الفترات"
+
+async def _call_rpc(name: str, params: dict) -> list[dict] | None:
+    """Runs a Postgres aggregation RPC; None if it isn't installed (see sql/analytics.sql)."""
+    if time.monotonic() < _rpc_missing_until.get(name, 0):
+        return None
+    supabase = await get_supabase()
+    try:
+        with span("supabase"):
+            result = await supabase.rpc(name, params).execute()
+    except Exception as e:
+        # PGRST202: function not in the schema cache; 42883: undefined function
+        if getattr(e, "code", None) not in ("PGRST202", "42883"):
+            raise
+        logger.warning("RPC unavailable, aggregating locally", extra={"rpc": name, "error": str(e)})
+        _rpc_missing_until[name] = time.monotonic() + ANALYTICS_RPC_RETRY_SECONDS
+        return None
+    return result.data or []
+
+async def _load_columns(table: str, columns: list[str], since: str | None) -> dict[str, list]:
+    """
+    Pulls only the needed columns in fixed-size batches, as column lists.
+    Batches are keyset pages in id order, so no row is read twice or skipped
+    (offset pages over an unordered scan can do both).
+    """
+    supabase = await get_supabase()
+    data: dict[str, list] = {column: [] for column in columns}
+    select = ",".join(dict.fromkeys(["id", *columns]))
+    last_id = None
+    while True:
+        query = supabase.table(table).select(select)
+        if since:
+            query = query.gte("published_date", since)
+        if last_id is not None:
+            query = query.gt("id", last_id)
+        with span("supabase"):
+            result = await query.order("id").limit(ANALYTICS_BATCH_SIZE).execute()
+        rows = result.data or []
+        for column, values in data.items():
+            values.extend(row.get(column) for row in rows)
+        if len(rows) < ANALYTICS_BATCH_SIZE:
+            return data
+        last_id = rows[-1]["id"]
+
+def _labels(values: list):
+    import numpy as np
+    return np.array([str(v) if v is not None else "unknown" for v in values], dtype=object)
+
+def _numbers(values: list):
+    import numpy as np
+    return np.array([float(v) if v is not None else np.nan for v in values], dtype=np.float64)
+
+def aggregate_mentions(columns: dict[str, list]) -> list[dict]:
+    """NumPy fallback for mention_sentiment_by_platform."""
+    import numpy as np
+
+    if not columns["platform"]:
+        return []
+    platforms, platform_idx = np.unique(_labels(columns["platform"]), return_inverse=True)
+    sentiments, sentiment_idx = np.unique(_labels(columns["sentiment"]), return_inverse=True)
+    group = platform_idx * len(sentiments) + sentiment_idx
+    size = len(platforms) * len(sentiments)
+
+    scores = _numbers(columns["sentiment_score"])
+    has_score = ~np.isnan(scores)
+    counts = np.bincount(group, minlength=size)
+    score_sums = np.bincount(group, weights=np.where(has_score, scores, 0.0), minlength=size)
+    score_counts = np.bincount(group, weights=has_score.astype(np.float64), minlength=size)
+    engagement = np.bincount(group, weights=np.nan_to_num(_numbers(columns["engagement"])), minlength=size)
+
+    rows = []
+    for g in np.flatnonzero(counts):
+        rows.append({
+            "platform": platforms[g // len(sentiments)],
+            "sentiment": sentiments[g % len(sentiments)],
+            "mentions": int(counts[g]),
+            "avg_score": float(score_sums[g] / score_counts[g]) if score_counts[g] else None,
+            "total_engagement": int(engagement[g]),
+        })
+    return rows
+
+def aggregate_posts(columns: dict[str, list]) -> list[dict]:
+    """NumPy fallback for post_engagement_by_platform."""
+    import numpy as np
+
+    if not columns["platform"]:
+        return []
+    platforms, group = np.unique(_labels(columns["platform"]), return_inverse=True)
+    counts = np.bincount(group, minlength=len(platforms))
+    reach = np.bincount(group, weights=np.nan_to_num(_numbers(columns["reach"])), minlength=len(platforms))
+    ctr = _numbers(columns["ctr"])
+    has_ctr = ~np.isnan(ctr)
+    ctr_sums = np.bincount(group, weights=np.where(has_ctr, ctr, 0.0), minlength=len(platforms))
+    ctr_counts = np.bincount(group, weights=has_ctr.astype(np.float64), minlength=len(platforms))
+
+    return [
+        {
+            "platform": platforms[g],
+            "posts": int(counts[g]),
+            "total_reach": int(reach[g]),
+            "avg_ctr": float(ctr_sums[g] / ctr_counts[g]) if ctr_counts[g] else None,
+        }
+        for g in range(len(platforms))
+    ]
+
+def format_mention_breakdown(rows: list[dict], days: int | None) -> str:
+    if not rows:
+        return "📭 لا توجد إشارات كافية للتحليل في هذه الفترة."
+
+    by_platform: dict[str, list[dict]] = {}
+    for row in rows:
+        by_platform.setdefault(row["platform"], []).append(row)
+
+    parts = [f"📊 توزيع المشاعر حسب المنصة ({_period_label(days)}):\n"]
+    total_mentions = 0
+    total_scored = 0
+    total_score = 0.0
+    for platform, groups in sorted(by_platform.items(), key=lambda item: -sum(g["mentions"] for g in item[1])):
+        mentions = sum(g["mentions"] for g in groups)
+        scored = [g for g in groups if g["avg_score"] is not None]
+        scored_count = sum(g["mentions"] for g in scored)
+        avg = sum(g["avg_score"] * g["mentions"] for g in scored) / scored_count if scored_count else 0.0
+        total_mentions += mentions
+        total_scored += scored_count
+        total_score += avg * scored_count
+        shares = " ".join(
+            f"{SENTIMENT_LABELS.get(g['sentiment'], '❓ ' + g['sentiment'])} {g['mentions'] / mentions:.0%}"
+            for g in sorted(groups, key=lambda g: -g["mentions"])
+        )
+        engagement = sum(g["total_engagement"] for g in groups)
+        parts.append(
+            f"• {platform}: {mentions:,} ذكر\n"
+            f"  - {shares}\n"
+            f"  - متوسط المشاعر: {avg:.2f} {score_icon(avg)}\n"
+            f"  - إجمالي التفاعل: {engagement:,} 👥\n"
+        )
+
+    overall = total_score / total_scored if total_scored else 0.0
+    parts.append(f"📈 المتوسط العام للمشاعر: {overall:.2f} {score_icon(overall)} من {total_mentions:,} ذكر")
+    return "\n".join(parts)
+
+def format_post_breakdown(rows: list[dict], days: int | None) -> str:
+    if not rows:
+        return "📭 لا توجد منشورات كافية للتحليل في هذه الفترة."
+
+    parts = [f"📱 أداء المنشورات حسب المنصة ({_period_label(days)}):\n"]
+    for row in sorted(rows, key=lambda r: -r["total_reach"]):
+        ctr = f"{row['avg_ctr']:.1f}%" if row["avg_ctr"] is not None else "غير متوفر"
+        parts.append(
+            f"• {row['platform']}: {row['posts']:,} منشور\n"
+            f"  - إجمالي الوصول: {row['total_reach']:,} مشاهدة\n"
+            f"  - متوسط نسبة النقر: {ctr} 🎯\n"
+        )
+    return "\n".join(parts)
+
+def _replica_aggregate(sql: str, since: str | None) -> list[dict] | None:
+    """Same GROUP BY as the RPCs, run on the local replica; None if it can't answer."""
+    try:
+        with span("replica"):
+            return replica.query(sql, (since, since))
+    except Exception as e:
+        logger.warning("Replica aggregation failed, using Supabase", extra={"error": str(e)})
+        return None
+
+async def _build_mention_breakdown(days: int | None) -> str:
+    since = _since(days)
+    if replica is not None and replica.is_fresh("mentions"):
+        rows = _replica_aggregate("""
+            SELECT COALESCE(platform, 'unknown') AS platform,
+                   COALESCE(sentiment, 'unknown') AS sentiment,
+                   COUNT(*) AS mentions,
+                   AVG(sentiment_score) AS avg_score,
+                   COALESCE(SUM(engagement), 0) AS total_engagement
+            FROM mentions
+            WHERE ? IS NULL OR published_date >= ?
+            GROUP BY 1, 2
+        """, since)
+        if rows is not None:
+            return format_mention_breakdown(rows, days)
+
+    rows = await _call_rpc("mention_sentiment_by_platform", {"since": since})
+    if rows is None:
+        columns = await _load_columns(
+            "mentions", ["platform", "sentiment", "sentiment_score", "engagement"], since
+        )
+        with span("aggregate"):
+            rows = aggregate_mentions(columns)
+    return format_mention_breakdown(rows, days)
+
+async def _build_post_breakdown(days: int | None) -> str:
+    since = _since(days)
+    if replica is not None and replica.is_fresh("posts"):
+        rows = _replica_aggregate("""
+            SELECT COALESCE(platform, 'unknown') AS platform,
+                   COUNT(*) AS posts,
+                   COALESCE(SUM(reach), 0) AS total_reach,
+                   AVG(ctr) AS avg_ctr
+            FROM posts
+            WHERE ? IS NULL OR published_date >= ?
+            GROUP BY 1
+        """, since)
+        if rows is not None:
+            return format_post_breakdown(rows, days)
+
+    rows = await _call_rpc("post_engagement_by_platform", {"since": since})
+    if rows is None:
+        columns = await _load_columns("posts", ["platform", "reach", "ctr"], since)
+        with span("aggregate"):
+            rows = aggregate_posts(columns)
+    return format_post_breakdown(rows, days)
+
+async def fetch_mention_sentiment_breakdown(days: int | None = None) -> str:
+    """Sentiment distribution, average score and engagement per platform."""
+    try:
+        return await summary_cache.get_or_load(
+            f"mention_analytics:{days}", lambda: _build_mention_breakdown(days)
+        )
+    except Exception as e:
+        error_msg = f"🔥 Error aggregating mentions: {str(e)}"
+        logger.error("Mention analytics failed", extra={"days": days, "error": str(e)})
+        return f"❌ فشل في تحليل المشاعر:\n{error_msg}"
+
+async def fetch_post_engagement_breakdown(days: int | None = None) -> str:
+    """Post count, total reach and mean CTR per platform."""
+    try:
+        return await summary_cache.get_or_load(
+            f"post_analytics:{days}", lambda: _build_post_breakdown(days)
+        )
+    except Exception as e:
+        error_msg = f"🔥 Error aggregating posts: {str(e)}"
+        logger.error("Post analytics failed", extra={"days": days, "error": str(e)})
+        return f"❌ فشل في تحليل المنشورات:\n{error_msg}"
@@ -0,0 +1,34 @@
+import re
+
+# Harakat, Quranic marks and superscript alef are dropped, and so is tatweel
+_DIACRITICS = (
+    [chr(c) for c in range(0x0610, 0x061B)]
+    + [chr(c) for c in range(0x064B, 0x0660)]
+    + ["ٰ"]
+    + [chr(c) for c in range(0x06D6, 0x06EE)]
+)
+_DROP = re.compile("[" + "".join(re.escape(c) for c in _DIACRITICS + ["ـ"]) + "]")
+
+# Letter variants folded to one form
+_LETTER_FOLDS = {
+    "أ": "ا", "إ": "ا", "آ": "ا", "ٱ": "ا",
+    "ى": "ي", "ئ": "ي",
+    "ؤ": "و",
+    "ة": "ه",
+}
+
+def normalize_arabic(text: str) -> str:
+    """
+    Normalizes text for matching: lowercase, strip diacritics and tatweel,
+    fold alef/ya/ta-marbuta variants and collapse whitespace.
+    """
+    text = text.lower()
+    if not text.isascii():
+        # A few str.replace calls and one deletion-only regex run in C; a
+        # regex with a callback (or str.translate, which looks up every
+        # non-ASCII character in its table) costs 2-3x as much
+        for variant, letter in _LETTER_FOLDS.items():
+            if variant in text:
+                text = text.replace(variant, letter)
+        text = _DROP.sub("", text)
+    return " ".join(text.split())
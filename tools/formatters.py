@@ -1,88 +1,126 @@
+import logging
 from datetime import datetime
+from typing import Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+# Lookup tables shared by every formatter (built once at import)
+PLATFORM_ICONS = {
+    "instagram": "📸",
+    "tiktok": "🎵",
+    "twitter": "🐦",
+    "facebook": "👥",
+    "linkedin": "💼",
+}
+
+SENTIMENT_LABELS = {
+    "positive": "✨ إيجابي",
+    "negative": "⚠️ سلبي",
+    "neutral": "📝 محايد",
+}
+
+UNKNOWN_DATE = "تاريخ غير معروف"
 
 def format_date(date_str: str | None) -> str:
     """Format date string or return 'تاريخ غير معروف'."""
     if not date_str:
-        return "تاريخ غير معروف"
+        return UNKNOWN_DATE
     try:
-        return datetime.fromisoformat(date_str).strftime("%Y-%m-%d")
-    except:
-        return "تاريخ غير معروف"
+        # Same text as strftime("%Y-%m-%d") at a quarter of the cost
+        return datetime.fromisoformat(date_str).date().isoformat()
+    except (TypeError, ValueError):
+        return UNKNOWN_DATE
 
-def format_social_post(post: dict) -> str:
-    """
-    Format a social media post into a readable string.
-    """
-    platform = post.get("platform", "منصة غير معروفة")
-    date = format_date(post.get("published_date"))
-    content = post.get("content", "لا يوجد محتوى")
-    reach = post.get("reach", 0)
-    ctr = post.get("ctr", 0)
-    
-    platform_icons = {
-        "instagram": "📸",
-        "tiktok": "🎵",
-        "twitter": "🐦",
-        "facebook": "👥",
-        "linkedin": "💼"
-    }
-    icon = platform_icons.get(platform.lower(), "🌐")
+def score_icon(score: float) -> str:
+    return "🟢" if score > 0.3 else "🔴" if score < -0.3 else "⚪"
 
+def competition_level(competition: float) -> str:
     return (
-        f"{icon} {platform} | {date}\n"
-        f"📝 {content[:100]}...\n"
-        f"👥 الوصول: {reach:,} مشاهدة\n"
-        f"🎯 نسبة النقر: {ctr:.1f}%"
+        "عالية 🔴" if competition > 0.66 else
+        "متوسطة 🟡" if competition > 0.33 else
+        "منخفضة 🟢"
     )
 
-def format_mention(mention: dict) -> str:
+class BatchFormatter:
     """
-    Format a brand mention into a readable string.
+    Formats a batch of rows with one render function.
+
+    Renderers are f-strings compiled once at import, and they only read the
+    module-level lookup tables, so nothing is rebuilt per row. A row that
+    fails to format becomes `error_line` instead of failing the whole batch.
     """
-    platform = mention.get("platform", "منصة غير معروفة")
-    date = format_date(mention.get("published_date"))
-    author = mention.get("author", "مجهول")
-    text = mention.get("mention_text", "لا يوجد نص")
-    sentiment = mention.get("sentiment", "محايد")
-    score = mention.get("sentiment_score", 0)
-    engagement = mention.get("engagement", 0)
-
-    sentiment_ar = {
-        "positive": "إيجابي ✨",
-        "negative": "سلبي ⚠️",
-        "neutral": "محايد 📝"
-    }.get(sentiment, "غير معروف ❓")
-
-    score_icon = "🟢" if score > 0.3 else "🔴" if score < -0.3 else "⚪"
 
+    def __init__(self, name: str, render: Callable[[dict], str], error_line: str):
+        self.name = name
+        self.render = render
+        self.error_line = error_line
+
+    def format_rows(self, rows: Iterable[dict]) -> list[str]:
+        render = self.render
+        rows = rows if isinstance(rows, list) else list(rows)
+        try:
+            # Fast path: a page of well-formed rows needs no per-row handler
+            return [render(row) for row in rows]
+        except Exception:
+            pass
+        lines = []
+        for row in rows:
+            try:
+                lines.append(render(row))
+            except Exception as e:
+                # Row ids only: full rows would put customer text in the logs
+                logger.warning("Row formatting failed",
+                               extra={"kind": self.name, "row_id": row.get("id"), "error": str(e)})
+                lines.append(self.error_line)
+        return lines
+
+def _render_post(post: dict) -> str:
+    platform = post.get("platform") or "منصة غير معروفة"
     return (
-        f"📅 {date} | {platform}\n"
-        f"👤 {author}\n"
-        f"💬 {text[:100]}...\n"
-        f"📊 {sentiment_ar} {score_icon}\n"
-        f"👥 تفاعل: {engagement:,}"
+        f"{PLATFORM_ICONS.get(platform.lower(), '🌐')} {platform} | {format_date(post.get('published_date'))}\n"
+        f"📝 {(post.get('content') or 'لا يوجد محتوى')[:100]}...\n"
+        f"👥 الوصول: {post.get('reach') or 0:,} مشاهدة\n"
+        f"🎯 نسبة النقر: {post.get('ctr') or 0:.1f}%"
     )
 
-def format_seo_signal(signal: dict) -> str:
-    """
-    Format an SEO signal into a readable string.
-    """
-    keyword = signal.get("keyword", "كلمة غير معروفة")
-    position = signal.get("position", "غير معروف")
-    volume = signal.get("volume", 0)
-    cpc = signal.get("cpc", 0.0)
-    competition = signal.get("competition", 0)
-
-    competition_level = (
-        "عالية 🔴" if competition > 0.66 else
-        "متوسطة 🟡" if competition > 0.33 else
-        "منخفضة 🟢"
+def _render_mention(mention: dict) -> str:
+    # Any available date column, newest meaning first
+    date = format_date(
+        mention.get("published_date") or mention.get("collected_date") or mention.get("created_at")
+    )
+    engagement = mention.get("engagement")
+    return (
+        f"• {date} | {SENTIMENT_LABELS.get(mention.get('sentiment'), '❓ غير محدد')} "
+        f"{score_icon(mention.get('sentiment_score') or 0)}\n"
+        f"  - المنصة: {mention.get('platform') or 'غير معروف'}\n"
+        f"  - الكاتب: {mention.get('author') or 'مجهول'}\n"
+        f"  - المحتوى: {(mention.get('mention_text') or '[لا يوجد نص]')[:100]}...\n"
+        f"  - التفاعل: {0 if engagement is None else engagement} 👥\n"
     )
 
+def _render_seo_signal(signal: dict) -> str:
+    position = signal.get("position")
+    volume = signal.get("volume")
     return (
-        f"🔑 {keyword}\n"
-        f"📊 الموقع: {position}\n"
-        f"🔍 حجم البحث: {volume:,}\n"
-        f"💰 تكلفة النقرة: ${cpc:.2f}\n"
-        f"⚔️ المنافسة: {competition_level}"
-    )
\ No newline at end of file
+        f"• الكلمة المفتاحية: {signal.get('keyword') or '[غير معروف]'}\n"
+        f"  - الموقع: {'N/A' if position is None else position} 📊\n"
+        f"  - حجم البحث: {0 if volume is None else volume} 🔍\n"
+        f"  - تكلفة النقرة: ${signal.get('cpc') or 0:.2f} 💰\n"
+        f"  - المنافسة: {competition_level(signal.get('competition') or 0)}\n"
+    )
+
+POST_FORMATTER = BatchFormatter("post", _render_post, "⚠️ خطأ في معالجة هذا المنشور")
+MENTION_FORMATTER = BatchFormatter("mention", _render_mention, "⚠️ خطأ في معالجة هذا الذكر")
+SEO_FORMATTER = BatchFormatter("SEO signal", _render_seo_signal, "⚠️ خطأ في معالجة هذه الكلمة المفتاحية")
+
+def format_social_post(post: dict) -> str:
+    """Format a social media post into a readable string."""
+    return _render_post(post)
+
+def format_mention(mention: dict) -> str:
+    """Format a brand mention into a readable string."""
+    return _render_mention(mention)
+
+def format_seo_signal(signal: dict) -> str:
+    """Format an SEO signal into a readable string."""
+    return _render_seo_signal(signal)
@@ -0,0 +1,15 @@
+def quote_value(value) -> str:
+    """Quotes a value for a PostgREST logic filter (commas, dots and colons are reserved)."""
+    text = str(value).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{text}"'
+
+def keyset_filter(column: str, value, row_id, desc: bool = False) -> str:
+    """
+    PostgREST `or` filter selecting rows strictly after (value, row_id) in
+    (column, id) order, e.g. for .or_(...) on a query ordered by column, id.
+    """
+    op = "lt" if desc else "gt"
+    if column == "id":
+        return f"id.{op}.{quote_value(row_id)}"
+    v = quote_value(value)
+    return f"{column}.{op}.{v},and({column}.eq.{v},id.{op}.{quote_value(row_id)})"
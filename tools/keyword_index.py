@@ -0,0 +1,300 @@
+import heapq
+import os
+import threading
+from array import array
+from bisect import bisect_left, insort
+
+from .arabic import normalize_arabic
+from .row_feed import feed_for
+
+SEO_KEYWORD_INDEX_ENABLED = os.getenv("SEO_KEYWORD_INDEX_ENABLED", "true").lower() in ("1", "true", "yes")
+
+def normalize_keyword(keyword) -> str:
+    return normalize_arabic(str(keyword or "")).strip(" ?؟!.،,\"'")
+
+# Pending changes up to this many are bisected into a sorted list; more rebuild it
+_RESORT_THRESHOLD = 256
+
+def max_typos(term: str) -> int:
+    """Edit distance tolerated for a lookup term: none for very short ones."""
+    return 0 if len(term) < 3 else 1 if len(term) < 7 else 2
+
+class KeywordTrie:
+    """
+    Character trie from normalized keys to keyword slots, plus the same keys
+    in sorted NumPy arrays. Each keyword is added under its full text and
+    under every later word start, so "laban" finds "almarai laban" as well
+    as "laban up". Prefixes are a searchsorted range of the arrays, which
+    take new keys on settle(); the trie serves edit-distance walks.
+    """
+
+    _END = ""
+
+    def __init__(self):
+        import numpy as np
+
+        self._np = np
+        self._root: dict = {}
+        self._sorted_keys = np.empty(0, dtype=str)
+        self._sorted_slots = np.empty(0, dtype=np.int64)
+        self._pending: list[tuple[str, int]] = []
+
+    @property
+    def keys(self) -> int:
+        return len(self._sorted_keys) + len(self._pending)
+
+    def add(self, key: str, slot: int):
+        starts = [0] + [i + 1 for i, char in enumerate(key) if char == " "]
+        for start in starts:
+            node = self._root
+            for char in key[start:]:
+                node = node.setdefault(char, {})
+            node.setdefault(self._END, []).append(slot)
+            self._pending.append((key[start:], slot))
+
+    def settle(self):
+        """Moves keys added since the last lookup into the sorted arrays."""
+        if not self._pending:
+            return
+        np = self._np
+        self._pending.sort()
+        keys = np.array([key for key, _ in self._pending])
+        slots = np.array([slot for _, slot in self._pending], dtype=np.int64)
+        self._pending = []
+        if len(keys) > _RESORT_THRESHOLD:
+            keys = np.concatenate((self._sorted_keys, keys))
+            slots = np.concatenate((self._sorted_slots, slots))
+            order = np.argsort(keys, kind="stable")
+            self._sorted_keys, self._sorted_slots = keys[order], slots[order]
+        else:
+            if keys.dtype.itemsize > self._sorted_keys.dtype.itemsize:
+                # Fixed-width strings: widen first or insert would truncate
+                self._sorted_keys = self._sorted_keys.astype(keys.dtype)
+            at = np.searchsorted(self._sorted_keys, keys)
+            self._sorted_keys = np.insert(self._sorted_keys, at, keys)
+            self._sorted_slots = np.insert(self._sorted_slots, at, slots)
+
+    def prefix(self, prefix: str):
+        """Slots (an array) with a word sequence starting with `prefix`; a slot may repeat."""
+        self.settle()
+        low, high = self._np.searchsorted(self._sorted_keys, [prefix, prefix + "\U0010ffff"])
+        return self._sorted_slots[low:high]
+
+    def fuzzy(self, term: str, max_distance: int) -> dict[int, int]:
+        """
+        Slots within `max_distance` edits (Levenshtein) of `term`, with their
+        distance. Walks the trie once, keeping one DP row per node and
+        pruning branches whose row minimum already exceeds the limit.
+        """
+        found: dict[int, int] = {}
+        first_row = list(range(len(term) + 1))
+        stack = [(child, char, first_row) for char, child in self._root.items() if char != self._END]
+        while stack:
+            node, char, previous = stack.pop()
+            row = [previous[0] + 1]
+            for column in range(1, len(term) + 1):
+                row.append(min(
+                    row[column - 1] + 1,
+                    previous[column] + 1,
+                    previous[column - 1] + (term[column - 1] != char),
+                ))
+            if row[-1] <= max_distance and self._END in node:
+                for slot in node[self._END]:
+                    if row[-1] < found.get(slot, max_distance + 1):
+                        found[slot] = row[-1]
+            if min(row) <= max_distance:
+                stack.extend((child, c, row) for c, child in node.items() if c != self._END)
+        return found
+
+class SortedColumn:
+    """
+    Slots ordered by a sort key tuple, one entry per slot. Writes only
+    record the new key; settle() (or the next read) moves the changed slots
+    with bisect, or rebuilds the list when many changed (the initial load).
+    """
+
+    def __init__(self):
+        self._entries: list[tuple] = []
+        self._keys: dict[int, tuple] = {}
+        self._placed: dict[int, tuple] = {}
+        self._changed: set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def set(self, slot: int, key: tuple | None):
+        """Moves a slot to `key`; None removes it."""
+        if key is None:
+            self._keys.pop(slot, None)
+        else:
+            self._keys[slot] = key
+        self._changed.add(slot)
+
+    def settle(self):
+        if not self._changed:
+            return
+        if len(self._changed) > _RESORT_THRESHOLD:
+            self._entries = sorted(key + (slot,) for slot, key in self._keys.items())
+            self._placed = dict(self._keys)
+        else:
+            for slot in self._changed:
+                old = self._placed.pop(slot, None)
+                if old is not None:
+                    del self._entries[bisect_left(self._entries, old + (slot,))]
+                key = self._keys.get(slot)
+                if key is not None:
+                    self._placed[slot] = key
+                    insort(self._entries, key + (slot,))
+        self._changed.clear()
+
+    def first(self, limit: int) -> list[int]:
+        self.settle()
+        return [entry[-1] for entry in self._entries[:limit]]
+
+    def last(self, limit: int) -> list[int]:
+        self.settle()
+        return [entry[-1] for entry in reversed(self._entries[-limit:])] if limit else []
+
+def _number(value, kind=float):
+    try:
+        return None if value is None else kind(value)
+    except (TypeError, ValueError):
+        return None
+
+class KeywordIndex:
+    """
+    Latest seo_signals row per keyword, fed by the seo_signals RowFeed.
+
+    Rows arrive in id order, so a keyword seen again is a newer measurement:
+    it replaces the stored row and the previous position is kept to report
+    rank changes. A trie answers exact, prefix and fuzzy lookups; sorted
+    columns answer "top by competition / rank change" without a scan.
+    Results are the stored rows, so nothing is fetched per request.
+
+    The feed calls add_rows and settle from a worker thread; they and the
+    lookups that walk the trie or sorted views hold `_lock`. The trie (and
+    with it NumPy) is only created once the first rows arrive.
+    """
+
+    COLUMNS = ("keyword", "position", "volume", "cpc", "competition")
+
+    def __init__(self):
+        self._slots: dict[str, int] = {}
+        self.rows: list[dict] = []
+        self.previous_positions: list[int | None] = []
+        self._volumes = array("d")
+        self._trie: KeywordTrie | None = None
+        self._by_competition = SortedColumn()
+        self._by_change = SortedColumn()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def add_rows(self, rows: list[dict]):
+        with self._lock:
+            if self._trie is None:
+                self._trie = KeywordTrie()
+            self._add_rows(rows)
+
+    def _add_rows(self, rows: list[dict]):
+        for row in rows:
+            key = normalize_keyword(row.get("keyword"))
+            if not key:
+                continue
+            slot = self._slots.get(key)
+            if slot is None:
+                slot = self._slots[key] = len(self.rows)
+                self.rows.append(row)
+                self.previous_positions.append(None)
+                self._volumes.append(0.0)
+                self._trie.add(key, slot)
+            else:
+                before = _number(self.rows[slot].get("position"), int)
+                if before is not None:
+                    self.previous_positions[slot] = before
+                self.rows[slot] = row
+            self._reindex(slot)
+
+    def _reindex(self, slot: int):
+        row = self.rows[slot]
+        volume = self._volumes[slot] = _number(row.get("volume")) or 0.0
+        competition = _number(row.get("competition"))
+        change = self.position_change(slot)
+        self._by_competition.set(slot, None if competition is None else (competition, -volume))
+        self._by_change.set(slot, None if not change else (-change, -volume))
+
+    def settle(self):
+        """Brings the sorted views up to date; the feed calls it after each pull."""
+        with self._lock:
+            if self._trie is not None:
+                self._trie.settle()
+            self._by_competition.settle()
+            self._by_change.settle()
+
+    def position_change(self, slot: int) -> int | None:
+        """Places gained since the previous measurement (negative: lost)."""
+        before = self.previous_positions[slot]
+        now = _number(self.rows[slot].get("position"), int)
+        return None if before is None or now is None else before - now
+
+    def exact(self, keyword: str) -> int | None:
+        return self._slots.get(normalize_keyword(keyword))
+
+    def prefix(self, prefix: str, limit: int) -> tuple[list[int], int]:
+        """Highest-volume keywords with a word starting with `prefix`, and how many matched."""
+        if self._trie is None:
+            return [], 0
+        np = self._trie._np
+        with self._lock:
+            slots = np.unique(self._trie.prefix(normalize_keyword(prefix)))
+            volumes = np.frombuffer(self._volumes, dtype=np.float64)[slots]
+        total = len(slots)
+        if total > limit:
+            top = np.argpartition(-volumes, limit - 1)[:limit]
+            slots, volumes = slots[top], volumes[top]
+        order = np.lexsort((slots, -volumes))
+        return slots[order].tolist(), total
+
+    def fuzzy(self, term: str, limit: int, max_distance: int | None = None) -> list[tuple[int, int]]:
+        """(slot, distance) of the closest keywords, nearest then highest volume first."""
+        term = normalize_keyword(term)
+        distance = max_typos(term) if max_distance is None else max_distance
+        if not distance or self._trie is None:
+            return []
+        with self._lock:
+            found = self._trie.fuzzy(term, distance)
+            ranked = heapq.nsmallest(limit, found, key=lambda slot: (found[slot], -self._volumes[slot], slot))
+        return [(slot, found[slot]) for slot in ranked]
+
+    def most_competitive(self, limit: int) -> list[int]:
+        with self._lock:
+            return self._by_competition.last(limit)
+
+    def least_competitive(self, limit: int) -> list[int]:
+        """Lowest competition first, higher volume first on ties (the easiest wins)."""
+        with self._lock:
+            return self._by_competition.first(limit)
+
+    def improved(self, limit: int) -> list[int]:
+        with self._lock:
+            return [slot for slot in self._by_change.first(limit) if self.position_change(slot) > 0]
+
+    def dropped(self, limit: int) -> list[int]:
+        with self._lock:
+            return [slot for slot in self._by_change.last(limit) if self.position_change(slot) < 0]
+
+    def stats(self) -> dict:
+        return {
+            "enabled": SEO_KEYWORD_INDEX_ENABLED,
+            "keywords": len(self),
+            "trie_keys": self._trie.keys if self._trie is not None else 0,
+            "with_rank_change": len(self._by_change),
+        }
+
+seo_keyword_index = KeywordIndex()
+if SEO_KEYWORD_INDEX_ENABLED:
+    feed_for("seo_signals").subscribe(
+        "seo_keywords", seo_keyword_index.add_rows, KeywordIndex.COLUMNS,
+        after_pull=seo_keyword_index.settle, threaded=True,
+    )
@@ -0,0 +1,302 @@
+import base64
+import binascii
+import json
+import logging
+import os
+import re
+from array import array
+from collections import OrderedDict
+from typing import NamedTuple
+
+from .arabic import normalize_arabic
+from .formatters import MENTION_FORMATTER, SENTIMENT_LABELS
+from .mentions_tool import fetch_mentions_summary
+from .row_feed import feed_for
+from .table_reader import SUMMARY_PAGE_SIZE, SummaryPage, fetch_rows_by_id
+from .telemetry import span, traced
+from .text_index import STOPWORDS, InvertedIndex
+
+logger = logging.getLogger(__name__)
+
+MENTION_SEARCH_ENABLED = os.getenv("MENTION_SEARCH_ENABLED", "true").lower() in ("1", "true", "yes")
+MENTION_SEARCH_RESULTS = int(os.getenv("MENTION_SEARCH_RESULTS", str(SUMMARY_PAGE_SIZE)))
+# Recent result lists kept until the index next grows
+MENTION_SEARCH_CACHE_SIZE = int(os.getenv("MENTION_SEARCH_CACHE_SIZE", "256"))
+
+# Phrases that introduce the search terms; whatever follows the last one is the query
+_LEAD_INS = [normalize_arabic(p) for p in (
+    "what are people saying about", "what do people say about", "people saying about", "saying about",
+    "talking about", "mentions of", "mentions about", "mentions mentioning", "mentions containing",
+    "find mentions", "search mentions for", "search for",
+    "وش الناس يقولون عن", "وش يقولون عن", "ايش يقولون عن", "يقولون عن", "يتكلمون عن", "كلام عن",
+    "ابحث في الذكر عن", "ابحث عن", "اشارات عن",
+)]
+
+_SENTIMENT_WORDS = {
+    "positive": "positive", "ايجابي": "positive", "ايجابيه": "positive", "الايجابي": "positive",
+    "الايجابيه": "positive", "negative": "negative", "سلبي": "negative", "سلبيه": "negative",
+    "السلبي": "negative", "السلبيه": "negative", "neutral": "neutral", "محايد": "neutral",
+    "محايده": "neutral", "المحايد": "neutral",
+}
+_PLATFORM_WORDS = {
+    "twitter": "twitter", "تويتر": "twitter", "instagram": "instagram", "انستقرام": "instagram",
+    "انستغرام": "instagram", "انستا": "instagram", "tiktok": "tiktok", "تيكتوك": "tiktok",
+    "تيك توك": "tiktok", "facebook": "facebook", "فيسبوك": "facebook", "فيس بوك": "facebook",
+    "linkedin": "linkedin", "لينكدان": "linkedin", "youtube": "youtube", "يوتيوب": "youtube",
+    "snapchat": "snapchat", "سناب": "snapchat",
+}
+# The brand itself matches nearly every mention, so it isn't a useful term
+_NOISE_WORDS = {normalize_arabic(w) for w in (
+    "almarai", "المراعي", "مراعي", "mentions", "mention", "ذكر", "الذكر", "اشارات", "الاشارات",
+    "comments", "تعليقات", "people", "الناس", "please",
+)}
+# Time words: a period is the analytics intent's job, not a search term
+_PERIOD_WORDS = {normalize_arabic(w) for w in (
+    "today", "yesterday", "week", "weeks", "weekly", "month", "months", "monthly", "year", "last", "past",
+    "recent", "recently", "اليوم", "هاليوم", "امس", "البارحة", "اسبوع", "الاسبوع", "هالاسبوع", "الاسبوعين",
+    "شهر", "الشهر", "هالشهر", "سنة", "السنة", "هالسنة", "الفترة", "هالفترة", "الماضي", "الماضية",
+    "اخر", "الاخير", "الاخيرة", "مؤخرا",
+)}
+_WORD_FILTERS = re.compile(
+    r"\b(?:" + "|".join(sorted(map(re.escape, {**_SENTIMENT_WORDS, **_PLATFORM_WORDS}), key=len, reverse=True)) + r")\b"
+)
+
+def extract_search_args(message: str) -> tuple[str, str | None, str | None]:
+    """
+    (query, sentiment, platform) from a search message, e.g.
+    "negative mentions of price on twitter" -> ("price", "negative", "twitter").
+    A quoted part is kept as a phrase.
+    """
+    text = normalize_arabic(message)
+    sentiment = platform = None
+    for match in _WORD_FILTERS.finditer(text):
+        word = match.group()
+        sentiment = _SENTIMENT_WORDS.get(word, sentiment)
+        platform = _PLATFORM_WORDS.get(word, platform)
+
+    quoted = re.search(r"[\"“«](.+?)[\"”»]", text)
+    if quoted:
+        return f'"{quoted.group(1)}"', sentiment, platform
+
+    cut = max((text.rfind(p) + len(p) for p in _LEAD_INS if p in text), default=0)
+    rest = _WORD_FILTERS.sub(" ", text[cut:])
+    words = [w for w in re.findall(r"\w+", rest)
+             if w not in _NOISE_WORDS and w not in _PERIOD_WORDS and w not in STOPWORDS]
+    return " ".join(words), sentiment, platform
+
+class SearchHits(NamedTuple):
+    ids: list
+    total: int                  # matches before paging
+    last: tuple | None = None   # (score, id) of the last hit: where the next page starts
+
+class MentionIndex:
+    """
+    Full-text index over mentions.mention_text, fed by the mentions RowFeed.
+    Keeps the row id, sentiment and platform of each indexed mention so
+    results can be filtered without touching the database; the rows shown
+    are fetched by id.
+
+    Pages continue after the (score, id) of the previous page's last hit.
+    Scores shift a little as the index grows, so a page fetched after new
+    mentions arrive may repeat or skip a borderline hit.
+    """
+
+    COLUMNS = ("mention_text", "sentiment", "platform")
+
+    def __init__(self):
+        self.index: InvertedIndex | None = None
+        self._ids: list = []
+        self._docs: dict = {}
+        self._sentiments = array("H")
+        self._platforms = array("H")
+        self._codes: dict[str, dict[str, int]] = {"sentiment": {}, "platform": {}}
+        self._results: OrderedDict[tuple, tuple[list, int]] = OrderedDict()
+        self._results_size = 0
+
+    def _code(self, kind: str, value) -> int:
+        codes = self._codes[kind]
+        key = str(value).lower() if value is not None else ""
+        if key not in codes:
+            codes[key] = len(codes)
+        return codes[key]
+
+    def add_rows(self, rows: list[dict]):
+        if self.index is None:
+            self.index = InvertedIndex()
+        for row in rows:
+            if row["id"] in self._docs:
+                continue
+            self._docs[row["id"]] = self.index.add(row.get("mention_text") or "")
+            self._ids.append(row["id"])
+            self._sentiments.append(self._code("sentiment", row.get("sentiment")))
+            self._platforms.append(self._code("platform", row.get("platform")))
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def _filters(self, sentiment: str | None, platform: str | None) -> list | None:
+        """(codes array, wanted code) per active filter; None if a value was never seen."""
+        np = self.index._np
+        filters = []
+        for kind, value, codes in (("sentiment", sentiment, self._sentiments), ("platform", platform, self._platforms)):
+            if value is None:
+                continue
+            code = self._codes[kind].get(value)
+            if code is None:
+                return None
+            filters.append((np.frombuffer(codes, dtype=np.uint16), code))
+        return filters
+
+    @staticmethod
+    def _matching(filters: list):
+        def keep(docs):
+            result = None
+            for codes, code in filters:
+                match = codes[docs] == code
+                result = match if result is None else result & match
+            return result
+        return keep
+
+    def search(self, query: str, sentiment: str | None = None, platform: str | None = None,
+               limit: int = MENTION_SEARCH_RESULTS, after: tuple | None = None) -> SearchHits:
+        """
+        Ids of the best matches (newest first for filter-only queries) and how
+        many matched; `after` is a previous page's SearchHits.last.
+        """
+        if not len(self):
+            return SearchHits([], 0)
+        if self._results_size != len(self):
+            self._results.clear()
+            self._results_size = len(self)
+        key = (query, sentiment, platform, limit, after)
+        if key in self._results:
+            self._results.move_to_end(key)
+            return self._results[key]
+        found = self._search(query, sentiment, platform, limit, after)
+        self._results[key] = found
+        if len(self._results) > MENTION_SEARCH_CACHE_SIZE:
+            self._results.popitem(last=False)
+        return found
+
+    def _search(self, query: str, sentiment: str | None, platform: str | None, limit: int,
+                after: tuple | None = None) -> SearchHits:
+        np = self.index._np
+        filters = self._filters(sentiment, platform)
+        if filters is None:
+            return SearchHits([], 0)
+        after_doc = None
+        if after is not None:
+            after_doc = self._docs.get(after[1])
+            if after_doc is None:
+                return SearchHits([], 0)
+
+        if not query:
+            # Filters only: the newest matching mentions
+            everything = np.arange(len(self))
+            matches = everything[self._matching(filters)(everything)] if filters else everything
+            page = matches[::-1]
+            if after_doc is not None:
+                page = page[page < after_doc]
+            ids = [self._ids[i] for i in page[:limit]]
+            return SearchHits(ids, len(matches), (None, ids[-1]) if ids else None)
+
+        phrase = query.startswith('"') and query.endswith('"')
+        mask = self._matching(filters) if filters else None
+        result = self.index.search(query.strip('"'), limit=limit, mask=mask, phrase=phrase,
+                                   after=None if after is None else (after[0], after_doc))
+        ids = [self._ids[i] for i in result.docs]
+        return SearchHits(ids, result.total, (float(result.scores[-1]), ids[-1]) if ids else None)
+
+    def stats(self) -> dict:
+        return {"enabled": MENTION_SEARCH_ENABLED, **(self.index.stats() if self.index else {"documents": 0})}
+
+mention_index = MentionIndex()
+if MENTION_SEARCH_ENABLED:
+    feed_for("mentions").subscribe("mention_search", mention_index.add_rows, MentionIndex.COLUMNS)
+
+def _describe(query: str, sentiment: str | None, platform: str | None) -> str:
+    terms = query.strip('"')
+    parts = [f"«{terms}»"] if terms else []
+    if sentiment:
+        parts.append(SENTIMENT_LABELS.get(sentiment, sentiment))
+    if platform:
+        parts.append(platform)
+    return " | ".join(parts)
+
+def search_cursor(query: str, sentiment: str | None, platform: str | None, last: tuple | None = None) -> str:
+    """
+    Opaque "show more" cursor of a search: the question's arguments plus the
+    (score, id) of the last hit shown; no position means "after page one".
+    """
+    payload = json.dumps([query, sentiment, platform, last], ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def _decode_search_cursor(cursor: str) -> tuple[str, str | None, str | None, tuple | None]:
+    try:
+        query, sentiment, platform, last = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise ValueError(f"Invalid search cursor: {cursor!r}") from e
+    return query, sentiment, platform, tuple(last) if last else None
+
+def search_page_start(query: str, sentiment: str | None = None, platform: str | None = None) -> tuple[str, str | None]:
+    """
+    (intent, cursor) that "show more" continues from after this search. An
+    empty search is answered with the mentions summary, so it pages like one.
+    """
+    if not query and not sentiment and not platform:
+        return "mentions", None
+    return "mention_search", search_cursor(query, sentiment, platform)
+
+async def _search_page(query: str, sentiment: str | None, platform: str | None,
+                       after: tuple | None = None) -> SummaryPage:
+    if not MENTION_SEARCH_ENABLED:
+        return SummaryPage("ℹ️ البحث في ذكر العلامة التجارية غير مفعّل حالياً.")
+    if not feed_for("mentions").ready:
+        return SummaryPage("⏳ فهرس البحث في الإشارات قيد البناء، حاول بعد قليل.")
+
+    with span("search"):
+        hits = mention_index.search(query, sentiment, platform, after=after)
+    label = _describe(query, sentiment, platform)
+    if not hits.ids:
+        if after:
+            return SummaryPage(f"📭 لا يوجد المزيد من نتائج البحث عن {label}.")
+        return SummaryPage(f"📭 لا توجد إشارات تطابق {label}.")
+    try:
+        rows = await fetch_rows_by_id("mentions", hits.ids)
+    except Exception as e:
+        logger.error("Search rows fetch failed", extra={"table": "mentions", "error": str(e)})
+        return SummaryPage(f"❌ فشل في جلب نتائج البحث:\n🔥 {e}")
+
+    parts = [f"🔎 المزيد من نتائج البحث عن {label}:\n" if after else f"🔎 نتائج البحث عن {label} ({hits.total:,} إشارة):\n"]
+    with span("format"):
+        parts += MENTION_FORMATTER.format_rows(rows)
+    # A short page is the last one
+    next_cursor = search_cursor(query, sentiment, platform, hits.last) if len(hits.ids) == MENTION_SEARCH_RESULTS else None
+    return SummaryPage("\n".join(parts), next_cursor)
+
+@traced("summary", intent="mention_search")
+async def search_mentions(query: str, sentiment: str | None = None, platform: str | None = None) -> str:
+    """Ranked (BM25) mentions matching the query, optionally filtered by sentiment and platform."""
+    if not query and not sentiment and not platform:
+        return await fetch_mentions_summary()
+    return (await _search_page(query, sentiment, platform)).text
+
+@traced("summary", intent="mention_search")
+async def fetch_search_page(cursor: str | None = None) -> SummaryPage:
+    """
+    The search page after `cursor` (see search_cursor), for "show more".
+    Without a cursor there is no search to continue.
+    """
+    if cursor is None:
+        return SummaryPage("📭 لا يوجد بحث سابق لعرض المزيد منه.")
+    try:
+        query, sentiment, platform, last = _decode_search_cursor(cursor)
+    except ValueError:
+        return SummaryPage("📭 لا يوجد بحث سابق لعرض المزيد منه.")
+    if last is None:
+        # Continue after page one, which the search answer showed
+        first = mention_index.search(query, sentiment, platform)
+        if len(first.ids) < MENTION_SEARCH_RESULTS:
+            return SummaryPage(f"📭 لا يوجد المزيد من نتائج البحث عن {_describe(query, sentiment, platform)}.")
+        last = first.last
+    return await _search_page(query, sentiment, platform, last)
@@ -1,40 +1,49 @@
-from datetime import datetime
-from .supabase_client import supabase
+import logging
 
-def debug_fetch_latest_mention():
+from .formatters import MENTION_FORMATTER
+from .summary_cache import summary_cache
+from .schema_registry import SchemaUnavailableError
+from .table_reader import SummaryPage, fetch_rows_page
+from .telemetry import span, traced
+
+logger = logging.getLogger(__name__)
+
+# Preferred order columns, newest first; "id" is the fallback
+MENTIONS_ORDER_COLUMNS = ("published_date", "collected_date", "created_at", "id")
+
+async def _build_mentions_page(cursor: str | None = None) -> SummaryPage:
+    """Loads and formats one page of mentions. Raises on failure so errors are never cached."""
+    page = await fetch_rows_page("mentions", MENTIONS_ORDER_COLUMNS, cursor=cursor)
+
+    if not page.rows:
+        if cursor:
+            return SummaryPage("📭 لا يوجد المزيد من الإشارات.")
+        return SummaryPage("📭 لم يتم العثور على أي ذكر حديث للعلامة التجارية.")
+
+    summary_parts = ["📊 المزيد من ذكر العلامة التجارية:\n" if cursor else "📊 آخر تحليل لذكر العلامة التجارية:\n"]
+    with span("format"):
+        summary_parts += MENTION_FORMATTER.format_rows(page.rows)
+
+    return SummaryPage("\n".join(summary_parts), page.next_cursor)
+
+@traced("summary", intent="mentions")
+async def fetch_mentions_page(cursor: str | None = None) -> SummaryPage:
     """
-    Debug function to check Supabase connection and mentions table structure.
+    One page of mentions; pass the previous page's next_cursor for "show more".
+    The first page is cached and shared with fetch_mentions_summary.
     """
     try:
-        response = supabase.table("mentions").select("*").limit(1).execute()
-        
-        print("🔍 DEBUG: Supabase Response")
-        print(f"Status: {response.status_code if hasattr(response, 'status_code') else 'N/A'}")
-        
-        if response.data:
-            mention = response.data[0]
-            print("✅ Found mention data:")
-            print(f"Available columns: {list(mention.keys())}")
-            return {
-                "success": True,
-                "data": mention,
-                "columns": list(mention.keys())
-            }
-        else:
-            print("⚠️ No mentions found in database")
-            return {
-                "success": False,
-                "error": "No mentions found in database"
-            }
+        if cursor is None:
+            return await summary_cache.get_or_load("mentions", _build_mentions_page)
+        return await _build_mentions_page(cursor)
+    except SchemaUnavailableError as e:
+        return SummaryPage(f"⚠️ خطأ في الاتصال: {e}")
     except Exception as e:
-        error_msg = f"🔥 Supabase Error: {str(e)}"
-        print(error_msg)
-        return {
-            "success": False,
-            "error": error_msg
-        }
+        error_msg = f"🔥 Error fetching mentions: {str(e)}"
+        logger.error("Summary fetch failed", extra={"table": "mentions", "error": str(e)})
+        return SummaryPage(f"❌ فشل في جلب البيانات:\n{error_msg}")
 
-def fetch_mentions_summary() -> str:
+async def fetch_mentions_summary() -> str:
     """
     Fetches latest brand mentions with detailed error reporting.
     Schema:
@@ -46,69 +55,4 @@ def fetch_mentions_summary() -> str:
     - engagement: int
     - published_date: date
     """
-    try:
-        # First, run debug check
-        debug_result = debug_fetch_latest_mention()
-        if not debug_result["success"]:
-            return f"⚠️ خطأ في الاتصال: {debug_result['error']}"
-
-        # If debug successful, try actual fetch with correct columns
-        available_columns = debug_result.get("columns", [])
-        
-        # Determine which order column to use
-        order_column = (
-            "published_date" if "published_date" in available_columns
-            else "collected_date" if "collected_date" in available_columns
-            else "created_at" if "created_at" in available_columns
-            else "id"  # fallback to id if no date columns
-        )
-
-        result = supabase.table("mentions") \
-            .select(",".join(available_columns)) \
-            .order(order_column, desc=True) \
-            .limit(5) \
-            .execute()
-
-        if not result.data:
-            return "📭 لم يتم العثور على أي ذكر حديث للعلامة التجارية."
-
-        mentions = result.data
-        summary_parts = ["📊 آخر تحليل لذكر العلامة التجارية:\n"]
-
-        for mention in mentions:
-            try:
-                # Try to get date from any available date column
-                date_str = (
-                    mention.get("published_date") or 
-                    mention.get("collected_date") or 
-                    mention.get("created_at", "N/A")
-                )
-                date = datetime.fromisoformat(date_str).strftime("%Y-%m-%d") if date_str != "N/A" else "N/A"
-                
-                sentiment = {
-                    "positive": "✨ إيجابي",
-                    "negative": "⚠️ سلبي",
-                    "neutral": "📝 محايد"
-                }.get(mention.get("sentiment"), "❓ غير محدد")
-
-                sentiment_score = mention.get("sentiment_score", 0)
-                sentiment_emoji = "🟢" if sentiment_score > 0.3 else "🔴" if sentiment_score < -0.3 else "⚪"
-
-                summary_parts.append(
-                    f"• {date} | {sentiment} {sentiment_emoji}\n"
-                    f"  - المنصة: {mention.get('platform', 'غير معروف')}\n"
-                    f"  - الكاتب: {mention.get('author', 'مجهول')}\n"
-                    f"  - المحتوى: {mention.get('mention_text', '[لا يوجد نص]')[:100]}...\n"
-                    f"  - التفاعل: {mention.get('engagement', '0')} 👥\n"
-                )
-            except Exception as mention_e:
-                print(f"🔥 Error processing mention: {mention_e}")
-                print(f"Mention data: {mention}")
-                summary_parts.append("⚠️ خطأ في معالجة هذا المنشور")
-
-        return "\n".join(summary_parts)
-
-    except Exception as e:
-        error_msg = f"🔥 Error fetching mentions: {str(e)}"
-        print(error_msg)
-        return f"❌ فشل في جلب البيانات:\n{error_msg}"
\ No newline at end of file
+    return (await fetch_mentions_page()).text
\ No newline at end of file
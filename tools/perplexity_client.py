@@ -0,0 +1,278 @@
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Iterator
+
+from dotenv import load_dotenv
+
+from .telemetry import observe_stage, span
+
+if TYPE_CHECKING:
+    import requests
+
+load_dotenv()
+
+PERPLEXITY_KEY = os.getenv("PERPLEXITY_API_KEY")
+PERPLEXITY_API_URL = os.getenv("PERPLEXITY_API_URL", "https://api.perplexity.ai/chat/completions")
+PERPLEXITY_MODEL = os.getenv("PERPLEXITY_MODEL", "sonar-pro")
+
+PERPLEXITY_CONNECT_TIMEOUT = float(os.getenv("PERPLEXITY_CONNECT_TIMEOUT", "3.05"))
+PERPLEXITY_READ_TIMEOUT = float(os.getenv("PERPLEXITY_READ_TIMEOUT", "30"))
+PERPLEXITY_MAX_RETRIES = int(os.getenv("PERPLEXITY_MAX_RETRIES", "2"))
+PERPLEXITY_BACKOFF_BASE = float(os.getenv("PERPLEXITY_BACKOFF_BASE", "0.5"))
+PERPLEXITY_BACKOFF_MAX = float(os.getenv("PERPLEXITY_BACKOFF_MAX", "4"))
+PERPLEXITY_BREAKER_FAILURES = int(os.getenv("PERPLEXITY_BREAKER_FAILURES", "5"))
+PERPLEXITY_BREAKER_RESET_SECONDS = float(os.getenv("PERPLEXITY_BREAKER_RESET_SECONDS", "30"))
+PERPLEXITY_MAX_CONCURRENCY = int(os.getenv("PERPLEXITY_MAX_CONCURRENCY", "8"))
+PERPLEXITY_QUEUE_TIMEOUT = float(os.getenv("PERPLEXITY_QUEUE_TIMEOUT", "10"))
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+class PerplexityError(Exception):
+    """Perplexity call failed after retries (or was rejected before sending)."""
+
+class CircuitOpenError(PerplexityError):
+    """Upstream marked as down; failing fast until the breaker resets."""
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive failures;
+    open -> half-open after `reset_seconds`, letting a single trial call through;
+    the trial's outcome closes or re-opens the breaker. A trial that ends
+    without an outcome (an unexpected error) calls `end_trial`, or the
+    breaker would stay half-open with no call allowed through.
+    """
+
+    def __init__(self, failure_threshold: int, reset_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_running = False
+        self._trial_thread: int | None = None
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state = "half_open"
+            if self.state == "half_open" and not self._trial_running:
+                self._trial_running = True
+                self._trial_thread = threading.get_ident()
+                return True
+            return False
+
+    def end_trial(self):
+        """Frees the half-open trial slot if this thread holds it; a no-op otherwise."""
+        with self._lock:
+            if self._trial_running and self._trial_thread == threading.get_ident():
+                self._trial_running = False
+                self._trial_thread = None
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+            self._trial_running = False
+            self._trial_thread = None
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+            self._trial_running = False
+            self._trial_thread = None
+
+class PerplexityClient:
+    """
+    Pooled, bounded client for the Perplexity chat completions API.
+
+    - One requests.Session (keep-alive pool) per process, created on first use.
+    - Separate connect/read timeouts on every request.
+    - Retries on connection errors, timeouts, 429 and 5xx with full-jitter
+      exponential backoff (Retry-After is honoured, capped at the max backoff).
+    - A circuit breaker fails fast while the upstream is down.
+    - A semaphore caps concurrent calls; callers beyond the cap queue for at
+      most PERPLEXITY_QUEUE_TIMEOUT seconds.
+    """
+
+    def __init__(self):
+        self._session: "requests.Session | None" = None
+        self.breaker = CircuitBreaker(PERPLEXITY_BREAKER_FAILURES, PERPLEXITY_BREAKER_RESET_SECONDS)
+        self._slots = threading.BoundedSemaphore(PERPLEXITY_MAX_CONCURRENCY)
+        self._lock = threading.Lock()
+        self._stats = {"calls": 0, "successes": 0, "failures": 0, "retries": 0,
+                       "rejected_open": 0, "rejected_busy": 0,
+                       "in_flight": 0, "waiting": 0, "max_waiting": 0}
+
+    @property
+    def session(self) -> "requests.Session":
+        # requests (urllib3, charset_normalizer, idna) is imported here rather
+        # than at startup
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    import requests
+                    from requests.adapters import HTTPAdapter
+
+                    session = requests.Session()
+                    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=PERPLEXITY_MAX_CONCURRENCY)
+                    session.mount("https://", adapter)
+                    session.mount("http://", adapter)
+                    session.headers.update({
+                        "Authorization": f"Bearer {PERPLEXITY_KEY}",
+                        "Content-Type": "application/json",
+                    })
+                    self._session = session
+        return self._session
+
+    def _count(self, key: str, delta: int = 1):
+        with self._lock:
+            self._stats[key] += delta
+            if key == "waiting" and self._stats["waiting"] > self._stats["max_waiting"]:
+                self._stats["max_waiting"] = self._stats["waiting"]
+
+    @contextmanager
+    def _slot(self):
+        self._count("waiting")
+        try:
+            acquired = self._slots.acquire(timeout=PERPLEXITY_QUEUE_TIMEOUT)
+        finally:
+            self._count("waiting", -1)
+        if not acquired:
+            self._count("rejected_busy")
+            raise PerplexityError("Too many concurrent Perplexity calls")
+        self._count("in_flight")
+        try:
+            yield
+        finally:
+            self._count("in_flight", -1)
+            self._slots.release()
+
+    def _backoff(self, attempt: int, response: "requests.Response | None") -> float:
+        retry_after = response.headers.get("Retry-After") if response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), PERPLEXITY_BACKOFF_MAX)
+            except ValueError:
+                pass
+        return random.uniform(0, min(PERPLEXITY_BACKOFF_MAX, PERPLEXITY_BACKOFF_BASE * 2 ** attempt))
+
+    def _post(self, payload: dict, stream: bool = False) -> "requests.Response":
+        """POSTs with retries and breaker bookkeeping. Caller must hold a slot."""
+        import requests
+
+        last_error: Exception | None = None
+        for attempt in range(PERPLEXITY_MAX_RETRIES + 1):
+            if not self.breaker.allow():
+                self._count("rejected_open")
+                raise CircuitOpenError("Perplexity circuit is open")
+
+            response = None
+            try:
+                response = self.session.post(
+                    PERPLEXITY_API_URL,
+                    json=payload,
+                    stream=stream,
+                    timeout=(PERPLEXITY_CONNECT_TIMEOUT, PERPLEXITY_READ_TIMEOUT),
+                )
+                if response.status_code not in RETRYABLE_STATUS:
+                    response.raise_for_status()
+                    self.breaker.record_success()
+                    return response
+                last_error = PerplexityError(f"Perplexity returned {response.status_code}")
+            except (requests.ConnectionError, requests.Timeout) as e:
+                last_error = e
+            except requests.HTTPError as e:
+                # 4xx other than 429: our request is wrong, retrying won't help
+                self.breaker.record_success()
+                raise PerplexityError(str(e)) from e
+            except BaseException:
+                # Anything else gives no verdict on the upstream; free the trial slot
+                self.breaker.end_trial()
+                raise
+
+            self.breaker.record_failure()
+            if attempt < PERPLEXITY_MAX_RETRIES:
+                self._count("retries")
+                delay = self._backoff(attempt, response)
+                if response is not None:
+                    response.close()
+                time.sleep(delay)
+
+        raise PerplexityError(f"Perplexity failed after retries: {last_error}") from last_error
+
+    def _payload(self, query: str, temperature: float, stream: bool = False) -> dict:
+        payload = {
+            "model": PERPLEXITY_MODEL,
+            "messages": [
+                {"role": "user", "content": query}
+            ],
+            "temperature": temperature
+        }
+        if stream:
+            payload["stream"] = True
+        return payload
+
+    def complete(self, query: str, temperature: float = 0.7) -> str:
+        """Returns the full completion text for a single user message."""
+        payload = self._payload(query, temperature)
+        self._count("calls")
+        try:
+            with span("perplexity"), self._slot():
+                response = self._post(payload)
+                content = response.json()["choices"][0]["message"]["content"]
+        except Exception:
+            self._count("failures")
+            raise
+        self._count("successes")
+        return content
+
+    def stream(self, query: str, temperature: float = 0.7) -> Iterator[str]:
+        """
+        Yields completion text deltas as Perplexity streams them (SSE lines).
+        The concurrency slot is held until the stream is exhausted or closed.
+        Retries only happen before the first byte; a stream cut mid-way raises.
+        """
+        payload = self._payload(query, temperature, stream=True)
+        self._count("calls")
+        started = time.perf_counter()
+        try:
+            with self._slot():
+                response = self._post(payload, stream=True)
+                # Time to first byte; a span can't be held across the generator's yields
+                observe_stage("perplexity_stream", time.perf_counter() - started)
+                with response:
+                    # SSE is always UTF-8; text/event-stream carries no charset to go by
+                    for raw in response.iter_lines():
+                        line = raw.decode("utf-8")
+                        if not line.startswith("data:"):
+                            continue
+                        data = line[len("data:"):].strip()
+                        if data == "[DONE]":
+                            break
+                        delta = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                        if delta:
+                            yield delta
+        except GeneratorExit:
+            raise
+        except Exception:
+            self._count("failures")
+            raise
+        self._count("successes")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self._stats, "breaker": self.breaker.state,
+                    "max_concurrency": PERPLEXITY_MAX_CONCURRENCY}
+
+# Shared by every Perplexity caller in the process
+perplexity_client = PerplexityClient()
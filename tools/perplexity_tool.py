@@ -1,31 +1,60 @@
-import requests
-import os
-from dotenv import load_dotenv
-from langchain.tools import tool
+import logging
+from typing import Iterator
 
-load_dotenv()
-PERPLEXITY_KEY = os.getenv("PERPLEXITY_API_KEY")
+from .perplexity_client import perplexity_client
+from .response_cache import perplexity_cache
+from .telemetry import span
 
-@tool
-def fetch_perplexity_insight(query: str) -> str:
-    """Fetches real-time marketing insight from Perplexity."""
-    url = "https://api.perplexity.ai/chat/completions"
-    headers = {
-        "Authorization": f"Bearer {PERPLEXITY_KEY}",
-        "Content-Type": "application/json"
-    }
-    payload = {
-        "model": "sonar-pro",
-        "messages": [
-            {"role": "user", "content": query}
-        ],
-        "temperature": 0.7
-    }
+logger = logging.getLogger(__name__)
+
+def complete_cached(query: str, ttl: float | None = None, exact: bool = False) -> str:
+    """
+    Perplexity completion behind perplexity_cache: repeats of a question
+    (reworded ones too, unless `exact`) are answered from the cache.
+    Templated prompts that differ only in an entity pass exact=True.
+    Raises if Perplexity fails.
+    """
+    cached = perplexity_cache.get(query, exact)
+    if cached is not None:
+        return cached
+    answer = perplexity_client.complete(query)
+    perplexity_cache.put(query, answer, ttl)
+    return answer
 
+def stream_cached(query: str, ttl: float | None = None, exact: bool = False) -> Iterator[str]:
+    """
+    Streaming counterpart of complete_cached: a cached answer comes back as
+    one delta; a live stream is cached once it has finished.
+    """
+    cached = perplexity_cache.get(query, exact)
+    if cached is not None:
+        yield cached
+        return
+    deltas = []
+    for delta in perplexity_client.stream(query):
+        deltas.append(delta)
+        yield delta
+    perplexity_cache.put(query, "".join(deltas), ttl)
+
+def perplexity_insight(query: str) -> str:
+    """Fetches real-time marketing insight from Perplexity."""
     try:
-        res = requests.post(url, headers=headers, json=payload)
-        res.raise_for_status()
-        return res.json()["choices"][0]["message"]["content"]
+        with span("perplexity_insight"):
+            return complete_cached(query)
     except Exception as e:
-        print("🛑 Perplexity fetch error:", e)
-        return "⚠️ Mona had trouble fetching insights. Please try again later." 
\ No newline at end of file
+        logger.error("Perplexity fetch failed", extra={"error": str(e)})
+        return "⚠️ Mona had trouble fetching insights. Please try again later."
+
+_tool = None
+
+def __getattr__(name: str):
+    # The LangChain tool wrapper is built on first access, so importing this
+    # module doesn't import langchain
+    global _tool
+    if name == "fetch_perplexity_insight":
+        if _tool is None:
+            from langchain.tools import tool
+
+            _tool = tool("fetch_perplexity_insight")(perplexity_insight)
+        return _tool
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
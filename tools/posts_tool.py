@@ -1,80 +1,49 @@
-from .supabase_client import supabase
-from .formatters import format_social_post
+import logging
 
-def debug_fetch_latest_post():
-    """Debug function to check Supabase connection and posts table structure."""
-    try:
-        response = supabase.table("posts").select("*").limit(1).execute()
-        
-        print("🔍 DEBUG: Supabase Response")
-        print(f"Status: {response.status_code if hasattr(response, 'status_code') else 'N/A'}")
-        
-        if response.data:
-            post = response.data[0]
-            print("✅ Found post data:")
-            print(f"Available columns: {list(post.keys())}")
-            return {
-                "success": True,
-                "data": post,
-                "columns": list(post.keys())
-            }
-        else:
-            print("⚠️ No posts found in database")
-            return {
-                "success": False,
-                "error": "No posts found in database"
-            }
-    except Exception as e:
-        error_msg = f"🔥 Supabase Error: {str(e)}"
-        print(error_msg)
-        return {
-            "success": False,
-            "error": error_msg
-        }
+from .formatters import POST_FORMATTER
+from .summary_cache import summary_cache
+from .schema_registry import SchemaUnavailableError
+from .table_reader import SummaryPage, fetch_rows_page
+from .telemetry import span, traced
 
-def fetch_posts_summary() -> str:
-    """Fetches and formats latest social media posts."""
-    try:
-        # First, run debug check
-        debug_result = debug_fetch_latest_post()
-        if not debug_result["success"]:
-            return f"⚠️ خطأ في الاتصال: {debug_result['error']}"
+logger = logging.getLogger(__name__)
 
-        # If debug successful, try actual fetch
-        available_columns = debug_result.get("columns", [])
-        
-        # Determine which order column to use
-        order_column = (
-            "published_date" if "published_date" in available_columns
-            else "created_at" if "created_at" in available_columns
-            else "reach"  # fallback to reach if no date columns
-        )
+# Preferred order columns, newest first; "reach" is the fallback
+POSTS_ORDER_COLUMNS = ("published_date", "created_at", "reach")
 
-        result = supabase.table("posts") \
-            .select(",".join(available_columns)) \
-            .order(order_column, desc=True) \
-            .limit(5) \
-            .execute()
+async def _build_posts_page(cursor: str | None = None) -> SummaryPage:
+    """Loads and formats one page of posts. Raises on failure so errors are never cached."""
+    page = await fetch_rows_page("posts", POSTS_ORDER_COLUMNS, cursor=cursor)
 
-        if not result.data:
-            return "📭 لم يتم العثور على أي منشورات حديثة."
+    if not page.rows:
+        if cursor:
+            return SummaryPage("📭 لا يوجد المزيد من المنشورات.")
+        return SummaryPage("📭 لم يتم العثور على أي منشورات حديثة.")
 
-        # Format each post
-        formatted_posts = []
-        for post in result.data:
-            try:
-                formatted = format_social_post(post)
-                formatted_posts.append(formatted)
-            except Exception as e:
-                print(f"Error formatting post: {e}")
-                print(f"Post data: {post}")
-                formatted_posts.append("⚠️ خطأ في معالجة هذا المنشور")
+    with span("format"):
+        formatted_posts = POST_FORMATTER.format_rows(page.rows)
 
-        # Combine all posts with header
-        return "📱 آخر تحليل للمنشورات على وسائل التواصل:\n\n" + \
-               "\n\n".join(formatted_posts)
+    # Combine all posts with header
+    header = "📱 المزيد من المنشورات:" if cursor else "📱 آخر تحليل للمنشورات على وسائل التواصل:"
+    return SummaryPage(header + "\n\n" + "\n\n".join(formatted_posts), page.next_cursor)
 
+@traced("summary", intent="posts")
+async def fetch_posts_page(cursor: str | None = None) -> SummaryPage:
+    """
+    One page of posts; pass the previous page's next_cursor for "show more".
+    The first page is cached and shared with fetch_posts_summary.
+    """
+    try:
+        if cursor is None:
+            return await summary_cache.get_or_load("posts", _build_posts_page)
+        return await _build_posts_page(cursor)
+    except SchemaUnavailableError as e:
+        return SummaryPage(f"⚠️ خطأ في الاتصال: {e}")
     except Exception as e:
         error_msg = f"🔥 Error fetching posts: {str(e)}"
-        print(error_msg)
-        return f"❌ فشل في جلب المنشورات:\n{error_msg}"
\ No newline at end of file
+        logger.error("Summary fetch failed", extra={"table": "posts", "error": str(e)})
+        return SummaryPage(f"❌ فشل في جلب المنشورات:\n{error_msg}")
+
+async def fetch_posts_summary() -> str:
+    """Fetches and formats latest social media posts."""
+    return (await fetch_posts_page()).text
\ No newline at end of file
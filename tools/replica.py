@@ -0,0 +1,317 @@
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+from .keyset import keyset_filter
+from .schema_registry import get_table_schema
+from .supabase_client import get_supabase
+
+logger = logging.getLogger(__name__)
+
+REPLICA_ENABLED = os.getenv("REPLICA_ENABLED", "").lower() in ("1", "true", "yes")
+REPLICA_PATH = os.getenv("REPLICA_PATH", "replica.db")
+REPLICA_SYNC_SECONDS = float(os.getenv("REPLICA_SYNC_SECONDS", "30"))
+REPLICA_PAGE_SIZE = int(os.getenv("REPLICA_PAGE_SIZE", "1000"))
+# Older than this, reads go back to Supabase (the replica is still used if Supabase fails)
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "300"))
+
+# Watermark column candidates per table; without one the id is the watermark
+REPLICA_TABLES = {
+    "mentions": ("created_at", "published_date", "collected_date"),
+    "posts": ("created_at", "published_date"),
+    "seo_signals": ("created_at", "collected_date"),
+}
+
+# Columns the summary tools order by, indexed locally when present
+REPLICA_INDEXES = {
+    "mentions": ("published_date", "collected_date", "created_at"),
+    "posts": ("published_date", "created_at", "reach"),
+    "seo_signals": ("volume",),
+}
+
+def _quote(identifier: str) -> str:
+    return '"' + identifier.replace('"', '""') + '"'
+
+def _to_epoch(value) -> float | None:
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+class LocalReplica:
+    """
+    SQLite mirror of the mentions, posts and seo_signals tables.
+
+    Each sync pulls only rows after the stored (watermark, id) position using
+    keyset pages ordered by the watermark column, and upserts them by id.
+    Columns are added to the local tables as they appear upstream.
+    Rows updated in place upstream keep their old copy unless their watermark
+    moves; rows with a NULL watermark are not mirrored.
+    """
+
+    def __init__(self, path: str = REPLICA_PATH):
+        self.path = path
+        self._writer = self._connect()
+        self._reader = self._connect()
+        self._write_lock = threading.Lock()
+        self._writer.execute("""
+            CREATE TABLE IF NOT EXISTS _sync_state (
+                table_name TEXT PRIMARY KEY,
+                watermark_column TEXT,
+                watermark TEXT,
+                last_id TEXT,
+                last_synced_at REAL
+            )
+        """)
+        self._columns: dict[str, list[str]] = {}
+        self._last_error: dict[str, str] = {}
+        self._task: asyncio.Task | None = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    # Local schema
+
+    def columns(self, table: str) -> list[str]:
+        if table not in self._columns:
+            rows = self._reader.execute(f"PRAGMA table_info({_quote(table)})").fetchall()
+            self._columns[table] = [row["name"] for row in rows]
+        return self._columns[table]
+
+    def _ensure_table(self, table: str, columns: list[str], index_columns: tuple[str, ...]):
+        existing = self.columns(table)
+        if not existing:
+            self._writer.execute(f"CREATE TABLE IF NOT EXISTS {_quote(table)} (id PRIMARY KEY)")
+            existing = ["id"]
+        for column in columns:
+            if column not in existing:
+                self._writer.execute(f"ALTER TABLE {_quote(table)} ADD COLUMN {_quote(column)}")
+                existing.append(column)
+        for column in index_columns:
+            if column in existing and column != "id":
+                self._writer.execute(
+                    f"CREATE INDEX IF NOT EXISTS {_quote(f'{table}_{column}_idx')} "
+                    f"ON {_quote(table)} ({_quote(column)}, id)"
+                )
+        self._columns[table] = existing
+
+    # Sync state
+
+    def state(self, table: str) -> dict | None:
+        row = self._reader.execute(
+            "SELECT * FROM _sync_state WHERE table_name = ?", (table,)
+        ).fetchone()
+        return dict(row) if row else None
+
+    def _apply_page(self, table: str, rows: list[dict], watermark_column: str, index_columns: tuple[str, ...]):
+        """Upserts one page and advances the watermark in the same transaction."""
+        with self._write_lock:
+            columns = sorted({column for row in rows for column in row})
+            self._ensure_table(table, columns, (watermark_column, *index_columns))
+            placeholders = ",".join("?" for _ in columns)
+            names = ",".join(_quote(c) for c in columns)
+            values = [
+                tuple(json.dumps(row.get(c), ensure_ascii=False) if isinstance(row.get(c), (dict, list))
+                      else row.get(c) for c in columns)
+                for row in rows
+            ]
+            last = rows[-1] if rows else None
+            self._writer.execute("BEGIN")
+            try:
+                if values:
+                    self._writer.executemany(
+                        f"INSERT OR REPLACE INTO {_quote(table)} ({names}) VALUES ({placeholders})", values
+                    )
+                self._writer.execute(
+                    """
+                    INSERT INTO _sync_state (table_name, watermark_column, watermark, last_id, last_synced_at)
+                    VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT(table_name) DO UPDATE SET
+                        watermark_column = excluded.watermark_column,
+                        watermark = COALESCE(excluded.watermark, watermark),
+                        last_id = COALESCE(excluded.last_id, last_id),
+                        last_synced_at = excluded.last_synced_at
+                    """,
+                    (table, watermark_column,
+                     None if last is None else str(last.get(watermark_column)),
+                     None if last is None else str(last.get("id")),
+                     time.time()),
+                )
+                self._writer.execute("COMMIT")
+            except Exception:
+                self._writer.execute("ROLLBACK")
+                raise
+
+    async def sync_table(self, table: str) -> int:
+        """Pulls every row past the watermark; returns how many were applied."""
+        candidates = REPLICA_TABLES[table]
+        schema = await get_table_schema(table, candidates + ("id",))
+        if not schema.has("id"):
+            raise ValueError(f"{table} has no id column; it can't be mirrored")
+        watermark_column = next((c for c in candidates if schema.has(c)), "id")
+        supabase = await get_supabase()
+
+        state = self.state(table)
+        if state and state["watermark_column"] != watermark_column:
+            state = None  # watermark column changed upstream: start over
+        position = (state["watermark"], state["last_id"]) if state and state["last_id"] else None
+
+        applied = 0
+        while True:
+            query = supabase.table(table).select("*")
+            if watermark_column != "id":
+                query = query.not_.is_(watermark_column, "null").order(watermark_column)
+            query = query.order("id")
+            if position:
+                query = query.or_(keyset_filter(watermark_column, position[0], position[1]))
+            result = await query.limit(REPLICA_PAGE_SIZE).execute()
+            rows = result.data or []
+            await asyncio.to_thread(self._apply_page, table, rows, watermark_column, REPLICA_INDEXES[table])
+            applied += len(rows)
+            if len(rows) < REPLICA_PAGE_SIZE:
+                return applied
+            position = (rows[-1].get(watermark_column), rows[-1]["id"])
+
+    async def sync_all(self):
+        for table in REPLICA_TABLES:
+            try:
+                applied = await self.sync_table(table)
+                self._last_error.pop(table, None)
+                if applied:
+                    logger.info("Replica synced", extra={"table": table, "rows": applied})
+            except Exception as e:
+                self._last_error[table] = str(e)
+                logger.error("Replica sync failed", extra={"table": table, "error": str(e)})
+
+    # Reads
+
+    def sync_lag(self, table: str) -> float | None:
+        """Seconds since the last successful sync of a table (None: never synced)."""
+        state = self.state(table)
+        if not state or state["last_synced_at"] is None:
+            return None
+        return time.time() - state["last_synced_at"]
+
+    def is_fresh(self, table: str) -> bool:
+        lag = self.sync_lag(table)
+        return lag is not None and lag <= REPLICA_MAX_LAG_SECONDS
+
+    def has_data(self, table: str) -> bool:
+        return self.sync_lag(table) is not None
+
+    def page_rows(self, table: str, order_candidates: tuple[str, ...], limit: int,
+                  after: tuple | None = None) -> tuple[list[dict], str]:
+        """
+        Same paging as the summary tools: newest first by the first available
+        order column, strictly after the (column, value, id) position if given.
+        Returns the rows and the order column used.
+        """
+        columns = self.columns(table)
+        order_column = next((c for c in order_candidates if c in columns), "id")
+        where, params = [], []
+        if order_column != "id":
+            where.append(f"{_quote(order_column)} IS NOT NULL")
+        if after and after[0] == order_column:
+            if order_column == "id":
+                where.append("id < ?")
+                params.append(after[2])
+            else:
+                where.append(f"({_quote(order_column)} < ? OR ({_quote(order_column)} = ? AND id < ?))")
+                params += [after[1], after[1], after[2]]
+        sql = f"SELECT * FROM {_quote(table)}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += f" ORDER BY {_quote(order_column)} DESC, id DESC LIMIT ?"
+        rows = self._reader.execute(sql, (*params, limit)).fetchall()
+        return [dict(row) for row in rows], order_column
+
+    def rows_after_id(self, table: str, columns: tuple[str, ...], last_id, limit: int) -> list[dict]:
+        """One export page in id order; columns missing locally come back as None."""
+        local = self.columns(table)
+        select = ",".join(_quote(c) if c in local else f"NULL AS {_quote(c)}" for c in columns)
+        sql = f"SELECT {select} FROM {_quote(table)}"
+        params: tuple = ()
+        if last_id is not None:
+            sql += " WHERE id > ?"
+            params = (last_id,)
+        rows = self._reader.execute(sql + " ORDER BY id LIMIT ?", (*params, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def rows_by_id(self, table: str, ids: list) -> list[dict]:
+        placeholders = ",".join("?" for _ in ids)
+        sql = f"SELECT * FROM {_quote(table)} WHERE id IN ({placeholders})"
+        return [dict(row) for row in self._reader.execute(sql, tuple(ids)).fetchall()]
+
+    def query(self, sql: str, params: tuple = ()) -> list[dict]:
+        """Read-only SQL over the replica (used for local aggregation)."""
+        return [dict(row) for row in self._reader.execute(sql, params).fetchall()]
+
+    def data_lag(self, table: str, state: dict | None = None) -> float | None:
+        """Seconds behind the newest upstream change; None without a time watermark."""
+        state = self.state(table) if state is None else state
+        if not state or state.get("watermark_column") in (None, "id"):
+            return None
+        watermark_epoch = _to_epoch(state.get("watermark"))
+        return None if watermark_epoch is None else round(time.time() - watermark_epoch, 1)
+
+    def lag_metrics(self) -> dict:
+        """Flat per-table lag and freshness for /metrics (stats() also counts rows)."""
+        metrics = {}
+        for table in REPLICA_TABLES:
+            lag = self.sync_lag(table)
+            metrics[f"{table}_sync_lag_seconds"] = None if lag is None else round(lag, 1)
+            metrics[f"{table}_data_lag_seconds"] = self.data_lag(table)
+            metrics[f"{table}_fresh"] = int(self.is_fresh(table))
+        return metrics
+
+    def stats(self) -> dict:
+        tables = {}
+        for table in REPLICA_TABLES:
+            state = self.state(table) or {}
+            data_lag = self.data_lag(table, state)
+            count = self._reader.execute(f"SELECT COUNT(*) FROM {_quote(table)}").fetchone()[0] \
+                if self.columns(table) else 0
+            lag = self.sync_lag(table)
+            tables[table] = {
+                "rows": count,
+                "watermark_column": state.get("watermark_column"),
+                "watermark": state.get("watermark"),
+                "sync_lag_seconds": None if lag is None else round(lag, 1),
+                "data_lag_seconds": data_lag,
+                "fresh": self.is_fresh(table),
+                "last_error": self._last_error.get(table),
+            }
+        return {"enabled": REPLICA_ENABLED, "path": self.path, "tables": tables}
+
+    # Background sync
+
+    async def _run(self):
+        while True:
+            await self.sync_all()
+            await asyncio.sleep(REPLICA_SYNC_SECONDS)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+# None unless REPLICA_ENABLED is set
+replica = LocalReplica() if REPLICA_ENABLED else None
@@ -0,0 +1,172 @@
+import logging
+import os
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any
+
+from .arabic import normalize_arabic
+
+logger = logging.getLogger(__name__)
+
+PERPLEXITY_CACHE_SIZE = int(os.getenv("PERPLEXITY_CACHE_SIZE", "1000"))
+PERPLEXITY_CACHE_TTL = float(os.getenv("PERPLEXITY_CACHE_TTL", "21600"))
+# Estimated Jaccard similarity for a near-duplicate hit; 0 (the default) turns
+# the lookup off. Shingles can't tell entities apart: at 0.85, prompts that
+# differ only in a company name match each other
+PERPLEXITY_CACHE_SIMILARITY = float(os.getenv("PERPLEXITY_CACHE_SIMILARITY", "0"))
+
+SHINGLE_SIZE = 3
+# 16 bands of 4 rows: pairs at 0.85 similarity become candidates >99.9% of the time
+MINHASH_BANDS = 16
+MINHASH_ROWS = 4
+_PRIME = (1 << 31) - 1
+
+_PUNCTUATION = re.compile(r"[^\w\s]+")
+_NUMBERS = re.compile(r"\d+")
+
+def normalize_query(text: str) -> str:
+    """Cache key: Arabic-normalized, lowercase, no punctuation, single spaces."""
+    return " ".join(_PUNCTUATION.sub(" ", normalize_arabic(text)).split())
+
+@dataclass
+class _Entry:
+    value: Any
+    expires_at: float
+    signature: Any = None
+    numbers: frozenset = frozenset()
+    bands: tuple = ()
+
+class ResponseCache:
+    """
+    LRU + TTL cache for answers to free-form questions.
+
+    - Exact hits on the normalized question (case, spacing, diacritics,
+      punctuation and letter variants don't matter).
+    - Optional near-duplicate hits: MinHash signatures over character
+      shingles, bucketed with LSH so a lookup only compares a few candidates.
+      Questions that mention different numbers (years, counts) never match.
+    Thread-safe: Perplexity calls run in worker threads.
+    """
+
+    def __init__(self, max_entries: int, ttl: float, similarity: float = 0.0):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity = similarity
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._buckets: dict[tuple[int, bytes], set[str]] = {}
+        self._lock = threading.Lock()
+        self._hash_params = None
+        self._stats = {"hits": 0, "near_hits": 0, "misses": 0, "stores": 0,
+                       "evictions": 0, "expirations": 0}
+
+    def _signature(self, key: str):
+        import numpy as np
+
+        if self._hash_params is None:
+            rng = np.random.default_rng(20240601)
+            count = MINHASH_BANDS * MINHASH_ROWS
+            self._hash_params = (
+                rng.integers(1, _PRIME, count, dtype=np.uint64)[:, None],
+                rng.integers(0, _PRIME, count, dtype=np.uint64)[:, None],
+            )
+        a, b = self._hash_params
+        padded = f" {key} "
+        shingles = {padded[i:i + SHINGLE_SIZE] for i in range(max(1, len(padded) - SHINGLE_SIZE + 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode()) & _PRIME for s in shingles), dtype=np.uint64, count=len(shingles))
+        return ((a * hashes + b) % _PRIME).min(axis=1)
+
+    def _bands(self, signature) -> tuple:
+        return tuple((i, signature[i * MINHASH_ROWS:(i + 1) * MINHASH_ROWS].tobytes())
+                     for i in range(MINHASH_BANDS))
+
+    def _drop(self, key: str):
+        entry = self._entries.pop(key)
+        for band in entry.bands:
+            bucket = self._buckets.get(band)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._buckets[band]
+
+    def _live(self, key: str, now: float) -> _Entry | None:
+        entry = self._entries.get(key)
+        if entry is not None and now >= entry.expires_at:
+            self._drop(key)
+            self._stats["expirations"] += 1
+            return None
+        return entry
+
+    def _nearest(self, signature, numbers: frozenset, now: float) -> str | None:
+        candidates = set()
+        for band in self._bands(signature):
+            candidates |= self._buckets.get(band, set())
+        best_key, best_score = None, self.similarity
+        for key in candidates:
+            entry = self._live(key, now)
+            if entry is None or entry.numbers != numbers:
+                continue
+            score = float((entry.signature == signature).mean())
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def get(self, question: str, exact: bool = False) -> Any | None:
+        """Cached answer for the question; `exact` skips the near-duplicate lookup."""
+        key = normalize_query(question)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._live(key, now)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return entry.value
+            if self.similarity > 0 and not exact:
+                near = self._nearest(self._signature(key), frozenset(_NUMBERS.findall(key)), now)
+                if near is not None:
+                    self._entries.move_to_end(near)
+                    self._stats["near_hits"] += 1
+                    logger.debug("Near-duplicate cache hit", extra={"question": key, "cached": near})
+                    return self._entries[near].value
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, question: str, value: Any, ttl: float | None = None):
+        """Stores a successful answer; never cache errors."""
+        key = normalize_query(question)
+        entry = _Entry(value, time.monotonic() + (self.ttl if ttl is None else ttl))
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            if self.similarity > 0:
+                entry.signature = self._signature(key)
+                entry.numbers = frozenset(_NUMBERS.findall(key))
+                entry.bands = self._bands(entry.signature)
+                for band in entry.bands:
+                    self._buckets.setdefault(band, set()).add(key)
+            self._entries[key] = entry
+            self._stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits = self._stats["hits"] + self._stats["near_hits"]
+            lookups = hits + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            }
+
+# In front of the Perplexity insight tool
+perplexity_cache = ResponseCache(PERPLEXITY_CACHE_SIZE, PERPLEXITY_CACHE_TTL, PERPLEXITY_CACHE_SIMILARITY)
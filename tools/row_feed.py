@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Callable, NamedTuple
+
+from .schema_registry import get_table_schema
+from .table_reader import iter_table
+from .telemetry import span
+
+logger = logging.getLogger(__name__)
+
+FEED_SYNC_SECONDS = float(os.getenv("FEED_SYNC_SECONDS", "30"))
+FEED_PAGE_SIZE = int(os.getenv("FEED_PAGE_SIZE", "1000"))
+# Ids below the last one seen that each pull reads again, for rows committed late
+FEED_ID_OVERLAP = int(os.getenv("FEED_ID_OVERLAP", "200"))
+
+Consumer = Callable[[list[dict]], None]
+
+class _Subscriber(NamedTuple):
+    name: str
+    consume: Consumer
+    columns: tuple[str, ...]
+    after_pull: Callable[[], None] | None
+    threaded: bool
+
+class RowFeed:
+    """
+    Hands a table's new rows to in-memory indexes, one id-ordered page at a
+    time. The first pull loads the whole table; later pulls only the delta.
+    Pages come from the replica while it is fresh, otherwise from Supabase.
+
+    Ids must be serial integers. A sequence hands out ids before commit, so
+    a row can become visible after a higher id was already pulled; each
+    pull therefore starts FEED_ID_OVERLAP ids below the last one and skips
+    the ids it has delivered. A row committed later than that is missed.
+    Every row reaches the consumers once.
+
+    Rows edited in place upstream keep the copy the consumers first saw.
+    Consumers run on the event loop between pages and must not block long,
+    unless subscribed with `threaded=True`.
+    """
+
+    def __init__(self, table: str):
+        self.table = table
+        self.last_id = None
+        self._recent_ids: set[int] = set()
+        self.rows = 0
+        self.last_pull_at: float | None = None
+        self.last_error: str | None = None
+        self._consumers: list[_Subscriber] = []
+        self._lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+
+    def subscribe(self, name: str, consume: Consumer, columns: tuple[str, ...],
+                  after_pull: Callable[[], None] | None = None, threaded: bool = False):
+        """
+        `consume` gets every new page with at least `columns` (those that
+        exist); `after_pull` runs once after each pull that delivered rows,
+        e.g. to re-sort views that would be too costly to keep per page.
+        With `threaded`, both run in a worker thread (asyncio.to_thread), so
+        the consumer must guard the state its readers share.
+        """
+        self._consumers.append(_Subscriber(name, consume, columns, after_pull, threaded))
+
+    @property
+    def ready(self) -> bool:
+        """True once the initial load has finished."""
+        return self.last_pull_at is not None
+
+    async def pull(self) -> int:
+        """Delivers every row not delivered before; returns how many."""
+        async with self._lock:
+            wanted = ("id",) + tuple(c for consumer in self._consumers for c in consumer.columns)
+            schema = await get_table_schema(self.table, ("id",))
+            if not schema.has("id"):
+                raise ValueError(f"{self.table} has no id column to follow")
+            columns = tuple(c for c in dict.fromkeys(wanted) if schema.has(c))
+
+            pulled = 0
+            after_id = None if self.last_id is None else self.last_id - FEED_ID_OVERLAP
+            async for rows in iter_table(self.table, columns, FEED_PAGE_SIZE, after_id=after_id):
+                if not isinstance(rows[0]["id"], int):
+                    raise ValueError(f"{self.table} ids are not integers; the feed needs serial ids")
+                rows = [row for row in rows if row["id"] not in self._recent_ids]
+                if not rows:
+                    continue
+                self._remember([row["id"] for row in rows])
+                with span("feed", self.table):
+                    for consumer in self._consumers:
+                        await self._call(consumer, consumer.consume, rows)
+                pulled += len(rows)
+                # Let requests run between pages of a large initial load
+                await asyncio.sleep(0)
+            if pulled:
+                for consumer in self._consumers:
+                    if consumer.after_pull is not None:
+                        await self._call(consumer, consumer.after_pull)
+            self.rows += pulled
+            self.last_pull_at = time.time()
+            return pulled
+
+    def _remember(self, ids: list[int]):
+        """Tracks delivered ids within the overlap window below the highest one."""
+        self._recent_ids.update(ids)
+        self.last_id = max(ids) if self.last_id is None else max(self.last_id, max(ids))
+        floor = self.last_id - FEED_ID_OVERLAP
+        self._recent_ids = {i for i in self._recent_ids if i > floor}
+
+    async def _call(self, consumer: _Subscriber, callback: Callable, *args):
+        try:
+            if consumer.threaded:
+                await asyncio.to_thread(callback, *args)
+            else:
+                callback(*args)
+        except Exception as e:
+            logger.error("Feed consumer failed",
+                         extra={"table": self.table, "consumer": consumer.name, "error": str(e)})
+
+    async def _run(self):
+        while True:
+            try:
+                pulled = await self.pull()
+                self.last_error = None
+                if pulled:
+                    logger.info("Feed pulled rows", extra={"table": self.table, "rows": pulled})
+            except Exception as e:
+                self.last_error = str(e)
+                logger.error("Feed pull failed", extra={"table": self.table, "error": str(e)})
+            await asyncio.sleep(FEED_SYNC_SECONDS)
+
+    def start(self):
+        if self._task is None and self._consumers:
+            self._task = asyncio.ensure_future(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def stats(self) -> dict:
+        return {
+            "consumers": [consumer.name for consumer in self._consumers],
+            "rows": self.rows,
+            "last_id": self.last_id,
+            "ready": self.ready,
+            "seconds_since_pull": None if self.last_pull_at is None else round(time.time() - self.last_pull_at, 1),
+            "last_error": self.last_error,
+        }
+
+_feeds: dict[str, RowFeed] = {}
+
+def feed_for(table: str) -> RowFeed:
+    """The shared feed of a table; every index on it is fed from one pull."""
+    if table not in _feeds:
+        _feeds[table] = RowFeed(table)
+    return _feeds[table]
+
+def start_feeds():
+    for feed in _feeds.values():
+        feed.start()
+
+def stop_feeds():
+    for feed in _feeds.values():
+        feed.stop()
+
+def feed_stats() -> dict:
+    return {table: feed.stats() for table, feed in _feeds.items()}
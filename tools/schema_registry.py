@@ -0,0 +1,91 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass, replace
+
+from .supabase_client import get_supabase
+
+logger = logging.getLogger(__name__)
+
+# How long discovered columns are trusted before the next probe
+SCHEMA_TTL_SECONDS = float(os.getenv("SCHEMA_TTL_SECONDS", "600"))
+
+class SchemaUnavailableError(Exception):
+    """Raised when a table's columns can't be discovered (empty table or DB error)."""
+
+@dataclass(frozen=True)
+class TableSchema:
+    table: str
+    columns: tuple[str, ...]
+    order_column: str
+    discovered_at: float
+
+    @property
+    def select_clause(self) -> str:
+        return ",".join(self.columns)
+
+    def has(self, column: str) -> bool:
+        return column in self.columns
+
+_schemas: dict[str, TableSchema] = {}
+_locks: dict[str, asyncio.Lock] = {}
+
+def _pick_order_column(columns: list[str], candidates: tuple[str, ...]) -> str:
+    """First candidate present in the table; the last candidate is the fallback."""
+    for candidate in candidates:
+        if candidate in columns:
+            return candidate
+    return candidates[-1]
+
+async def _discover(table: str, order_candidates: tuple[str, ...]) -> TableSchema:
+    supabase = await get_supabase()
+    try:
+        response = await supabase.table(table).select("*").limit(1).execute()
+    except Exception as e:
+        raise SchemaUnavailableError(f"🔥 Supabase Error: {str(e)}") from e
+
+    if not response.data:
+        raise SchemaUnavailableError(f"No rows found in {table}")
+
+    columns = list(response.data[0].keys())
+    logger.info("Schema discovered", extra={"table": table, "columns": columns})
+    return TableSchema(
+        table=table,
+        columns=tuple(columns),
+        order_column=_pick_order_column(columns, order_candidates),
+        discovered_at=time.monotonic(),
+    )
+
+async def get_table_schema(table: str, order_candidates: tuple[str, ...]) -> TableSchema:
+    """
+    Returns the cached schema for a table, probing Supabase only when the
+    entry is missing or older than SCHEMA_TTL_SECONDS.
+    Concurrent callers share a single probe.
+    """
+    schema = _schemas.get(table)
+    if not schema or time.monotonic() - schema.discovered_at >= SCHEMA_TTL_SECONDS:
+        lock = _locks.setdefault(table, asyncio.Lock())
+        async with lock:
+            schema = _schemas.get(table)
+            if not schema or time.monotonic() - schema.discovered_at >= SCHEMA_TTL_SECONDS:
+                schema = await _discover(table, order_candidates)
+                _schemas[table] = schema
+
+    # Callers may rank the same table differently (e.g. the replica sync)
+    order_column = _pick_order_column(list(schema.columns), order_candidates)
+    if order_column != schema.order_column:
+        schema = replace(schema, order_column=order_column)
+    return schema
+
+def invalidate_table_schema(table: str | None = None):
+    """Drops one cached schema (or all of them) so the next call re-probes."""
+    if table is None:
+        _schemas.clear()
+    else:
+        _schemas.pop(table, None)
+
+async def refresh_table_schema(table: str, order_candidates: tuple[str, ...]) -> TableSchema:
+    """Forces a fresh probe for a table, e.g. after a migration."""
+    invalidate_table_schema(table)
+    return await get_table_schema(table, order_candidates)
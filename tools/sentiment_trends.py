@@ -0,0 +1,303 @@
+import logging
+import math
+import os
+import time
+from array import array
+from datetime import datetime, timezone
+
+from .formatters import score_icon
+from .row_feed import feed_for
+from .telemetry import span, traced
+
+logger = logging.getLogger(__name__)
+
+SENTIMENT_TRENDS_ENABLED = os.getenv("SENTIMENT_TRENDS_ENABLED", "true").lower() in ("1", "true", "yes")
+# Ring sizes: two weeks of hours (a week compared with the one before) and four months of days
+SENTIMENT_HOURLY_BUCKETS = int(os.getenv("SENTIMENT_HOURLY_BUCKETS", str(14 * 24)))
+SENTIMENT_DAILY_BUCKETS = int(os.getenv("SENTIMENT_DAILY_BUCKETS", "120"))
+SENTIMENT_TREND_DAYS = int(os.getenv("SENTIMENT_TREND_DAYS", "7"))
+# Average score change below this is reported as stable
+SENTIMENT_TREND_MIN_DELTA = float(os.getenv("SENTIMENT_TREND_MIN_DELTA", "0.05"))
+# The last 24 hours are an anomaly when this many standard deviations from the daily history
+SENTIMENT_ANOMALY_Z = float(os.getenv("SENTIMENT_ANOMALY_Z", "2.5"))
+SENTIMENT_ANOMALY_HISTORY_DAYS = int(os.getenv("SENTIMENT_ANOMALY_HISTORY_DAYS", "28"))
+# History days (and scored mentions per day) needed before anomalies are reported
+SENTIMENT_ANOMALY_MIN_DAYS = int(os.getenv("SENTIMENT_ANOMALY_MIN_DAYS", "7"))
+SENTIMENT_ANOMALY_MIN_MENTIONS = int(os.getenv("SENTIMENT_ANOMALY_MIN_MENTIONS", "5"))
+
+HOUR = 3600
+DAY = 24 * HOUR
+ALL_PLATFORMS = "*"
+
+# Date columns in order of preference, as in the mention formatter
+_DATE_COLUMNS = ("published_date", "collected_date", "created_at")
+_SPARKS = "▁▂▃▄▅▆▇█"
+
+def _epoch(value) -> float | None:
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def _number(value) -> float | None:
+    try:
+        number = None if value is None else float(value)
+    except (TypeError, ValueError):
+        return None
+    return None if number is None or math.isnan(number) else number
+
+class RingSeries:
+    """
+    Fixed-size ring of time buckets (UTC) holding mention count, scored
+    count, score sum and engagement sum in flat arrays.
+
+    Each slot remembers which bucket it holds, so a slot is reset lazily
+    when a newer bucket lands on it: adding a row is O(1) however long the
+    gap since the last one. Rows older than the ring are dropped.
+    """
+
+    FIELDS = ("count", "scored", "score_sum", "engagement")
+
+    def __init__(self, width: int, size: int):
+        self.width = width
+        self.size = size
+        self.newest = -1
+        self._buckets = array("q", [-1]) * size
+        self._fields = {field: array("d", [0.0]) * size for field in self.FIELDS}
+
+    def add(self, epoch: float, score: float | None, engagement: float | None) -> bool:
+        bucket = int(epoch // self.width)
+        if bucket <= self.newest - self.size:
+            return False
+        slot = bucket % self.size
+        held = self._buckets[slot]
+        if held != bucket:
+            if held > bucket:
+                return False
+            self._buckets[slot] = bucket
+            for values in self._fields.values():
+                values[slot] = 0.0
+        fields = self._fields
+        fields["count"][slot] += 1
+        if score is not None:
+            fields["scored"][slot] += 1
+            fields["score_sum"][slot] += score
+        if engagement:
+            fields["engagement"][slot] += engagement
+        if bucket > self.newest:
+            self.newest = bucket
+        return True
+
+    def window(self, end_bucket: int, buckets: int) -> dict:
+        """Each field over the `buckets` buckets ending at `end_bucket`, oldest first (NumPy)."""
+        import numpy as np
+
+        buckets = min(buckets, self.size)
+        ids = np.arange(end_bucket - buckets + 1, end_bucket + 1)
+        slots = ids % self.size
+        current = np.frombuffer(self._buckets, dtype=np.int64)[slots] == ids
+        return {
+            field: np.where(current, np.frombuffer(values, dtype=np.float64)[slots], 0.0)
+            for field, values in self._fields.items()
+        }
+
+class SentimentTrends:
+    """
+    Rolling hourly and daily sentiment series per platform (and for all
+    platforms), fed by the mentions RowFeed. Each mention updates four ring
+    slots; trend and anomaly answers read a few hundred buckets, never the
+    mentions themselves.
+    """
+
+    COLUMNS = ("platform", "sentiment_score", "engagement") + _DATE_COLUMNS
+
+    def __init__(self, hourly: int = SENTIMENT_HOURLY_BUCKETS, daily: int = SENTIMENT_DAILY_BUCKETS):
+        self._sizes = {HOUR: hourly, DAY: daily}
+        self._series: dict[str, dict[int, RingSeries]] = {}
+        self.rows = 0
+        self.skipped = 0
+
+    def _rings(self, platform: str) -> dict[int, RingSeries]:
+        rings = self._series.get(platform)
+        if rings is None:
+            rings = self._series[platform] = {width: RingSeries(width, size) for width, size in self._sizes.items()}
+        return rings
+
+    def add_rows(self, rows: list[dict]):
+        for row in rows:
+            epoch = next((e for e in map(_epoch, (row.get(c) for c in _DATE_COLUMNS)) if e is not None), None)
+            if epoch is None:
+                self.skipped += 1
+                continue
+            score = _number(row.get("sentiment_score"))
+            engagement = _number(row.get("engagement"))
+            platform = str(row.get("platform") or "unknown").lower()
+            for key in (ALL_PLATFORMS, platform):
+                for ring in self._rings(key).values():
+                    ring.add(epoch, score, engagement)
+            self.rows += 1
+
+    @property
+    def platforms(self) -> list[str]:
+        return [p for p in self._series if p != ALL_PLATFORMS]
+
+    def window(self, platform: str, width: int, end: float, buckets: int) -> dict | None:
+        """Fields per bucket over the `buckets` buckets of `width` ending at time `end`."""
+        rings = self._series.get(platform)
+        return None if rings is None else rings[width].window(int(end // width), buckets)
+
+    def max_days(self, width: int) -> int:
+        """Longest period this granularity can compare with the one before it."""
+        return self._sizes[width] * width // DAY // 2
+
+    def stats(self) -> dict:
+        newest = self._series[ALL_PLATFORMS][HOUR].newest if ALL_PLATFORMS in self._series else -1
+        return {
+            "enabled": SENTIMENT_TRENDS_ENABLED,
+            "rows": self.rows,
+            "skipped_without_date": self.skipped,
+            "platforms": len(self.platforms),
+            "hours_since_newest": None if newest < 0 else round(time.time() / HOUR - newest, 1),
+        }
+
+sentiment_trends = SentimentTrends()
+if SENTIMENT_TRENDS_ENABLED:
+    feed_for("mentions").subscribe("sentiment_trends", sentiment_trends.add_rows, SentimentTrends.COLUMNS)
+
+class _Period(dict):
+    """Totals of one period: count, scored, score_sum, engagement."""
+
+    @property
+    def average(self) -> float | None:
+        return self["score_sum"] / self["scored"] if self["scored"] else None
+
+def _totals(fields: dict, start: int, stop: int) -> _Period:
+    return _Period({field: float(values[start:stop].sum()) for field, values in fields.items()})
+
+def _change(now: float, before: float) -> str:
+    if not before:
+        return "جديد" if now else "—"
+    ratio = (now - before) / before
+    return f"{'⬆️' if ratio > 0 else '⬇️' if ratio < 0 else '➖'} {abs(ratio):.0%}"
+
+def _score_change(now: float | None, before: float | None) -> str:
+    if now is None or before is None:
+        return ""
+    delta = now - before
+    if abs(delta) < SENTIMENT_TREND_MIN_DELTA:
+        return " (➖ مستقر)"
+    return f" ({'⬆️' if delta > 0 else '⬇️'} {abs(delta):.2f})"
+
+def _sparkline(fields: dict, points: int) -> str:
+    """Average score per point on a fixed -1..1 scale; · where nothing was scored."""
+    import numpy as np
+
+    scored = fields["scored"].reshape(points, -1).sum(axis=1)
+    sums = fields["score_sum"].reshape(points, -1).sum(axis=1)
+    averages = np.divide(sums, scored, out=np.zeros(points), where=scored > 0)
+    levels = np.clip(((averages + 1) / 2 * len(_SPARKS)).astype(int), 0, len(_SPARKS) - 1)
+    return "".join(_SPARKS[level] if n else "·" for level, n in zip(levels, scored))
+
+def _anomalies(trends: SentimentTrends, now: float) -> list[str]:
+    """Platforms whose last 24 hours stand out from their recent daily history."""
+    import numpy as np
+
+    lines = []
+    history_days = min(SENTIMENT_ANOMALY_HISTORY_DAYS, trends._sizes[DAY])
+    # History ends with the last UTC day wholly before the rolling 24 hours
+    history_end = now - 2 * DAY
+    for platform in [ALL_PLATFORMS] + trends.platforms:
+        today = _totals(trends.window(platform, HOUR, now, 24), 0, 24)
+        history = trends.window(platform, DAY, history_end, history_days)
+        label = "كل المنصات" if platform == ALL_PLATFORMS else platform
+
+        counts = history["count"]
+        active = counts > 0
+        if active.sum() >= SENTIMENT_ANOMALY_MIN_DAYS and counts[active].std() > 0:
+            z = (today["count"] - counts[active].mean()) / counts[active].std()
+            if abs(z) >= SENTIMENT_ANOMALY_Z:
+                kind = "ارتفاع غير معتاد" if z > 0 else "انخفاض غير معتاد"
+                lines.append(f"• {label}: {kind} في عدد الإشارات ({today['count']:,.0f}، z={z:+.1f})")
+
+        scored = history["scored"] >= SENTIMENT_ANOMALY_MIN_MENTIONS
+        if today["scored"] >= SENTIMENT_ANOMALY_MIN_MENTIONS and scored.sum() >= SENTIMENT_ANOMALY_MIN_DAYS:
+            averages = history["score_sum"][scored] / history["scored"][scored]
+            if averages.std() > 0:
+                z = (today.average - averages.mean()) / averages.std()
+                if abs(z) >= SENTIMENT_ANOMALY_Z:
+                    kind = "تحسن مفاجئ" if z > 0 else "تراجع مفاجئ"
+                    lines.append(f"• {label}: {kind} في المشاعر ({today.average:.2f}، z={z:+.1f})")
+    return lines
+
+def build_sentiment_trend(trends: SentimentTrends, days: int | None, now: float | None = None) -> str:
+    """Trend text for the last `days` (default SENTIMENT_TREND_DAYS) against the period before."""
+    now = time.time() if now is None else now
+    days = days or SENTIMENT_TREND_DAYS
+    width = HOUR if days <= trends.max_days(HOUR) else DAY
+    days = min(days, trends.max_days(width))
+    per_day = DAY // width
+    buckets = days * per_day
+
+    overall = trends.window(ALL_PLATFORMS, width, now, 2 * buckets)
+    if overall is None:
+        return "📭 لا توجد إشارات كافية لتحليل الاتجاه بعد."
+    current, previous = _totals(overall, buckets, 2 * buckets), _totals(overall, 0, buckets)
+    if not current["count"]:
+        return f"📭 لا توجد إشارات في آخر {days} أيام."
+
+    period = "آخر 24 ساعة" if days == 1 else f"آخر {days} أيام"
+    average, before = current.average, previous.average
+    delta = None if average is None or before is None else average - before
+    verdict = (
+        "➖ المشاعر مستقرة" if delta is None or abs(delta) < SENTIMENT_TREND_MIN_DELTA else
+        "✅ المشاعر تتحسن" if delta > 0 else "⚠️ المشاعر تتراجع"
+    )
+    points = 24 if days == 1 else days if days <= 31 else next(p for p in (15, 10, 6, 5, 3, 2, 1) if buckets % p == 0)
+    recent = {field: values[buckets:] for field, values in overall.items()}
+
+    parts = [
+        f"📈 اتجاه المشاعر ({period} مقارنة بالفترة السابقة):\n",
+        verdict,
+        f"• متوسط المشاعر: {'غير متوفر' if average is None else f'{average:.2f} {score_icon(average)}'}"
+        f"{_score_change(average, before)}",
+        f"• عدد الإشارات: {current['count']:,.0f} ({_change(current['count'], previous['count'])})",
+        f"• إجمالي التفاعل: {current['engagement']:,.0f} 👥 ({_change(current['engagement'], previous['engagement'])})",
+        f"• المسار: {_sparkline(recent, points)}\n",
+    ]
+
+    rows = []
+    for platform in trends.platforms:
+        fields = trends.window(platform, width, now, 2 * buckets)
+        now_totals, before_totals = _totals(fields, buckets, 2 * buckets), _totals(fields, 0, buckets)
+        if now_totals["count"]:
+            rows.append((now_totals, before_totals, platform))
+    for now_totals, before_totals, platform in sorted(rows, key=lambda r: -r[0]["count"]):
+        platform_average = now_totals.average
+        shown = "—" if platform_average is None else f"{platform_average:.2f} {score_icon(platform_average)}"
+        parts.append(
+            f"• {platform}: {shown}{_score_change(platform_average, before_totals.average)} | "
+            f"{now_totals['count']:,.0f} إشارة ({_change(now_totals['count'], before_totals['count'])})"
+        )
+
+    anomalies = _anomalies(trends, now)
+    parts.append("\n🚨 تنبيهات آخر 24 ساعة:\n" + "\n".join(anomalies) if anomalies else "\n✅ لا توجد قيم شاذة في آخر 24 ساعة.")
+    return "\n".join(parts)
+
+@traced("summary", intent="sentiment_trend")
+async def fetch_sentiment_trend(days: int | None = None) -> str:
+    """Sentiment trend, deltas and anomalies from the in-memory series; no query per request."""
+    if not SENTIMENT_TRENDS_ENABLED:
+        return "ℹ️ تحليل اتجاه المشاعر غير مفعّل حالياً."
+    if not feed_for("mentions").ready:
+        return "⏳ بيانات اتجاه المشاعر قيد التحميل، حاول بعد قليل."
+    try:
+        with span("aggregate"):
+            return build_sentiment_trend(sentiment_trends, days)
+    except Exception as e:
+        logger.error("Sentiment trend failed", extra={"days": days, "error": str(e)})
+        return f"❌ فشل في تحليل اتجاه المشاعر:\n🔥 {e}"
@@ -1,40 +1,110 @@
-from datetime import datetime
-from .supabase_client import supabase
+import logging
+import os
+import re
 
-def debug_fetch_latest_seo():
+from .arabic import normalize_arabic
+from .formatters import SEO_FORMATTER
+from .keyword_index import SEO_KEYWORD_INDEX_ENABLED, normalize_keyword, seo_keyword_index
+from .row_feed import feed_for
+from .summary_cache import summary_cache
+from .schema_registry import SchemaUnavailableError
+from .table_reader import SUMMARY_PAGE_SIZE, SummaryPage, fetch_rows_page
+from .telemetry import span, traced
+from .text_index import STOPWORDS
+
+logger = logging.getLogger(__name__)
+
+# SEO signals are always ranked by search volume
+SEO_ORDER_COLUMNS = ("volume",)
+
+SEO_KEYWORD_RESULTS = int(os.getenv("SEO_KEYWORD_RESULTS", str(SUMMARY_PAGE_SIZE)))
+
+# Keyword questions by kind; the first kind with a matching phrase wins
+_KEYWORD_MODES = [(mode, [normalize_arabic(p) for p in phrases]) for mode, phrases in (
+    ("most_competitive", ("most competitive", "highest competition", "اكثر منافسة", "الأعلى منافسة")),
+    ("least_competitive", ("least competitive", "lowest competition", "easiest", "أقل منافسة", "الأسهل")),
+    ("improved", ("improved", "moved up", "gained", "تحسن", "تقدم", "ارتفع")),
+    ("dropped", ("dropped", "fell", "declined", "lost", "تراجع", "انخفض", "نزل")),
+    ("prefix", ("starting with", "start with", "starts with", "begin with", "begins with", "تبدأ ب", "يبدأ ب")),
+)]
+# Phrases that introduce the keyword itself; whatever follows the last one is the term.
+# Whole words only, except a trailing one-letter preposition that may be attached (ل, ب).
+_KEYWORD_LEAD_INS = [normalize_arabic(p) for p in (
+    "where do we rank for", "where are we ranking for", "how do we rank for", "rank for", "ranking for",
+    "ranking of", "position for", "position of", "keyword",
+    "وين ترتيبنا في", "وين ترتيبنا ل", "ترتيبنا في", "ترتيبنا ل", "نترتب في", "نترتب ل", "ترتيب كلمة",
+    "مركزنا في", "موقعنا في", "كلمة",
+    "starting with", "start with", "starts with", "begin with", "begins with", "تبدأ ب", "يبدأ ب",
+)]
+_KEYWORD_LEAD_IN = re.compile("|".join(
+    r"\b" + re.escape(p) + ("" if len(p.split()[-1]) == 1 else r"\b") for p in _KEYWORD_LEAD_INS
+))
+# Generic SEO vocabulary: what's left after removing it is the keyword, if any
+_KEYWORD_NOISE = {normalize_arabic(w) for w in (
+    "google", "جوجل", "قوقل", "seo", "keyword", "keywords", "كلمة", "الكلمة", "كلمات", "الكلمات",
+    "للكلمة", "للكلمات", "بالكلمات", "مفتاحية", "المفتاحية", "search", "البحث", "نتائج", "محرك",
+    "محركات", "engine", "engines", "ranking", "rankings", "rank", "ترتيب", "الترتيب", "ترتيبنا",
+)}
+
+def extract_keyword_args(message: str) -> tuple[str, str]:
+    """
+    (mode, term) of a keyword question, e.g.
+    "where do we rank for حليب" -> ("keyword", "حليب"),
+    "keywords starting with لبن" -> ("prefix", "لبن"),
+    "most competitive keywords" -> ("most_competitive", "").
+    """
+    text = normalize_arabic(message)
+    mode = next((mode for mode, phrases in _KEYWORD_MODES if any(p in text for p in phrases)), "keyword")
+    if mode not in ("keyword", "prefix"):
+        return mode, ""
+
+    quoted = re.search(r"[\"“«](.+?)[\"”»]", text)
+    if quoted:
+        return mode, normalize_keyword(quoted.group(1))
+    cut = max((match.end() for match in _KEYWORD_LEAD_IN.finditer(text)), default=None)
+    if cut is None:
+        return mode, ""
+    words = [w for w in re.findall(r"\w+", text[cut:]) if w not in _KEYWORD_NOISE]
+    # Keywords may contain stopwords ("milk for kids"), so only the edges are trimmed
+    while words and words[0] in STOPWORDS:
+        words.pop(0)
+    while words and words[-1] in STOPWORDS:
+        words.pop()
+    return mode, " ".join(words)
+
+async def _build_seo_signals_page(cursor: str | None = None) -> SummaryPage:
+    """Loads and formats one page of SEO signals. Raises on failure so errors are never cached."""
+    page = await fetch_rows_page("seo_signals", SEO_ORDER_COLUMNS, cursor=cursor)
+
+    if not page.rows:
+        if cursor:
+            return SummaryPage("📭 لا يوجد المزيد من الكلمات المفتاحية.")
+        return SummaryPage("📭 لم يتم العثور على أي تحليلات SEO حديثة.")
+
+    summary_parts = ["🔍 المزيد من الكلمات المفتاحية:\n" if cursor else "🔍 آخر تحليل لتحسين محركات البحث:\n"]
+    with span("format"):
+        summary_parts += SEO_FORMATTER.format_rows(page.rows)
+
+    return SummaryPage("\n".join(summary_parts), page.next_cursor)
+
+@traced("summary", intent="seo")
+async def fetch_seo_signals_page(cursor: str | None = None) -> SummaryPage:
     """
-    Debug function to check Supabase connection and seo_signals table structure.
+    One page of SEO signals; pass the previous page's next_cursor for "show more".
+    The first page is cached and shared with fetch_seo_signals_summary.
     """
     try:
-        response = supabase.table("seo_signals").select("*").limit(1).execute()
-        
-        print("🔍 DEBUG: Supabase Response")
-        print(f"Status: {response.status_code if hasattr(response, 'status_code') else 'N/A'}")
-        
-        if response.data:
-            signal = response.data[0]
-            print("✅ Found SEO signal data:")
-            print(f"Available columns: {list(signal.keys())}")
-            return {
-                "success": True,
-                "data": signal,
-                "columns": list(signal.keys())
-            }
-        else:
-            print("⚠️ No SEO signals found in database")
-            return {
-                "success": False,
-                "error": "No SEO signals found in database"
-            }
+        if cursor is None:
+            return await summary_cache.get_or_load("seo_signals", _build_seo_signals_page)
+        return await _build_seo_signals_page(cursor)
+    except SchemaUnavailableError as e:
+        return SummaryPage(f"⚠️ خطأ في الاتصال: {e}")
     except Exception as e:
-        error_msg = f"🔥 Supabase Error: {str(e)}"
-        print(error_msg)
-        return {
-            "success": False,
-            "error": error_msg
-        }
-
-def fetch_seo_signals_summary() -> str:
+        error_msg = f"🔥 Error fetching SEO signals: {str(e)}"
+        logger.error("Summary fetch failed", extra={"table": "seo_signals", "error": str(e)})
+        return SummaryPage(f"❌ فشل في جلب بيانات SEO:\n{error_msg}")
+
+async def fetch_seo_signals_summary() -> str:
     """
     Fetches latest SEO metrics with detailed error reporting.
     Schema:
@@ -44,51 +114,64 @@ def fetch_seo_signals_summary() -> str:
     - cpc: float
     - competition: float
     """
-    try:
-        # First, run debug check
-        debug_result = debug_fetch_latest_seo()
-        if not debug_result["success"]:
-            return f"⚠️ خطأ في الاتصال: {debug_result['error']}"
-
-        # If debug successful, try actual fetch with correct columns
-        available_columns = debug_result.get("columns", [])
-
-        result = supabase.table("seo_signals") \
-            .select(",".join(available_columns)) \
-            .order("volume", desc=True) \
-            .limit(5) \
-            .execute()
-
-        if not result.data:
-            return "📭 لم يتم العثور على أي تحليلات SEO حديثة."
-
-        signals = result.data
-        summary_parts = ["🔍 آخر تحليل لتحسين محركات البحث:\n"]
-
-        for signal in signals:
-            try:
-                competition = signal.get("competition", 0)
-                competition_level = (
-                    "عالية 🔴" if competition > 0.66 else
-                    "متوسطة 🟡" if competition > 0.33 else
-                    "منخفضة 🟢"
-                )
-                
-                summary_parts.append(
-                    f"• الكلمة المفتاحية: {signal.get('keyword', '[غير معروف]')}\n"
-                    f"  - الموقع: {signal.get('position', 'N/A')} 📊\n"
-                    f"  - حجم البحث: {signal.get('volume', '0')} 🔍\n"
-                    f"  - تكلفة النقرة: ${signal.get('cpc', '0.00'):.2f} 💰\n"
-                    f"  - المنافسة: {competition_level}\n"
-                )
-            except Exception as signal_e:
-                print(f"🔥 Error processing SEO signal: {signal_e}")
-                print(f"Signal data: {signal}")
-                summary_parts.append("⚠️ خطأ في معالجة هذه الكلمة المفتاحية")
-
-        return "\n".join(summary_parts)
+    return (await fetch_seo_signals_page()).text
 
-    except Exception as e:
-        error_msg = f"🔥 Error fetching SEO signals: {str(e)}"
-        print(error_msg)
-        return f"❌ فشل في جلب بيانات SEO:\n{error_msg}"
\ No newline at end of file
+def _rank_change(change: int | None, before: int | None) -> str:
+    if not change:
+        return ""
+    arrow = "⬆️" if change > 0 else "⬇️"
+    return f"  - تغير الترتيب: {arrow} {abs(change)} (كان {before})\n"
+
+def _format_keywords(slots: list[int]) -> list[str]:
+    index = seo_keyword_index
+    lines = SEO_FORMATTER.format_rows(index.rows[slot] for slot in slots)
+    return [
+        line + _rank_change(index.position_change(slot), index.previous_positions[slot])
+        for line, slot in zip(lines, slots)
+    ]
+
+_KEYWORD_LISTS = {
+    "most_competitive": ("🔴 الكلمات الأعلى منافسة:\n", seo_keyword_index.most_competitive),
+    "least_competitive": ("🟢 الكلمات الأقل منافسة (فرص أسهل):\n", seo_keyword_index.least_competitive),
+    "improved": ("⬆️ الكلمات التي تحسن ترتيبها:\n", seo_keyword_index.improved),
+    "dropped": ("⬇️ الكلمات التي تراجع ترتيبها:\n", seo_keyword_index.dropped),
+}
+
+@traced("summary", intent="seo_keyword")
+async def fetch_seo_keyword_answer(mode: str, term: str = "") -> str:
+    """
+    Keyword-specific SEO answers from the in-memory keyword index: one
+    keyword's rank (with prefix and typo-tolerant fallbacks), keywords by
+    prefix, by competition, or by rank change. Nothing is read from the
+    table per request.
+    """
+    if mode in ("keyword", "prefix") and not term:
+        return await fetch_seo_signals_summary()
+    if not SEO_KEYWORD_INDEX_ENABLED:
+        return "ℹ️ البحث في الكلمات المفتاحية غير مفعّل حالياً."
+    if not feed_for("seo_signals").ready:
+        return "⏳ فهرس الكلمات المفتاحية قيد البناء، حاول بعد قليل."
+
+    index = seo_keyword_index
+    limit = SEO_KEYWORD_RESULTS
+    with span("search"):
+        if mode in _KEYWORD_LISTS:
+            header, top = _KEYWORD_LISTS[mode]
+            slots = top(limit)
+            if not slots:
+                return "📭 لا توجد بيانات كافية لهذه المقارنة بعد."
+        elif mode == "keyword" and (slot := index.exact(term)) is not None:
+            header, slots = f"🎯 ترتيبنا في «{term}»:\n", [slot]
+        else:
+            slots, total = index.prefix(term, limit)
+            header = f"🔍 كلمات مفتاحية تبدأ بـ «{term}» ({total:,}):\n"
+            if not slots:
+                slots = [slot for slot, _ in index.fuzzy(term, limit)]
+                header = f"🤔 لم نجد «{term}» بالضبط، هل تقصد:\n"
+            if not slots:
+                return f"📭 لا توجد بيانات SEO للكلمة «{term}»."
+
+    parts = [header]
+    with span("format"):
+        parts += _format_keywords(slots)
+    return "\n".join(parts)
@@ -0,0 +1,122 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+logger = logging.getLogger(__name__)
+
+def _ttl_from_env(table: str, default_ttl: float, default_stale: float) -> tuple[float, float]:
+    prefix = f"SUMMARY_CACHE_{table.upper()}"
+    return (
+        float(os.getenv(f"{prefix}_TTL", str(default_ttl))),
+        float(os.getenv(f"{prefix}_STALE", str(default_stale))),
+    )
+
+# (fresh seconds, extra seconds a stale value may be served while refreshing)
+SUMMARY_TTLS = {
+    "mentions": _ttl_from_env("mentions", 60, 300),
+    "posts": _ttl_from_env("posts", 120, 600),
+    "seo_signals": _ttl_from_env("seo_signals", 900, 3600),
+}
+DEFAULT_TTL = (60.0, 300.0)
+
+@dataclass
+class _Entry:
+    value: Any
+    fresh_until: float
+    stale_until: float
+
+class SummaryCache:
+    """
+    TTL cache for tool results that are identical for every user.
+
+    - Fresh entries are served directly.
+    - Stale entries are served immediately while one background refresh runs.
+    - Concurrent misses for the same key share a single upstream load.
+    Loaders should raise on failure; errors are never cached.
+    """
+
+    def __init__(self, ttls: dict[str, tuple[float, float]] | None = None):
+        self._ttls = ttls or {}
+        self._entries: dict[str, _Entry] = {}
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._generation: dict[str, int] = {}
+        self._stats = {"hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0,
+                       "loads": 0, "load_errors": 0, "invalidations": 0}
+
+    def _ttl(self, key: str) -> tuple[float, float]:
+        return self._ttls.get(key, DEFAULT_TTL)
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        generation = self._generation.get(key, 0)
+        self._stats["loads"] += 1
+        try:
+            value = await loader()
+        except Exception:
+            self._stats["load_errors"] += 1
+            raise
+        finally:
+            self._inflight.pop(key, None)
+
+        # Skip the store if an invalidation happened while we were loading
+        if self._generation.get(key, 0) == generation:
+            ttl, stale = self._ttl(key)
+            now = time.monotonic()
+            self._entries[key] = _Entry(value, now + ttl, now + ttl + stale)
+        return value
+
+    def _start_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._load(key, loader))
+            self._inflight[key] = task
+        return task
+
+    async def _refresh_in_background(self, key: str, loader: Callable[[], Awaitable[Any]]):
+        try:
+            await self._start_load(key, loader)
+        except Exception as e:
+            # Keep serving the stale value; the next stale hit retries
+            logger.warning("Background refresh failed", extra={"key": key, "error": str(e)})
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        now = time.monotonic()
+        entry = self._entries.get(key)
+
+        if entry and now < entry.fresh_until:
+            self._stats["hits"] += 1
+            return entry.value
+
+        if entry and now < entry.stale_until:
+            self._stats["stale_hits"] += 1
+            if key not in self._inflight:
+                asyncio.ensure_future(self._refresh_in_background(key, loader))
+            return entry.value
+
+        self._stats["misses"] += 1
+        if key in self._inflight:
+            self._stats["coalesced"] += 1
+        # shield: a cancelled caller must not cancel the load other callers wait on
+        return await asyncio.shield(self._start_load(key, loader))
+
+    def invalidate(self, key: str | None = None):
+        """Admin hook: drop one key (or everything) so the next call reloads."""
+        keys = list(self._entries) + list(self._inflight) if key is None else [key]
+        for k in keys:
+            self._entries.pop(k, None)
+            self._generation[k] = self._generation.get(k, 0) + 1
+        self._stats["invalidations"] += 1
+
+    def stats(self) -> dict:
+        lookups = self._stats["hits"] + self._stats["stale_hits"] + self._stats["misses"]
+        return {
+            **self._stats,
+            "entries": len(self._entries),
+            "inflight": len(self._inflight),
+            "hit_rate": round((self._stats["hits"] + self._stats["stale_hits"]) / lookups, 4) if lookups else 0.0,
+        }
+
+# Shared by the mentions, posts and SEO summary tools
+summary_cache = SummaryCache(SUMMARY_TTLS)
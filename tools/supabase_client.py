@@ -1,12 +1,83 @@
-from supabase import create_client
+import asyncio
 import os
+from typing import TYPE_CHECKING
+
 from dotenv import load_dotenv
 
+if TYPE_CHECKING:
+    # supabase (postgrest, gotrue, realtime, storage) and httpx are imported
+    # on first use, not at startup; see benchmarks/import_profile.py
+    import httpx
+    from supabase import AsyncClient
+
 # Load environment variables
 load_dotenv()
 
-# Initialize Supabase client
-supabase = create_client(
-    supabase_url=os.getenv("SUPABASE_URL"),
-    supabase_key=os.getenv("SUPABASE_ANON_KEY")
-)
\ No newline at end of file
+SUPABASE_URL = os.getenv("SUPABASE_URL")
+SUPABASE_ANON_KEY = os.getenv("SUPABASE_ANON_KEY")
+
+# Connection pool shared by every request in this worker
+SUPABASE_MAX_CONNECTIONS = int(os.getenv("SUPABASE_MAX_CONNECTIONS", "100"))
+SUPABASE_MAX_KEEPALIVE = int(os.getenv("SUPABASE_MAX_KEEPALIVE", "20"))
+SUPABASE_KEEPALIVE_EXPIRY = float(os.getenv("SUPABASE_KEEPALIVE_EXPIRY", "30"))
+SUPABASE_TIMEOUT = float(os.getenv("SUPABASE_TIMEOUT", "10"))
+
+_client: "AsyncClient | None" = None
+_http: "httpx.AsyncClient | None" = None
+_lock = asyncio.Lock()
+
+def _build_http_client() -> "httpx.AsyncClient":
+    """Pooled keep-alive HTTP client used by PostgREST calls."""
+    import httpx
+
+    return httpx.AsyncClient(
+        http2=False,
+        timeout=httpx.Timeout(SUPABASE_TIMEOUT),
+        limits=httpx.Limits(
+            max_connections=SUPABASE_MAX_CONNECTIONS,
+            max_keepalive_connections=SUPABASE_MAX_KEEPALIVE,
+            keepalive_expiry=SUPABASE_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+async def get_supabase() -> "AsyncClient":
+    """
+    Returns the shared async Supabase client, creating it on first use.
+    All tools in the worker reuse the same client and connection pool.
+    """
+    global _client, _http
+    if _client is not None:
+        return _client
+
+    async with _lock:
+        if _client is None:
+            from supabase import AsyncClientOptions, acreate_client
+
+            _http = _build_http_client()
+            try:
+                options = AsyncClientOptions(
+                    httpx_client=_http,
+                    postgrest_client_timeout=SUPABASE_TIMEOUT,
+                )
+            except TypeError:
+                # Older supabase releases don't accept an injected client;
+                # they still keep one pooled httpx client per AsyncClient.
+                await _http.aclose()
+                _http = None
+                options = AsyncClientOptions(postgrest_client_timeout=SUPABASE_TIMEOUT)
+
+            _client = await acreate_client(
+                supabase_url=SUPABASE_URL,
+                supabase_key=SUPABASE_ANON_KEY,
+                options=options,
+            )
+    return _client
+
+async def close_supabase():
+    """Closes the shared client and its connection pool (app shutdown)."""
+    global _client, _http
+    async with _lock:
+        if _http is not None:
+            await _http.aclose()
+        _client = None
+        _http = None
@@ -0,0 +1,138 @@
+import base64
+import binascii
+import json
+import logging
+import os
+from typing import AsyncIterator, NamedTuple
+
+from .keyset import keyset_filter
+from .replica import replica
+from .schema_registry import get_table_schema, invalidate_table_schema
+from .supabase_client import get_supabase
+from .telemetry import span
+
+logger = logging.getLogger(__name__)
+
+# Rows per summary answer and per "show more"
+SUMMARY_PAGE_SIZE = int(os.getenv("SUMMARY_PAGE_SIZE", "5"))
+# Rows per request when streaming a whole table out
+EXPORT_PAGE_SIZE = int(os.getenv("EXPORT_PAGE_SIZE", "500"))
+
+class RowPage(NamedTuple):
+    rows: list[dict]
+    next_cursor: str | None
+
+class SummaryPage(NamedTuple):
+    """A formatted page of a summary tool, plus the cursor for "show more"."""
+    text: str
+    next_cursor: str | None = None
+
+def encode_cursor(column: str, row: dict) -> str:
+    """Opaque cursor for the position just after `row` in (column, id) order."""
+    payload = json.dumps([column, row.get(column), row.get("id")], ensure_ascii=False)
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+def decode_cursor(cursor: str) -> tuple[str, object, object]:
+    try:
+        column, value, row_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+    return column, value, row_id
+
+def _next_cursor(rows: list[dict], column: str, limit: int) -> str | None:
+    # A short page is the last one
+    if len(rows) < limit or "id" not in rows[-1]:
+        return None
+    return encode_cursor(column, rows[-1])
+
+async def _fetch_remote_page(table: str, order_candidates: tuple[str, ...], limit: int,
+                             after: tuple | None) -> RowPage:
+    with span("schema"):
+        schema = await get_table_schema(table, order_candidates)
+    column = schema.order_column
+    supabase = await get_supabase()
+    query = supabase.table(table).select(schema.select_clause)
+    if schema.has("id"):
+        # Rows without an order value can't be placed on a page boundary
+        if column != "id":
+            query = query.not_.is_(column, "null")
+        if after and after[0] == column:
+            query = query.or_(keyset_filter(column, after[1], after[2], desc=True))
+        if column != "id":
+            query = query.order(column, desc=True)
+        query = query.order("id", desc=True)
+    else:
+        query = query.order(column, desc=True)
+    try:
+        with span("supabase"):
+            result = await query.limit(limit).execute()
+    except Exception:
+        # Columns may have changed since discovery; re-probe next time
+        invalidate_table_schema(table)
+        raise
+    rows = result.data or []
+    return RowPage(rows, _next_cursor(rows, column, limit) if schema.has("id") else None)
+
+async def fetch_rows_page(table: str, order_candidates: tuple[str, ...], limit: int = SUMMARY_PAGE_SIZE,
+                          cursor: str | None = None) -> RowPage:
+    """
+    One page of a table, newest first by its preferred order column, using
+    keyset pagination on (order column, id) so later pages cost the same as
+    the first.
+
+    Reads the local replica when it is enabled and fresh; otherwise queries
+    Supabase, falling back to a stale replica if Supabase fails.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    if replica is not None and replica.is_fresh(table):
+        with span("replica"):
+            rows, column = replica.page_rows(table, order_candidates, limit, after)
+        return RowPage(rows, _next_cursor(rows, column, limit))
+
+    try:
+        return await _fetch_remote_page(table, order_candidates, limit, after)
+    except Exception as e:
+        if replica is not None and replica.has_data(table):
+            logger.warning("Supabase unavailable, serving replica", extra={"table": table, "error": str(e)})
+            rows, column = replica.page_rows(table, order_candidates, limit, after)
+            return RowPage(rows, _next_cursor(rows, column, limit))
+        raise
+
+async def iter_table(table: str, columns: tuple[str, ...], page_size: int = EXPORT_PAGE_SIZE,
+                     after_id=None) -> AsyncIterator[list[dict]]:
+    """
+    Yields a whole table (or only rows with id > after_id) page by page in id
+    order, so only one page is held in memory. Pages come from the replica
+    while it is fresh.
+    """
+    supabase = None
+    last_id = after_id
+    while True:
+        if replica is not None and replica.is_fresh(table):
+            rows = replica.rows_after_id(table, columns, last_id, page_size)
+        else:
+            if supabase is None:
+                supabase = await get_supabase()
+            query = supabase.table(table).select(",".join(columns)).order("id")
+            if last_id is not None:
+                query = query.gt("id", last_id)
+            rows = (await query.limit(page_size).execute()).data or []
+        if rows:
+            yield rows
+        if len(rows) < page_size:
+            return
+        last_id = rows[-1]["id"]
+
+async def fetch_rows_by_id(table: str, ids: list) -> list[dict]:
+    """Full rows for the given ids, in the order given; ids no longer present are skipped."""
+    if not ids:
+        return []
+    if replica is not None and replica.is_fresh(table):
+        with span("replica"):
+            rows = replica.rows_by_id(table, ids)
+    else:
+        supabase = await get_supabase()
+        with span("supabase"):
+            rows = (await supabase.table(table).select("*").in_("id", ids).execute()).data or []
+    by_id = {row["id"]: row for row in rows}
+    return [by_id[i] for i in ids if i in by_id]
@@ -0,0 +1,218 @@
+import math
+import re
+from array import array
+from functools import lru_cache
+from typing import Any, NamedTuple
+
+from .arabic import normalize_arabic
+
+_TOKEN = re.compile(r"\w+")
+
+# In multi-term queries, terms in more than this share of documents are skipped
+COMMON_TERM_RATIO = 0.5
+
+# Normalized forms (see normalize_arabic): no hamza on alef, ه for ة, ي for ى
+STOPWORDS = frozenset("""
+    a an and are as at be but by do does for from has have how i in is it its me my of on or our
+    that the their them they this to us was we were what when where which who why will with you your
+    في على عن من الي الى ان او و ما ماذا وش ايش شو كيف هل هذا هذه ذلك تلك اللي الذي التي مع هو هي
+    احنا نحن انا انت هم لا لم لن قد كل بعض عند كان يكون فيه فيها عليه عليها منه منها
+""".split())
+
+# Light stemming in the spirit of light10: one conjunction/article prefix and
+# one common suffix, never leaving fewer than two letters (three for و)
+_ARABIC_PREFIXES = ("وال", "بال", "كال", "فال", "لل", "ال")
+_ARABIC_SUFFIXES = ("ها", "ان", "ات", "ون", "ين", "يه", "ه", "ي")
+
+@lru_cache(maxsize=65536)
+def stem(token: str) -> str:
+    if token.isascii():
+        if len(token) > 4 and token.endswith("ies"):
+            return token[:-3] + "y"
+        if len(token) > 5 and token.endswith("ing"):
+            return token[:-3]
+        if len(token) > 4 and token.endswith("ed"):
+            return token[:-2]
+        if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+            return token[:-1]
+        return token
+    if len(token) > 3 and token.startswith("و"):
+        token = token[1:]
+    for prefix in _ARABIC_PREFIXES:
+        if token.startswith(prefix) and len(token) - len(prefix) >= 2:
+            token = token[len(prefix):]
+            break
+    for suffix in _ARABIC_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 2:
+            return token[:-len(suffix)]
+    return token
+
+def tokenize(text: str) -> list[str]:
+    """Normalized, stemmed terms without stopwords, in text order."""
+    return [stem(token) for token in _TOKEN.findall(normalize_arabic(text or "")) if token not in STOPWORDS]
+
+class SearchResult(NamedTuple):
+    docs: Any     # document numbers, best first
+    scores: Any
+    total: int    # matching documents before the limit
+
+class _Postings:
+    """Documents (ascending), term frequencies and flattened positions of one term."""
+
+    __slots__ = ("docs", "tfs", "positions")
+
+    def __init__(self):
+        self.docs = array("I")
+        self.tfs = array("H")
+        self.positions = array("H")
+
+class InvertedIndex:
+    """
+    Append-only positional inverted index ranked with BM25.
+
+    Documents get consecutive numbers as they are added, so every posting
+    list stays sorted without re-sorting. Postings are compact arrays that
+    NumPy reads in place; scoring touches only the query terms' postings.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        import numpy as np
+
+        self._np = np
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, _Postings] = {}
+        self._lengths = array("H")
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    @property
+    def terms(self) -> int:
+        return len(self._postings)
+
+    def add(self, text: str) -> int:
+        """Indexes one document; returns its number."""
+        doc = len(self._lengths)
+        positions: dict[str, list[int]] = {}
+        terms = tokenize(text)
+        for position, term in enumerate(terms[:65535]):
+            positions.setdefault(term, []).append(position)
+        for term, where in positions.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = _Postings()
+            postings.docs.append(doc)
+            postings.tfs.append(len(where))
+            postings.positions.extend(where)
+        length = min(len(terms), 65535)
+        self._lengths.append(length)
+        self._total_length += length
+        return doc
+
+    def document_frequency(self, term: str) -> int:
+        postings = self._postings.get(term)
+        return len(postings.docs) if postings else 0
+
+    def _phrase_docs(self, terms: list[str]):
+        """Documents containing the terms at consecutive positions."""
+        np = self._np
+        # One (document << 16 | position) key per occurrence
+        keys = []
+        for term in terms:
+            postings = self._postings[term]
+            docs = np.frombuffer(postings.docs, dtype=np.uint32).astype(np.int64)
+            tfs = np.frombuffer(postings.tfs, dtype=np.uint16)
+            keys.append((np.repeat(docs, tfs) << 16) | np.frombuffer(postings.positions, dtype=np.uint16))
+        starts = keys[0]
+        for offset, following in enumerate(keys[1:], 1):
+            starts = starts[np.isin(starts + offset, following)]
+        return np.unique(starts >> 16).astype(np.uint32)
+
+    def search(self, query: str, limit: int = 10, mask=None, phrase: bool = False,
+               after: tuple[float, int] | None = None) -> SearchResult:
+        """
+        Top documents for a query, best first (newer first on ties).
+        Documents match any query term (all of them, in order, if `phrase`).
+        `mask` optionally filters documents: a boolean array over document
+        numbers, or a function from a document-number array to booleans.
+        `after` is the (score, document) of the previous page's last result;
+        only documents ranked after it are returned (`total` still counts all).
+        """
+        np = self._np
+        empty = SearchResult(np.empty(0, dtype=np.uint32), np.empty(0, dtype=np.float32), 0)
+        tokens = tokenize(query)
+        terms = [t for t in dict.fromkeys(tokens) if t in self._postings]
+        if not terms or not len(self):
+            return empty
+        allowed = None
+        if phrase and len(tokens) > 1:
+            if len(terms) < len(set(tokens)):
+                return empty
+            allowed = self._phrase_docs(tokens)
+
+        count = len(self)
+        if len(terms) > 1 and allowed is None:
+            # Terms in most documents barely change the ranking but dominate the cost
+            selective = [t for t in terms if self.document_frequency(t) <= count * COMMON_TERM_RATIO]
+            terms = selective or terms
+        lengths = np.frombuffer(self._lengths, dtype=np.uint16)
+        average = self._total_length / count
+
+        doc_parts, score_parts = [], []
+        for term in terms:
+            postings = self._postings[term]
+            docs = np.frombuffer(postings.docs, dtype=np.uint32)
+            tfs = np.frombuffer(postings.tfs, dtype=np.uint16).astype(np.float32)
+            df = len(docs)
+            idf = math.log(1 + (count - df + 0.5) / (df + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * lengths[docs] / average)
+            doc_parts.append(docs)
+            score_parts.append(idf * tfs * (self.k1 + 1) / (tfs + norm))
+
+        postings_total = sum(len(d) for d in doc_parts)
+        if len(terms) == 1:
+            docs, scores = doc_parts[0], score_parts[0]
+        elif postings_total * 8 > count:
+            # Dense accumulator: cheaper than sorting many postings
+            dense = np.zeros(count, dtype=np.float32)
+            for docs, scores in zip(doc_parts, score_parts):
+                dense[docs] += scores
+            docs = np.flatnonzero(dense).astype(np.uint32)
+            scores = dense[docs]
+        else:
+            merged = np.concatenate(doc_parts)
+            docs, inverse = np.unique(merged, return_inverse=True)
+            scores = np.bincount(inverse, weights=np.concatenate(score_parts)).astype(np.float32)
+
+        keep = None
+        if allowed is not None:
+            keep = np.isin(docs, allowed, assume_unique=True)
+        if mask is not None:
+            allowed_docs = mask(docs) if callable(mask) else mask[docs]
+            keep = allowed_docs if keep is None else keep & allowed_docs
+        if keep is not None:
+            docs, scores = docs[keep], scores[keep]
+
+        total = len(docs)
+        if after is not None:
+            score, doc = np.float32(after[0]), after[1]
+            later = (scores < score) | ((scores == score) & (docs < doc))
+            docs, scores = docs[later], scores[later]
+        if len(docs) > limit:
+            # Every document tied with the k-th score stays in, so the
+            # tie-break below (not argpartition) decides which of them make it
+            kth = np.partition(scores, len(scores) - limit)[len(scores) - limit]
+            keep = scores >= kth
+            docs, scores = docs[keep], scores[keep]
+        order = np.lexsort((-docs.astype(np.int64), -scores))[:limit]
+        return SearchResult(docs[order], scores[order], total)
+
+    def stats(self) -> dict:
+        return {
+            "documents": len(self),
+            "terms": self.terms,
+            "postings": sum(len(p.docs) for p in self._postings.values()),
+            "average_length": round(self._total_length / len(self), 2) if len(self) else 0.0,
+        }
@@ -0,0 +1,69 @@
+import asyncio
+import importlib
+import logging
+import os
+import time
+
+from intent_classifier import classifier
+from tools.mentions_tool import fetch_mentions_page
+from tools.posts_tool import fetch_posts_page
+from tools.seo_tool import fetch_seo_signals_page
+from tools.supabase_client import get_supabase
+
+logger = logging.getLogger(__name__)
+
+# Off: skip priming; the app is ready as soon as it starts
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() in ("1", "true", "yes")
+# Modules imported on first use that are worth loading before traffic arrives
+WARMUP_MODULES = tuple(m for m in os.getenv("WARMUP_MODULES", "numpy,requests").split(",") if m)
+
+_state = {"ready": not WARMUP_ENABLED, "seconds": None, "errors": []}
+
+def _preload(modules: tuple[str, ...]) -> list[str]:
+    missing = []
+    for name in modules:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            missing.append(name)
+    return missing
+
+async def warm_up():
+    """
+    Runs in the background after startup so the server accepts connections
+    immediately: builds the Supabase client, loads deferred modules and fills
+    the first page of each summary in the cache. Failures are logged and
+    don't block readiness; the same work then happens on the first request.
+    """
+    started = time.perf_counter()
+    errors = []
+    try:
+        await get_supabase()
+    except Exception as e:
+        errors.append(f"supabase: {e}")
+
+    results = await asyncio.gather(
+        asyncio.to_thread(_preload, WARMUP_MODULES),
+        asyncio.to_thread(classifier.build),
+        fetch_mentions_page(),
+        fetch_posts_page(),
+        fetch_seo_signals_page(),
+        return_exceptions=True,
+    )
+    for name, result in zip(("modules", "intent_classifier", "mentions", "posts", "seo"), results):
+        if isinstance(result, BaseException):
+            errors.append(f"{name}: {result}")
+        elif name == "modules" and result:
+            errors.append(f"modules: missing {', '.join(result)}")
+
+    _state.update(ready=True, seconds=round(time.perf_counter() - started, 3), errors=errors)
+    if errors:
+        logger.warning("Warm-up finished with errors", extra={"seconds": _state["seconds"], "errors": errors})
+    else:
+        logger.info("Warm-up finished", extra={"seconds": _state["seconds"]})
+
+def is_ready() -> bool:
+    return _state["ready"]
+
+def warmup_state() -> dict:
+    return dict(_state)